@@ -1,46 +1,69 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlmodel import select
 from jose import JWTError
 from datetime import timedelta
 
 from app.core.models import Users
-from app.db.init_db import engine
-from app.security import verify_password, create_access_token, decode_token, ACCESS_TOKEN_EXPIRE_MINUTES, hash_password
+from app.db.engine import async_session
+from app.security import (
+    averify_password, create_access_token, decode_token, ACCESS_TOKEN_EXPIRE_MINUTES, ahash_password,
+    AUTH_EMBED_CLAIMS, get_cached_principal, cache_principal, claims_are_fresh, PasswordHasherBusy
+)
 from app.core.schemas import Token, TokenData, UserCreate, UserRead
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
+def _hashing_overloaded(e: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/users", response_model=UserRead)
-def register(u: UserCreate):
-    with Session(engine) as session:
-        exists = session.exec(select(Users).where(Users.email == u.email)).first()
-        if exists:
-            raise HTTPException(status_code=400, detail="Email already registered")
-        user = Users(
-            email=u.email,
-            name=u.name,
-            hashed_password=hash_password(u.password)
-        )
+async def register(u: UserCreate):
+    async with async_session() as session:
+        exists = (await session.exec(select(Users).where(Users.email == u.email))).first()
+    if exists:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    # Hash between sessions: a pooled connection must not wait on bcrypt.
+    try:
+        hashed_password = await ahash_password(u.password)
+    except PasswordHasherBusy as e:
+        raise _hashing_overloaded(e)
+    user = Users(
+        email=u.email,
+        name=u.name,
+        hashed_password=hashed_password
+    )
+    async with async_session() as session:
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
     return user
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    with Session(engine) as session:
-        user = session.exec(select(Users).where(Users.email == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+    async with async_session() as session:
+        user = (await session.exec(select(Users).where(Users.email == form_data.username))).first()
+    try:
+        verified = user is not None and await averify_password(form_data.password, user.hashed_password)
+    except PasswordHasherBusy as e:
+        raise _hashing_overloaded(e)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    claims = {"sub": str(user.user_id)}
+    if AUTH_EMBED_CLAIMS:
+        claims.update({"name": user.name, "email": user.email})
     access_token = create_access_token(
-        data={"sub": str(user.user_id)},
+        data=claims,
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -51,17 +74,27 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Users:
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = get_cached_principal(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = decode_token(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
         token_data = TokenData(user_id=user_id)
-    except JWTError:
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    with Session(engine) as session:
-        user = session.exec(select(Users).where(Users.user_id == token_data.user_id)).first()
-    if user is None:
-        raise credentials_exception
+    if "email" in payload and "name" in payload and claims_are_fresh(user_id, payload.get("iat")):
+        # Signed claims are enough for every handler; password hashes are never needed here.
+        user = Users(user_id=token_data.user_id, name=payload["name"], email=payload["email"], hashed_password="")
+    else:
+        async with async_session() as session:
+            user = (await session.exec(select(Users).where(Users.user_id == token_data.user_id))).first()
+        if user is None:
+            raise credentials_exception
+
+    cache_principal(token, str(token_data.user_id), user, payload["exp"])
     return user
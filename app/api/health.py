@@ -0,0 +1,33 @@
+import os
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.db.engine import async_engine
+from app.lifecycle import check_database, lifecycle
+
+router = APIRouter()
+
+
+@router.get("/health/live")
+async def live():
+    # Answering at all proves the event loop is responsive; nothing else is checked.
+    return {"status": "alive", "pid": os.getpid(), "uptime_seconds": round(time.time() - lifecycle.started_at, 1)}
+
+
+@router.get("/health/ready")
+async def ready():
+    # Not ready while starting or draining, or when the database does not answer.
+    ok = lifecycle.ready and await check_database(async_engine)
+    if ok:
+        state = "ready"
+    else:
+        state = "degraded" if lifecycle.ready else lifecycle.phase
+    body = {
+        "status": state,
+        "pid": os.getpid(),
+        "in_flight": lifecycle.in_flight,
+        "checks": lifecycle.checks,
+    }
+    return JSONResponse(body, status_code=200 if ok else 503)
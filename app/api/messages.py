@@ -1,40 +1,176 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import logging
+from contextlib import AsyncExitStack
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.sessions.store import load_state, save_state
-from app.langgraph_agent.graph import run_graph_with_state, run_graph
-from app.db.functions import save_conversation
+from app.sessions.store import aload_state, asave_state
+from app.sessions.concurrency import user_runs, UserBusyError
+from app.langgraph_agent.graph import run_graph_with_state, stream_graph
+from app.langgraph_agent import context
+from app.db.conversation_writer import log_conversation
 from app.api.auth import get_current_user
 from app.core.models import Users
+from app.lifecycle import DrainingError, lifecycle
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Keeps streaming runs alive even if the client disconnects before the last event.
+_BACKGROUND_RUNS: set[asyncio.Task] = set()
+
 class Message(BaseModel):
     message: str
 
+def _resume_state(user_id: str, message: str, prev: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "latest_user_message": message,
+        "intent": prev["intent"],
+        "parameters": prev["parameters"],
+        "missing_params": prev["missing_params"],
+        "history": prev.get("history") or [],
+        "summary": prev.get("summary"),
+        "follow_up_prompt": None
+    }
+
+async def _new_state(user_id: str, message: str) -> dict:
+    return {
+        "user_id": user_id,
+        "latest_user_message": message,
+        "intent": None,
+        "parameters": {},
+        "missing_params": [],
+        "LLM_response": None,
+        # No session: pick the thread back up from the conversation log.
+        "history": await context.load_recent_turns(user_id),
+        "summary": None
+    }
+
+def _public(result: dict) -> dict:
+    return {
+        "intent": result.get("intent"),
+        "parameters": result.get("parameters"),
+        "missing_params": result.get("missing_params", []),
+        "LLM_response": result.get("LLM_response")
+    }
+
+async def _finish_turn(user_id: str, result: dict) -> None:
+    agent_msg = result.get("LLM_response") or "All set!"
+    logger.debug("agent response for user_id=%s: %s", user_id, agent_msg)
+
+    await log_conversation(user_id, agent_msg, direction="agent")
+
+    context.add_turn(result, "user", result["latest_user_message"], intent=result.get("intent"))
+    context.add_turn(result, "agent", agent_msg)
+    await asave_state(user_id, result)
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _busy(e: UserBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
+def _draining(e: DrainingError) -> HTTPException:
+    # Retry-After lets a load balancer or client resend the turn to another worker.
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/messages")
 async def handle_message(msg: Message, current_user: Users = Depends(get_current_user)):
-    save_conversation(str(current_user.user_id), msg.message, direction="user")
-
-    prev = load_state(str(current_user.user_id))
-
-    if prev:
-        initial_state = {
-            "user_id": str(current_user.user_id),
-            "latest_user_message": msg.message,
-            "intent": prev["intent"],
-            "parameters": prev["parameters"],
-            "missing_params": prev["missing_params"],
-            "follow_up_prompt": None
-        }
+    user_id = str(current_user.user_id)
+
+    async def turn() -> dict:
+        prev = await aload_state(user_id)
+        initial_state = _resume_state(user_id, msg.message, prev) if prev else await _new_state(user_id, msg.message)
+        await log_conversation(user_id, msg.message, direction="user")
+
         result = await run_graph_with_state(initial_state)
-    else:
-        result = await run_graph(user_id=str(current_user.user_id), message=msg.message)
 
-    agent_msg = result.get("follow_up_prompt") or "All set!"
-    print(f"AGENT response: {agent_msg}")
+        await _finish_turn(user_id, result)
+        return _public(result)
+
+    try:
+        async with lifecycle.track():
+            result = await user_runs.run(user_id, msg.message, turn)
+    except UserBusyError as e:
+        raise _busy(e)
+    except DrainingError as e:
+        raise _draining(e)
+
+    return {"response": result}
+
+@router.post("/messages/stream")
+async def stream_message(msg: Message, current_user: Users = Depends(get_current_user)):
+    """Server-Sent Events variant of /messages.
+
+    Emits `node` events as graph nodes finish, `token` events while the reply is
+    generated, and a final `done` event carrying the same fields as /messages. A
+    `reset` event means a model call was retried: drop the partial text streamed so far.
+    """
+    user_id = str(current_user.user_id)
+
+    # Held until the background run finishes, so turns for one user never interleave
+    # and shutdown waits for the run even if the client has gone.
+    user_lock = AsyncExitStack()
+    try:
+        await user_lock.enter_async_context(lifecycle.track())
+        await user_lock.enter_async_context(user_runs.user_lock(user_id))
+    except UserBusyError as e:
+        await user_lock.aclose()
+        raise _busy(e)
+    except DrainingError as e:
+        raise _draining(e)
+
+    try:
+        prev = await aload_state(user_id)
+        initial_state = _resume_state(user_id, msg.message, prev) if prev else await _new_state(user_id, msg.message)
+        await log_conversation(user_id, msg.message, direction="user")
+    except BaseException:
+        await user_lock.aclose()
+        raise
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run() -> None:
+        try:
+            result = initial_state
+            async for kind, payload in stream_graph(initial_state):
+                if kind == "final":
+                    result = payload
+                else:
+                    await events.put((kind, payload))
+            await _finish_turn(user_id, result)
+            await events.put(("done", _public(result)))
+        except Exception as e:
+            await events.put(("error", {"detail": str(e)}))
+            raise
+        finally:
+            await user_lock.aclose()
+            await events.put(None)
 
-    save_conversation(str(current_user.user_id), agent_msg, direction="agent")
+    task = asyncio.create_task(run())
+    _BACKGROUND_RUNS.add(task)
+    task.add_done_callback(_BACKGROUND_RUNS.discard)
 
-    save_state(str(current_user.user_id), result)
+    async def event_stream():
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield _sse(*item)
 
-    return {"response": result}
\ No newline at end of file
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
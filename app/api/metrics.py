@@ -0,0 +1,86 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import VECTOR_INDEX_ENABLED
+from app.db.conversation_writer import conversation_writer
+from app.db.invalidation import INVALIDATION_STATS
+from app.db.order_cache import ORDER_CACHE_STATS
+from app.langgraph_agent import fast_intent, graph
+from app.langgraph_agent.resilience import llm_client
+from app.lifecycle import lifecycle
+from app.observability import Collector, registry
+from app.security import PASSWORD_HASH_STATS, PRINCIPAL_CACHE_STATS, password_pool_depth
+from app.sessions.concurrency import user_runs
+from app.sessions.store import get_session_store
+
+router = APIRouter()
+
+
+def _cache_lookups():
+    for node, stats in graph.llm_cache.stats.items():
+        yield {"cache": "llm", "node": node, "outcome": "hit"}, stats["hits"]
+        yield {"cache": "llm", "node": node, "outcome": "miss"}, stats["misses"]
+    for cache, stats in (("principal", PRINCIPAL_CACHE_STATS), ("order_summary", ORDER_CACHE_STATS)):
+        yield {"cache": cache, "node": "", "outcome": "hit"}, stats["hits"]
+        yield {"cache": cache, "node": "", "outcome": "miss"}, stats["misses"]
+    yield {"cache": "fast_intent", "node": "", "outcome": "hit"}, fast_intent.FAST_INTENT_STATS["hits"]
+    yield {"cache": "fast_intent", "node": "", "outcome": "miss"}, fast_intent.FAST_INTENT_STATS["fallbacks"]
+
+
+def _cache_hit_ratio():
+    totals: dict[str, list[float]] = {}
+    for labels, value in _cache_lookups():
+        counts = totals.setdefault(labels["cache"], [0, 0])
+        counts[labels["outcome"] == "miss"] += value
+    for cache, (hits, misses) in totals.items():
+        yield {"cache": cache}, hits / (hits + misses) if hits + misses else 0.0
+
+
+def _events():
+    for outcome, value in llm_client.stats.items():
+        yield {"source": "llm_client", "event": outcome}, value
+    for outcome, value in graph.SPECULATION_STATS.items():
+        yield {"source": "speculation", "event": outcome}, value
+    for outcome, value in user_runs.stats.items():
+        yield {"source": "user_runs", "event": outcome}, value
+    for outcome, value in PASSWORD_HASH_STATS.items():
+        yield {"source": "password_hash", "event": outcome}, value
+    for outcome, value in conversation_writer.stats.items():
+        yield {"source": "conversation_writer", "event": outcome}, value
+    for outcome, value in graph.batcher.stats.items():
+        yield {"source": "llm_batcher", "event": outcome}, value
+    if VECTOR_INDEX_ENABLED:
+        from app.db.vector_index import vector_index
+        for outcome, value in vector_index.stats.items():
+            yield {"source": "vector_index", "event": outcome}, value
+    for outcome, value in lifecycle.stats.items():
+        yield {"source": "lifecycle", "event": outcome}, value
+    for outcome, value in INVALIDATION_STATS.items():
+        yield {"source": "cache_invalidation", "event": outcome}, value
+
+
+def _gauges():
+    yield {"name": "session_store_entries"}, get_session_store().size()
+    yield {"name": "conversation_queue_depth"}, conversation_writer.queue_depth()
+    yield {"name": "active_user_runs"}, user_runs.active_users()
+    yield {"name": "chat_turns_in_flight"}, lifecycle.in_flight
+    yield {"name": "worker_ready"}, 1 if lifecycle.ready else 0
+    yield {"name": "password_hash_pending"}, password_pool_depth()
+    yield {"name": "llm_calls_in_flight"}, llm_client.in_flight
+    yield {"name": "llm_batch_queue_depth"}, graph.batcher.queue_depth()
+    if VECTOR_INDEX_ENABLED:
+        from app.db.vector_index import vector_index
+        yield {"name": "vector_index_products"}, len(vector_index)
+    yield {"name": "llm_breaker_open"}, 0 if llm_client.breaker.state == "closed" else 1
+
+
+registry.register(Collector("cache_lookups_total", "Cache lookups by cache, node and outcome.", "counter", _cache_lookups))
+registry.register(Collector("cache_hit_ratio", "Hit ratio since start per cache.", "gauge", _cache_hit_ratio))
+registry.register(Collector("app_events_total", "Outcome counters of the agent's subsystems.", "counter", _events))
+registry.register(Collector("app_state", "Point-in-time sizes: session store, queues, in-flight runs.", "gauge", _gauges))
+
+
+# A plain def runs in the threadpool, so a blocking session store size() never stalls the loop.
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
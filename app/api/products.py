@@ -0,0 +1,26 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from app.core.models import Users
+from app.core.schemas import ProductPage
+from app.db.functions import SEARCH_RESULT_CAP, RankedProducts, asearch_products, encode_cursor
+from app.api.auth import get_current_user
+
+router = APIRouter()
+
+@router.get("/products", response_model=ProductPage)
+async def search_products(
+    type: Optional[str] = None,
+    query: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    after: Optional[str] = None,
+    limit: int = Query(SEARCH_RESULT_CAP, ge=1),
+    current_user: Users = Depends(get_current_user),
+):
+    price_filter = (min_price, max_price) if min_price is not None or max_price is not None else None
+    items = await asearch_products(type, price_filter, query, after, limit, in_stock)
+    # Similarity ranking has no keyset order; price-ordered pages continue after the last item.
+    full_page = len(items) >= min(limit, SEARCH_RESULT_CAP)
+    next_cursor = encode_cursor(items[-1]) if full_page and items and not isinstance(items, RankedProducts) else None
+    return {"items": items, "next_cursor": next_cursor}
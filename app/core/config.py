@@ -0,0 +1,22 @@
+"""Settings read at import by modules on the API's start-up path.
+
+Only settings that several of those modules share live here. The rest stay at the top
+of the module that uses them. Keeping this module free of heavy imports lets app.main
+start without loading Faker or the seed data.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Read here rather than in app.db.vector_index so callers can check it without loading NumPy.
+VECTOR_INDEX_ENABLED = os.getenv("VECTOR_INDEX_ENABLED", "false").lower() == "true"
@@ -1,7 +1,9 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 from uuid import uuid4, UUID
 from datetime import datetime, timezone
+import time
 
 class Users(SQLModel, table=True):
     user_id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -11,28 +13,50 @@ class Users(SQLModel, table=True):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class Product(SQLModel, table=True):
+    # Serves search_products' keyset pagination: WHERE type = ? AND (price, product_id) > cursor.
+    __table_args__ = (Index("ix_product_type_price_id", "type", "price", "product_id"),)
+
     product_id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str
-    price: float
+    price: float = Field(index=True)
     specs: Optional[str]
-    in_stock: bool = True
-    type: Optional[str] 
+    in_stock: bool = Field(default=True, index=True)
+    type: Optional[str] = Field(default=None, index=True)
 
 VALID_PRODUCT_TYPES = ["mobile", "laptop", "clothing", "home_appliance"]
 
 class Order(SQLModel, table=True):
     order_id: UUID = Field(default_factory=uuid4, primary_key=True)
-    user_id: UUID = Field(foreign_key="users.user_id")
+    user_id: UUID = Field(foreign_key="users.user_id", index=True)
     product_id: UUID = Field(foreign_key="product.product_id")
     quantity: int
     status: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class OrderSummary(SQLModel):
+    """An order joined with the name and price of its product."""
+    order_id: UUID
+    product_id: UUID
+    product_name: Optional[str] = None
+    price: Optional[float] = None
+    quantity: int
+    status: str
+    created_at: datetime
+
 class Conversation(SQLModel, table=True):
+    # Serves the "latest turns for this user" lookup that seeds conversation context.
+    __table_args__ = (Index("ix_conversation_user_timestamp", "user_id", "timestamp"),)
+
     conv_id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="users.user_id")
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     message: str
     direction: str
 
-    
\ No newline at end of file
+class CacheInvalidation(SQLModel, table=True):
+    """A cache entry every process must drop, see app/db/invalidation.py."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    scope: str
+    key: str
+    # Epoch seconds at which the entry went stale.
+    at: float = Field(default_factory=time.time, index=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 class Token(BaseModel):
@@ -21,3 +21,19 @@ class UserRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+class ProductRead(BaseModel):
+    product_id: UUID
+    name: str
+    price: float
+    specs: Optional[str] = None
+    in_stock: bool
+    type: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+class ProductPage(BaseModel):
+    items: List[ProductRead]
+    # Pass as `after` for the next page; None on the last page or for ranked results.
+    next_cursor: Optional[str] = None
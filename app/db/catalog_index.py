@@ -0,0 +1,237 @@
+"""Optional in-process product catalog index for search_products.
+
+Keeps every product sorted by (price, product_id) per type, plus an inverted index of
+name/specs tokens, so type, price-range and query lookups are answered with bisect and
+posting-set lookups instead of a database round trip. Writers in this process call
+upsert()/remove(). Writers elsewhere (seed scripts, other workers) publish a products
+invalidation through app.db.invalidation. invalidate() queues it, and the refresh task
+re-reads just those products, or rebuilds the whole index for "*". A full refresh()
+every CATALOG_REFRESH_SECONDS remains as a backstop. It rebuilds in the background and
+swaps atomically.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from app.core.models import Product
+from app.db.engine import engine
+
+CATALOG_INDEX_ENABLED = os.getenv("CATALOG_INDEX_ENABLED", "false").lower() == "true"
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "300"))
+CATALOG_LOAD_CHUNK = 5000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {
+    "a", "an", "the", "for", "with", "and", "or", "of", "to", "in", "on", "me", "my", "i",
+    "any", "some", "under", "over", "below", "above", "less", "more", "than", "cheap",
+    "looking", "want", "need", "buy", "show", "find", "do", "you", "have",
+}
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def _sort_key(product: Product) -> tuple[float, str]:
+    return (product.price, str(product.product_id))
+
+
+class CatalogIndex:
+    def __init__(self):
+        self._products: dict[str, Product] = {}
+        self._by_type: dict[Optional[str], list[tuple[float, str]]] = {}
+        self._all: list[tuple[float, str]] = []
+        self._tokens: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self._stale_ids: set[str] = set()
+        self._stale_all = False
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def _add(self, product: Product) -> None:
+        pid = str(product.product_id)
+        key = _sort_key(product)
+        self._products[pid] = product
+        insort(self._all, key)
+        insort(self._by_type.setdefault(product.type, []), key)
+        for token in set(tokenize(product.name) + tokenize(product.specs)):
+            self._tokens.setdefault(token, set()).add(pid)
+
+    def _discard(self, pid: str) -> None:
+        product = self._products.pop(pid, None)
+        if product is None:
+            return
+        key = _sort_key(product)
+        for keys in (self._all, self._by_type.get(product.type, [])):
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+        for token in set(tokenize(product.name) + tokenize(product.specs)):
+            ids = self._tokens.get(token)
+            if ids is not None:
+                ids.discard(pid)
+                if not ids:
+                    del self._tokens[token]
+
+    def upsert(self, product: Product) -> None:
+        with self._lock:
+            self._discard(str(product.product_id))
+            self._add(product)
+
+    def remove(self, product_id) -> None:
+        with self._lock:
+            self._discard(str(product_id))
+
+    def load(self, products: Iterable[Product]) -> None:
+        """Replaces the whole index; lookups keep using the old data until the swap."""
+        fresh = CatalogIndex()
+        for product in products:
+            fresh._products[str(product.product_id)] = product
+        fresh._all = sorted(_sort_key(p) for p in fresh._products.values())
+        for key in fresh._all:
+            product = fresh._products[key[1]]
+            fresh._by_type.setdefault(product.type, []).append(key)
+            for token in set(tokenize(product.name) + tokenize(product.specs)):
+                fresh._tokens.setdefault(token, set()).add(key[1])
+        with self._lock:
+            self._products, self._by_type = fresh._products, fresh._by_type
+            self._all, self._tokens = fresh._all, fresh._tokens
+            self.loaded_at = time.time()
+
+    def refresh(self) -> None:
+        """Reloads from the database in keyset-paginated chunks."""
+        products = []
+        after = None
+        with Session(engine) as session:
+            while True:
+                stmt = select(Product).order_by(Product.product_id).limit(CATALOG_LOAD_CHUNK)
+                if after is not None:
+                    stmt = stmt.where(Product.product_id > after)
+                chunk = session.exec(stmt).all()
+                if not chunk:
+                    break
+                products.extend(chunk)
+                after = chunk[-1].product_id
+            session.expunge_all()
+        self.load(products)
+
+    def invalidate(self, key: str, at: float = 0.0) -> None:
+        """Queues a product changed elsewhere ("*" for all of them) for apply_changes()."""
+        if not self.ready:
+            return
+        with self._lock:
+            if key == "*":
+                self._stale_all = True
+            else:
+                self._stale_ids.add(key)
+        if self._changed is not None:
+            self._changed.set()
+
+    def apply_changes(self) -> None:
+        with self._lock:
+            stale_all, stale_ids = self._stale_all, self._stale_ids
+            self._stale_all, self._stale_ids = False, set()
+        if stale_all:
+            self.refresh()
+            return
+        ids = []
+        for pid in stale_ids:
+            try:
+                ids.append(UUID(pid))
+            except ValueError:
+                continue
+        found = []
+        with Session(engine) as session:
+            for start in range(0, len(ids), CATALOG_LOAD_CHUNK):
+                chunk = ids[start:start + CATALOG_LOAD_CHUNK]
+                found.extend(session.exec(select(Product).where(Product.product_id.in_(chunk))).all())
+            session.expunge_all()
+        for product in found:
+            self.upsert(product)
+        for pid in {str(i) for i in ids} - {str(p.product_id) for p in found}:
+            self.remove(pid)
+
+    def search(
+        self,
+        product_type: Optional[str] = None,
+        price_filter: Optional[tuple] = None,
+        query_tokens: Optional[list[str]] = None,
+        after: Optional[tuple[float, str]] = None,
+        limit: int = 20,
+        in_stock: Optional[bool] = None,
+    ) -> list[Product]:
+        keys = self._all if product_type is None else self._by_type.get(product_type, [])
+        lo, hi = 0, len(keys)
+        if price_filter:
+            low, high = price_filter
+            if low is not None:
+                lo = bisect_left(keys, (low, ""))
+            if high is not None:
+                hi = bisect_right(keys, (high, "\uffff"))
+        if after is not None:
+            lo = max(lo, bisect_right(keys, after))
+
+        # Any query token may match, mirroring the OR of ILIKEs on the SQL path.
+        allowed = None
+        if query_tokens:
+            allowed = set().union(*(self._tokens.get(t, set()) for t in query_tokens))
+            if not allowed:
+                return []
+
+        if allowed is not None and len(allowed) < hi - lo:
+            # Few matching products: walk the postings instead of the price range.
+            lo_key = keys[lo] if lo < len(keys) else None
+            hi_key = keys[hi - 1] if hi > 0 else None
+            if lo_key is None or hi_key is None or lo >= hi:
+                return []
+            matches = sorted(
+                key for key in (_sort_key(self._products[pid]) for pid in allowed)
+                if lo_key <= key <= hi_key
+                and (product_type is None or self._products[key[1]].type == product_type)
+                and (in_stock is None or self._products[key[1]].in_stock == in_stock)
+            )
+            return [self._products[key[1]] for key in matches[:limit]]
+
+        results = []
+        for i in range(lo, hi):
+            pid = keys[i][1]
+            if allowed is not None and pid not in allowed:
+                continue
+            if in_stock is not None and self._products[pid].in_stock != in_stock:
+                continue
+            results.append(self._products[pid])
+            if len(results) >= limit:
+                break
+        return results
+
+
+catalog_index = CatalogIndex()
+
+
+async def refresh_catalog_periodically(interval: float = CATALOG_REFRESH_SECONDS) -> None:
+    catalog_index._changed = asyncio.Event()
+    await asyncio.to_thread(catalog_index.refresh)
+    while True:
+        try:
+            await asyncio.wait_for(catalog_index._changed.wait(), interval)
+        except asyncio.TimeoutError:
+            await asyncio.to_thread(catalog_index.refresh)
+            continue
+        catalog_index._changed.clear()
+        await asyncio.to_thread(catalog_index.apply_changes)
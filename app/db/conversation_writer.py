@@ -0,0 +1,331 @@
+"""Write-behind queue for Conversation rows.
+
+Chat turns enqueue their log rows and return immediately; a background task flushes
+them with one bulk INSERT per batch, either when CONVERSATION_BATCH_SIZE rows are
+waiting or CONVERSATION_FLUSH_INTERVAL seconds have passed. Rows that cannot reach
+the database (insert failure, or the queue staying full past the enqueue timeout)
+are appended to a JSON-lines spool file in a worker thread, so a slow disk never
+stalls the event loop. The spool is replayed on start and, while this worker has
+spooled rows, every CONVERSATION_REPLAY_INTERVAL seconds once the database answers.
+
+Replay renames the spool aside under its file lock, so appends from other workers
+start a new spool instead of racing the read. A batch that fails is retried row by
+row, and a row that still fails while the database is reachable has its attempt
+count raised. After CONVERSATION_SPOOL_MAX_ATTEMPTS it moves to the dead-letter file
+so it can no longer hold back the rows behind it.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, text
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single worker replays as before.
+    fcntl = None
+
+from app.core.models import Conversation
+from app.db.engine import async_engine
+from app.db.functions import asave_conversation
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_BATCH_SIZE = int(os.getenv("CONVERSATION_BATCH_SIZE", "100"))
+CONVERSATION_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_FLUSH_INTERVAL", "0.5"))
+CONVERSATION_QUEUE_MAXSIZE = int(os.getenv("CONVERSATION_QUEUE_MAXSIZE", "10000"))
+CONVERSATION_ENQUEUE_TIMEOUT = float(os.getenv("CONVERSATION_ENQUEUE_TIMEOUT", "1.0"))
+CONVERSATION_SPOOL_PATH = os.getenv("CONVERSATION_SPOOL_PATH", "conversation_spool.jsonl")
+CONVERSATION_SPOOL_MAX_ATTEMPTS = int(os.getenv("CONVERSATION_SPOOL_MAX_ATTEMPTS", "3"))
+CONVERSATION_DEAD_LETTER_PATH = os.getenv("CONVERSATION_DEAD_LETTER_PATH", "conversation_dead_letter.jsonl")
+CONVERSATION_REPLAY_INTERVAL = float(os.getenv("CONVERSATION_REPLAY_INTERVAL", "30"))
+
+
+def _to_row(user_id: str, message: str, direction: str) -> dict:
+    return {
+        "conv_id": uuid4(),
+        "user_id": user_id if isinstance(user_id, UUID) else UUID(str(user_id)),
+        "timestamp": datetime.now(timezone.utc),
+        "message": message,
+        "direction": direction,
+    }
+
+
+def _row_to_json(row: dict, attempts: int = 0) -> str:
+    data = {
+        "conv_id": str(row["conv_id"]),
+        "user_id": str(row["user_id"]),
+        "timestamp": row["timestamp"].isoformat(),
+        "message": row["message"],
+        "direction": row["direction"],
+    }
+    if attempts:
+        data["attempts"] = attempts
+    return json.dumps(data)
+
+
+def _row_from_json(line: str) -> tuple[dict, int]:
+    """Returns the row and how many replays have already failed to insert it."""
+    data = json.loads(line)
+    attempts = data.pop("attempts", 0)
+    data["conv_id"] = UUID(data["conv_id"])
+    data["user_id"] = UUID(data["user_id"])
+    data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+    return data, attempts
+
+
+class ConversationWriter:
+    def __init__(
+        self,
+        batch_size: int = CONVERSATION_BATCH_SIZE,
+        flush_interval: float = CONVERSATION_FLUSH_INTERVAL,
+        max_queue: int = CONVERSATION_QUEUE_MAXSIZE,
+        enqueue_timeout: float = CONVERSATION_ENQUEUE_TIMEOUT,
+        spool_path: str = CONVERSATION_SPOOL_PATH,
+        max_attempts: int = CONVERSATION_SPOOL_MAX_ATTEMPTS,
+        dead_letter_path: str = CONVERSATION_DEAD_LETTER_PATH,
+        replay_interval: float = CONVERSATION_REPLAY_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self.spool_path = spool_path
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+        self.replay_interval = replay_interval
+        # Set while rows this worker spooled wait for a replay.
+        self._spool_pending = False
+        self._next_replay = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"enqueued": 0, "flushed": 0, "batches": 0, "spooled": 0, "replayed": 0, "dead_lettered": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        await self.replay_spool()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops accepting rows and flushes everything still queued."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def enqueue(self, user_id: str, message: str, direction: str) -> None:
+        row = _to_row(user_id, message, direction)
+        try:
+            # Backpressure: callers wait for room, but never longer than the enqueue timeout.
+            await asyncio.wait_for(self._queue.put(row), timeout=self.enqueue_timeout)
+            self.stats["enqueued"] += 1
+        except asyncio.TimeoutError:
+            await self._spool([row])
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            try:
+                timeout = self.replay_interval if self._spool_pending else None
+                first = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await self._retry_replay()
+                continue
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+            await self._retry_replay()
+
+        # Drain anything that raced in behind the stop marker.
+        leftover = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                leftover.append(row)
+        for start in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[start:start + self.batch_size])
+
+    async def _insert(self, rows: list[dict]) -> None:
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(Conversation), rows)
+
+    async def _flush(self, rows: list[dict]) -> None:
+        try:
+            await self._insert(rows)
+            self.stats["flushed"] += len(rows)
+            self.stats["batches"] += 1
+        except Exception as e:
+            logger.warning("insert of %d conversation rows failed (%s); spooling to %s", len(rows), e, self.spool_path)
+            await self._spool(rows)
+
+    async def _spool(self, rows: list[dict]) -> None:
+        await asyncio.to_thread(self._append, self.spool_path, [_row_to_json(row) + "\n" for row in rows])
+        self.stats["spooled"] += len(rows)
+        self._spool_pending = True
+
+    async def _retry_replay(self) -> None:
+        """Replays this worker's spool once the database is back, at most every replay_interval."""
+        loop = asyncio.get_running_loop()
+        if not self._spool_pending or loop.time() < self._next_replay:
+            return
+        self._next_replay = loop.time() + self.replay_interval
+        if await self._reachable():
+            await self.replay_spool()
+
+    def _append(self, path: str, lines: list[str]) -> None:
+        while True:
+            with open(path, "a", encoding="utf-8") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    # A replay renamed the file while we waited for the lock; reopen.
+                    try:
+                        moved = os.fstat(f.fileno()).st_ino != os.stat(path).st_ino
+                    except FileNotFoundError:
+                        moved = True
+                    if moved:
+                        continue
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+                return
+
+    def _rotate(self) -> None:
+        """Renames the spool aside; appends from here on start a new file."""
+        if not os.path.exists(self.spool_path):
+            return
+        replay_path = f"{self.spool_path}.replay.{time.time_ns()}"
+        if fcntl is None:
+            os.replace(self.spool_path, replay_path)
+            return
+        with open(self.spool_path, encoding="utf-8") as f:
+            # Waits for an append in progress; appenders queued behind us reopen the path.
+            fcntl.flock(f, fcntl.LOCK_EX)
+            os.replace(self.spool_path, replay_path)
+
+    @contextmanager
+    def _replay_claim(self):
+        """Yields whether this process may replay; with several workers only one does."""
+        if fcntl is None:
+            yield True
+            return
+        with open(f"{self.spool_path}.lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    async def replay_spool(self) -> None:
+        with self._replay_claim() as claimed:
+            if claimed:
+                await self._replay_spool()
+
+    async def _replay_spool(self) -> None:
+        self._spool_pending = False
+        await asyncio.to_thread(self._rotate)
+        # Files left behind by an interrupted replay are finished too, oldest first.
+        for path in sorted(glob.glob(glob.escape(self.spool_path) + ".replay*")):
+            await self._replay_file(path)
+
+    def _read_replay_file(self, path: str) -> tuple[list[tuple[dict, int]], list[str]]:
+        entries, dead = [], []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(_row_from_json(line))
+                except (ValueError, KeyError, TypeError):
+                    dead.append(line if line.endswith("\n") else line + "\n")
+        return entries, dead
+
+    async def _replay_file(self, path: str) -> None:
+        entries, dead = await asyncio.to_thread(self._read_replay_file, path)
+        retry = []
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            try:
+                await self._insert([row for row, _ in batch])
+                self.stats["replayed"] += len(batch)
+                continue
+            except Exception as e:
+                if not await self._reachable():
+                    logger.warning("spool replay failed (%s); keeping rows in %s", e, self.spool_path)
+                    retry.extend(entries[start:])
+                    break
+            # The database is up, so some row in the batch is bad: find it one row at a time.
+            for row, attempts in batch:
+                try:
+                    await self._insert([row])
+                    self.stats["replayed"] += 1
+                except Exception as e:
+                    attempts += 1
+                    logger.warning("spooled conversation row %s failed (attempt %d): %s", row["conv_id"], attempts, e)
+                    if attempts >= self.max_attempts:
+                        dead.append(_row_to_json(row, attempts) + "\n")
+                    else:
+                        retry.append((row, attempts))
+        if retry:
+            lines = [_row_to_json(row, attempts) + "\n" for row, attempts in retry]
+            await asyncio.to_thread(self._append, self.spool_path, lines)
+            self._spool_pending = True
+        if dead:
+            logger.error("moving %d conversation rows to %s", len(dead), self.dead_letter_path)
+            await asyncio.to_thread(self._append, self.dead_letter_path, dead)
+            self.stats["dead_lettered"] += len(dead)
+        await asyncio.to_thread(os.remove, path)
+
+    async def _reachable(self) -> bool:
+        try:
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+
+conversation_writer = ConversationWriter()
+
+
+async def log_conversation(user_id: str, message: str, direction: str) -> None:
+    """Queues a Conversation row, or writes it directly when the writer is not running."""
+    if conversation_writer.running:
+        await conversation_writer.enqueue(user_id, message, direction)
+    else:
+        await asave_conversation(user_id, message, direction)
@@ -0,0 +1,47 @@
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+from app.observability import instrument_engine
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    return f"{driver}{sep}{rest}" if driver else url
+
+def pool_options(url: str) -> dict:
+    # In-memory SQLite is pinned to a single connection, so pool sizing does not apply.
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+database_url = DATABASE_URL
+async_database_url = ASYNC_DATABASE_URL or to_async_url(database_url)
+
+engine = create_engine(database_url, pool_pre_ping=True, **pool_options(database_url))
+async_engine = create_async_engine(async_database_url, pool_pre_ping=True, **pool_options(async_database_url))
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
+def async_session() -> AsyncSession:
+    return AsyncSession(async_engine, expire_on_commit=False)
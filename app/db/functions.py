@@ -1,10 +1,19 @@
 from sqlmodel import Session, select
+from sqlalchemy import and_, or_
 from fastapi import HTTPException, status
-from app.core.models import Users, Order, Product, Conversation
-from app.db.init_db import engine
+from app.core.config import VECTOR_INDEX_ENABLED
+from app.core.models import Users, Order, OrderSummary, Product, Conversation
+from app.db.engine import engine, async_session
+from app.db.catalog_index import CATALOG_INDEX_ENABLED, catalog_index, tokenize
+from app.db.order_cache import cache_orders, get_cached_orders
+from app.db.invalidation import PRINCIPAL, apublish, publish
 from typing import Optional
+from uuid import UUID
+import asyncio
+import os
 
 VALID_PRODUCT_TYPES = {"mobile", "laptop", "clothing", "home_appliance"}
+SEARCH_RESULT_CAP = int(os.getenv("SEARCH_RESULT_CAP", "20"))
 
 def get_order(order_id: str):
     if not isinstance(order_id, str):
@@ -23,19 +32,19 @@ def get_order(order_id: str):
 
 
 def get_my_orders(user_id: str):
-    if not isinstance(user_id, str):
+    user_uuid = _as_uuid(user_id, "user_id")
+    orders = get_cached_orders(str(user_uuid))
+    if orders is None:
+        with Session(engine) as session:
+            rows = session.exec(_order_summary_statement(user_uuid)).all()
+        orders = _order_summaries(rows)
+        cache_orders(str(user_uuid), orders)
+    if not orders:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="user_id must be a string"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No orders found for user ID {user_id}"
         )
-    with Session(engine) as session:
-        orders = session.exec(select(Order).where(Order.user_id == user_id)).all()
-        if not orders:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No orders found for user ID {user_id}"
-            )
-        return orders
+    return orders
 
 
 def update_profile(current_user_id: str, new_email: str):
@@ -73,33 +82,300 @@ def update_profile(current_user_id: str, new_email: str):
         session.add(user)
         session.commit()
         session.refresh(user)
+        publish(PRINCIPAL, user.user_id)
         return user
 
 
-def search_products(product_type: str, price_filter: Optional[tuple] = None):
-    if product_type not in VALID_PRODUCT_TYPES:
+def search_products(
+    product_type: Optional[str],
+    price_filter: Optional[tuple] = None,
+    query: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = SEARCH_RESULT_CAP,
+    in_stock: Optional[bool] = None,
+):
+    product_type, price_filter, tokens, cursor, limit = _search_args(product_type, price_filter, query, after, limit)
+    ids = _vector_index().search(query, product_type, price_filter, limit) if _ranks_query(tokens, cursor, in_stock) else []
+    with Session(engine) as session:
+        if ids:
+            return _in_rank_order(session.exec(select(Product).where(Product.product_id.in_(ids))).all(), ids)
+        results = session.exec(_search_statement(product_type, price_filter, tokens, cursor, limit, in_stock)).all()
+        if not results and tokens:
+            results = session.exec(_search_statement(product_type, price_filter, [], cursor, limit, in_stock)).all()
+        return results
+
+
+def save_conversation(user_id: str, message: str, direction: str) -> None:
+    conv = Conversation(user_id=user_id, message=message, direction=direction)
+    with Session(engine) as session:
+        session.add(conv)
+        session.commit()
+
+
+def _as_uuid(value: str, field: str) -> UUID:
+    if isinstance(value, UUID):
+        return value
+    if not isinstance(value, str):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{field} must be a string"
+        )
+    try:
+        return UUID(value.strip())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{field} must be a valid UUID"
+        )
+
+
+def _validate_price_filter(price_filter) -> Optional[tuple]:
+    if not price_filter:
+        return None
+    if isinstance(price_filter, list):
+        price_filter = tuple(price_filter)
+    if not isinstance(price_filter, tuple) or len(price_filter) != 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="price_filter must be a tuple with two values (min_price, max_price)"
+        )
+    # The LLM leaves one side open ("under 800" -> [null, 800]); keep that bound unset.
+    try:
+        low, high = (None if bound is None else float(bound) for bound in price_filter)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="price_filter values must be numbers"
+        )
+    if low is None and high is None:
+        return None
+    return low, high
+
+
+def encode_cursor(product: Product) -> str:
+    """Keyset cursor for the page after this product (results are ordered by price, then id)."""
+    return f"{product.price!r}|{product.product_id}"
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[tuple[float, UUID]]:
+    if not cursor:
+        return None
+    try:
+        price, product_id = cursor.split("|", 1)
+        return float(price), UUID(product_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid search cursor"
+        )
+
+
+def _search_args(product_type, price_filter, query, after, limit):
+    if product_type is not None and product_type not in VALID_PRODUCT_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid product type: {product_type}"
         )
+    tokens = tokenize(query) if isinstance(query, str) else []
+    if product_type is None and not tokens:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="search_products needs a product type or a query"
+        )
+    price_filter = _validate_price_filter(price_filter)
+    limit = max(1, min(limit or SEARCH_RESULT_CAP, SEARCH_RESULT_CAP))
+    return product_type, price_filter, tokens, _parse_cursor(after), limit
+
+
+def _ranks_query(tokens, cursor, in_stock) -> bool:
+    # Similarity ranking has no keyset order, so later pages stay on the price-ordered path.
+    # The vector index does not store stock either, so an in_stock filter does the same.
+    return bool(tokens) and cursor is None and in_stock is None and VECTOR_INDEX_ENABLED and _vector_index().ready
+
+
+def _vector_index():
+    # Imported on first use, so NumPy is only loaded when the index is enabled.
+    from app.db.vector_index import vector_index
+    return vector_index
+
+
+class RankedProducts(list):
+    """search_products results that the vector index ranked by similarity to the query.
+
+    Plain lists come from the price-ordered paths, including the fallback that drops the
+    query when nothing matched it.
+    """
+
+
+def _in_rank_order(products, ids: list[UUID]) -> RankedProducts:
+    by_id = {product.product_id: product for product in products}
+    return RankedProducts(by_id[product_id] for product_id in ids if product_id in by_id)
+
+
+def _search_statement(product_type, price_filter, tokens, cursor, limit, in_stock=None):
+    stmt = select(Product)
+    if product_type:
+        stmt = stmt.where(Product.type == product_type)
+    if in_stock is not None:
+        stmt = stmt.where(Product.in_stock == in_stock)
     if price_filter:
-        if isinstance(price_filter, list):
-            price_filter = tuple(price_filter)
-        if not isinstance(price_filter, tuple) or len(price_filter) != 2:
+        low, high = price_filter
+        if low is not None:
+            stmt = stmt.where(Product.price >= low)
+        if high is not None:
+            stmt = stmt.where(Product.price <= high)
+    if tokens:
+        # Tokens are [a-z0-9]+ only, so they cannot smuggle LIKE wildcards.
+        stmt = stmt.where(or_(*(
+            or_(Product.name.ilike(f"%{token}%"), Product.specs.ilike(f"%{token}%"))
+            for token in tokens
+        )))
+    if cursor:
+        price, product_id = cursor
+        stmt = stmt.where(or_(
+            Product.price > price,
+            and_(Product.price == price, Product.product_id > product_id)
+        ))
+    return stmt.order_by(Product.price, Product.product_id).limit(limit)
+
+
+def _order_summary_statement(user_uuid: UUID):
+    # One round trip for the orders and their product names/prices; newest first.
+    return (
+        select(Order, Product.name, Product.price)
+        .join(Product, Product.product_id == Order.product_id, isouter=True)
+        .where(Order.user_id == user_uuid)
+        .order_by(Order.created_at.desc())
+    )
+
+
+def _order_summaries(rows) -> list[OrderSummary]:
+    return [
+        OrderSummary(
+            order_id=order.order_id,
+            product_id=order.product_id,
+            product_name=name,
+            price=price,
+            quantity=order.quantity,
+            status=order.status,
+            created_at=order.created_at,
+        )
+        for order, name, price in rows
+    ]
+
+
+# Async variants used by the API and the agent graph so queries never block the event loop.
+
+async def aget_order(order_id: str):
+    order_uuid = _as_uuid(order_id, "order_id")
+    async with async_session() as session:
+        order = (await session.exec(select(Order).where(Order.order_id == order_uuid))).first()
+        if not order:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="price_filter must be a tuple with two values (min_price, max_price)"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No order found with ID {order_id}"
             )
-    with Session(engine) as session:
-        stmt = select(Product).where(Product.type == product_type)
-        if price_filter:
-            stmt = stmt.where(Product.price >= price_filter[0], Product.price <= price_filter[1])
-        results = session.exec(stmt).all()
+        return order
+
+
+async def aget_my_orders(user_id: str):
+    user_uuid = _as_uuid(user_id, "user_id")
+    orders = get_cached_orders(str(user_uuid))
+    if orders is None:
+        async with async_session() as session:
+            rows = (await session.exec(_order_summary_statement(user_uuid))).all()
+        orders = _order_summaries(rows)
+        cache_orders(str(user_uuid), orders)
+    if not orders:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No orders found for user ID {user_id}"
+        )
+    return orders
+
+
+async def aupdate_profile(current_user_id: str, new_email: str):
+    user_uuid = _as_uuid(current_user_id, "current_user_id")
+    if not isinstance(new_email, str):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="new_email must be a string"
+        )
+
+    async with async_session() as session:
+        existing = (await session.exec(
+            select(Users).where(Users.email == new_email)
+        )).first()
+        if existing and existing.user_id != user_uuid:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This email is already in use."
+            )
+
+        user = (await session.exec(
+            select(Users).where(Users.user_id == user_uuid)
+        )).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No user found with ID {current_user_id}"
+            )
+
+        user.email = new_email
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        await apublish(PRINCIPAL, user.user_id)
+        return user
+
+
+async def asearch_products(
+    product_type: Optional[str],
+    price_filter: Optional[tuple] = None,
+    query: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = SEARCH_RESULT_CAP,
+    in_stock: Optional[bool] = None,
+):
+    product_type, price_filter, tokens, cursor, limit = _search_args(product_type, price_filter, query, after, limit)
+
+    if _ranks_query(tokens, cursor, in_stock):
+        # Scoring is NumPy work on memmapped pages; keep it off the event loop.
+        ids = await asyncio.to_thread(_vector_index().search, query, product_type, price_filter, limit)
+        if ids:
+            async with async_session() as session:
+                products = (await session.exec(select(Product).where(Product.product_id.in_(ids)))).all()
+            return _in_rank_order(products, ids)
+
+    if CATALOG_INDEX_ENABLED and catalog_index.ready:
+        index_cursor = (cursor[0], str(cursor[1])) if cursor else None
+        results = catalog_index.search(product_type, price_filter, tokens, index_cursor, limit, in_stock)
+        if not results and tokens:
+            results = catalog_index.search(product_type, price_filter, [], index_cursor, limit, in_stock)
         return results
 
+    async with async_session() as session:
+        results = (await session.exec(_search_statement(product_type, price_filter, tokens, cursor, limit, in_stock))).all()
+        if not results and tokens:
+            results = (await session.exec(_search_statement(product_type, price_filter, [], cursor, limit, in_stock))).all()
+        return results
 
-def save_conversation(user_id: str, message: str, direction: str) -> None:
-    conv = Conversation(user_id=user_id, message=message, direction=direction)
-    with Session(engine) as session:
+
+async def aget_recent_conversation(user_id: str, limit: int) -> list[Conversation]:
+    """Returns the user's latest logged messages, oldest first."""
+    stmt = (
+        select(Conversation)
+        .where(Conversation.user_id == _as_uuid(user_id, "user_id"))
+        .order_by(Conversation.timestamp.desc())
+        .limit(limit)
+    )
+    async with async_session() as session:
+        rows = (await session.exec(stmt)).all()
+    return list(reversed(rows))
+
+
+async def asave_conversation(user_id: str, message: str, direction: str) -> None:
+    conv = Conversation(user_id=_as_uuid(user_id, "user_id"), message=message, direction=direction)
+    async with async_session() as session:
         session.add(conv)
-        session.commit()
\ No newline at end of file
+        await session.commit()
@@ -1,14 +1,15 @@
-from sqlmodel import SQLModel, create_engine, Session, select
+from sqlmodel import SQLModel, Session, select
 from app.core.models import Users, Product, Order, Conversation
+from app.db.engine import engine
+from app.db.invalidation import ORDERS, PRODUCTS, publish
 from app.security import hash_password 
-from dotenv import load_dotenv
 from faker import Faker
 import os
 import random
 
-load_dotenv()
-database_url = os.getenv("DATABASE_URL")
-engine = create_engine(database_url)
+# Seed users never log in with their random passwords, so use bcrypt's minimum cost.
+SEED_BCRYPT_ROUNDS = int(os.getenv("SEED_BCRYPT_ROUNDS", "4"))
+
 fake = Faker()
 
 STATUSES = ["pending", "shipped", "delivered"]
@@ -28,15 +29,22 @@ seed_products = [
     Product(name="Refrigerator", price=999.99, specs="Double door, energy efficient", type="home_appliance")
 ]
 
+def create_indexes():
+    """Adds indexes declared on the models to tables created before they existed."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
 def init_db():
     SQLModel.metadata.create_all(engine)
+    create_indexes()
 
     with Session(engine) as session:
         users = [
             Users(
                 name=fake.name(),
                 email=fake.email(),
-                hashed_password=hash_password(fake.password())
+                hashed_password=hash_password(fake.password(), rounds=SEED_BCRYPT_ROUNDS)
             )
             for _ in range(15)
         ]
@@ -57,6 +65,12 @@ def init_db():
                 status=random.choice(STATUSES)
             ))
         session.commit()
+    publish(PRODUCTS)
+    publish(ORDERS)
 
 if __name__ == "__main__":
-    init_db()
+    import sys
+    if "--indexes-only" in sys.argv:
+        create_indexes()
+    else:
+        init_db()
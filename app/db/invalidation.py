@@ -0,0 +1,182 @@
+"""Cache invalidations shared by every process that talks to the database.
+
+The API's in-process caches cannot be reached by other workers or by CLI scripts. This
+covers order summaries, verified principals, claims freshness markers, the catalog and
+vector indexes and any other cache that registers a handler. A writer therefore calls
+publish() (or apublish()). It applies the invalidation in its own process at once and appends a
+CacheInvalidation row. Each API worker polls that table every
+CACHE_INVALIDATION_POLL_SECONDS and applies the rows it has not seen yet. Staleness is
+then bounded by the poll interval rather than by each cache's TTL, and the TTLs remain
+a backstop for when the database is unreachable.
+
+Rows older than CACHE_INVALIDATION_RETENTION_SECONDS are pruned by the pollers.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Callable
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import VECTOR_INDEX_ENABLED
+from app.core.models import CacheInvalidation
+from app.db.catalog_index import catalog_index
+from app.db.engine import async_engine, async_session, engine
+from app.db.order_cache import clear_order_cache, invalidate_orders
+from app.security import ACCESS_TOKEN_EXPIRE_MINUTES, invalidate_principal
+
+logger = logging.getLogger(__name__)
+
+CACHE_INVALIDATION_POLL_SECONDS = float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "1"))
+CACHE_INVALIDATION_RETENTION_SECONDS = float(os.getenv("CACHE_INVALIDATION_RETENTION_SECONDS", "3600"))
+CACHE_INVALIDATION_BATCH = 1000
+CACHE_INVALIDATION_OVERLAP = 100
+
+# key for "every entry in this scope".
+ALL = "*"
+ORDERS = "orders"
+PRINCIPAL = "principal"
+PRODUCTS = "products"
+
+
+def _orders(key: str, at: float) -> None:
+    if key == ALL:
+        clear_order_cache()
+    else:
+        invalidate_orders(key)
+
+
+def _principal(key: str, at: float) -> None:
+    invalidate_principal(key, at)
+
+
+def _products(key: str, at: float) -> None:
+    catalog_index.invalidate(key, at)
+    if VECTOR_INDEX_ENABLED:
+        # NumPy and the index are only imported when the index is on.
+        from app.db.vector_index import vector_index
+        vector_index.invalidate(key, at)
+
+
+HANDLERS: dict[str, Callable[[str, float], None]] = {
+    ORDERS: _orders,
+    PRINCIPAL: _principal,
+    PRODUCTS: _products,
+}
+
+INVALIDATION_STATS = {"published": 0, "publish_failed": 0, "applied": 0, "poll_failed": 0}
+_table_checked = False
+
+
+def apply(scope: str, key: str, at: float) -> None:
+    handler = HANDLERS.get(scope)
+    if handler is not None:
+        handler(key, at)
+        INVALIDATION_STATS["applied"] += 1
+
+
+def publish(scope: str, key=ALL) -> None:
+    """Invalidates here and, through the database, in every other process."""
+    row = CacheInvalidation(scope=scope, key=str(key))
+    apply(row.scope, row.key, row.at)
+    global _table_checked
+    try:
+        if not _table_checked:
+            # Scripts may run against a database created before this table existed.
+            CacheInvalidation.__table__.create(engine, checkfirst=True)
+            _table_checked = True
+        with Session(engine) as session:
+            session.add(row)
+            session.commit()
+        INVALIDATION_STATS["published"] += 1
+    except Exception as e:
+        INVALIDATION_STATS["publish_failed"] += 1
+        logger.warning("could not publish %s invalidation, other processes rely on TTLs: %s", scope, e)
+
+
+async def apublish(scope: str, key=ALL) -> None:
+    row = CacheInvalidation(scope=scope, key=str(key))
+    apply(row.scope, row.key, row.at)
+    try:
+        async with async_session() as session:
+            session.add(row)
+            await session.commit()
+        INVALIDATION_STATS["published"] += 1
+    except Exception as e:
+        INVALIDATION_STATS["publish_failed"] += 1
+        logger.warning("could not publish %s invalidation, other processes rely on TTLs: %s", scope, e)
+
+
+class InvalidationPoller:
+    """Applies rows it has not seen yet. Ids are handed out before commit, so a row can
+    become visible after a higher id has been read. Each poll therefore looks back
+    CACHE_INVALIDATION_OVERLAP ids and skips the ones it has already applied."""
+
+    def __init__(self):
+        self.last_id = None
+        self._seen: set[int] = set()
+
+    async def start(self) -> None:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(CacheInvalidation.__table__.create, checkfirst=True)
+        async with async_session() as session:
+            # Caches start empty, so rows committed before now are already reflected...
+            ids = (await session.exec(
+                select(CacheInvalidation.id).order_by(CacheInvalidation.id.desc()).limit(CACHE_INVALIDATION_OVERLAP)
+            )).all()
+            last_id = max(ids, default=0)
+            # ...except claims freshness: tokens issued before a profile change stay valid
+            # for ACCESS_TOKEN_EXPIRE_MINUTES and must still be checked against it.
+            principals = (await session.exec(
+                select(CacheInvalidation)
+                .where(CacheInvalidation.scope == PRINCIPAL)
+                .where(CacheInvalidation.at > time.time() - ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+                .where(CacheInvalidation.id <= last_id)
+                .order_by(CacheInvalidation.id)
+            )).all()
+        for row in principals:
+            apply(row.scope, row.key, row.at)
+        self.last_id = last_id
+        self._seen = set(ids)
+
+    async def poll(self) -> int:
+        async with async_session() as session:
+            rows = (await session.exec(
+                select(CacheInvalidation)
+                .where(CacheInvalidation.id > self.last_id - CACHE_INVALIDATION_OVERLAP)
+                .order_by(CacheInvalidation.id)
+                .limit(CACHE_INVALIDATION_BATCH)
+            )).all()
+        for row in rows:
+            if row.id not in self._seen:
+                apply(row.scope, row.key, row.at)
+                self._seen.add(row.id)
+            self.last_id = max(self.last_id, row.id)
+        self._seen = {i for i in self._seen if i > self.last_id - CACHE_INVALIDATION_OVERLAP}
+        return len(rows)
+
+    async def prune(self) -> None:
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(CacheInvalidation).where(
+                CacheInvalidation.at < time.time() - CACHE_INVALIDATION_RETENTION_SECONDS
+            ))
+
+
+async def poll_invalidations_periodically(interval: float = CACHE_INVALIDATION_POLL_SECONDS) -> None:
+    poller = InvalidationPoller()
+    last_prune = time.monotonic()
+    while True:
+        try:
+            if poller.last_id is None:
+                await poller.start()
+            while await poller.poll() == CACHE_INVALIDATION_BATCH:
+                pass
+            if time.monotonic() - last_prune > CACHE_INVALIDATION_RETENTION_SECONDS / 10:
+                await poller.prune()
+                last_prune = time.monotonic()
+        except Exception as e:
+            INVALIDATION_STATS["poll_failed"] += 1
+            logger.warning("cache invalidation poll failed: %s", e)
+        await asyncio.sleep(interval)
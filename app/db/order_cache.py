@@ -0,0 +1,52 @@
+"""Per-user cache of order summaries for get_my_orders.
+
+Anything that writes orders publishes an invalidation through app.db.invalidation, which
+calls invalidate_orders(user_id) (or clear_order_cache() for bulk loads) here and, within
+CACHE_INVALIDATION_POLL_SECONDS, in every API worker. Entries also expire after
+ORDER_CACHE_TTL_SECONDS in case an invalidation cannot be published.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+ORDER_CACHE_TTL_SECONDS = float(os.getenv("ORDER_CACHE_TTL_SECONDS", "30"))
+ORDER_CACHE_MAX_USERS = int(os.getenv("ORDER_CACHE_MAX_USERS", "10000"))
+
+_ORDER_CACHE: OrderedDict[str, tuple[float, list]] = OrderedDict()
+_lock = threading.Lock()
+
+ORDER_CACHE_STATS = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get_cached_orders(user_id: str) -> Optional[list]:
+    with _lock:
+        entry = _ORDER_CACHE.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            _ORDER_CACHE.pop(user_id, None)
+            ORDER_CACHE_STATS["misses"] += 1
+            return None
+        _ORDER_CACHE.move_to_end(user_id)
+        ORDER_CACHE_STATS["hits"] += 1
+        return entry[1]
+
+
+def cache_orders(user_id: str, summaries: list) -> None:
+    with _lock:
+        _ORDER_CACHE[user_id] = (time.monotonic() + ORDER_CACHE_TTL_SECONDS, summaries)
+        _ORDER_CACHE.move_to_end(user_id)
+        while len(_ORDER_CACHE) > ORDER_CACHE_MAX_USERS:
+            _ORDER_CACHE.popitem(last=False)
+
+
+def invalidate_orders(user_id) -> None:
+    with _lock:
+        _ORDER_CACHE.pop(str(user_id), None)
+        ORDER_CACHE_STATS["invalidations"] += 1
+
+
+def clear_order_cache() -> None:
+    with _lock:
+        _ORDER_CACHE.clear()
+        ORDER_CACHE_STATS["invalidations"] += 1
@@ -0,0 +1,383 @@
+"""Optional on-disk vector index that ranks products for search_products' free-text query.
+
+Product name and specs are embedded with a hashed bag of words and character trigrams
+(no model to download, microseconds per product) into VECTOR_DIM float32 dimensions.
+Vectors and per-row metadata (id, price, type, liveness, content fingerprint) are numpy
+memmaps under VECTOR_INDEX_PATH, so workers on one host share the OS page cache instead
+of each holding a copy.
+
+sync() streams the catalog from the database, embeds only products that are new or
+whose name, specs, price or type changed, and marks deleted ones dead. In-process writers
+can call upsert()/remove(). Products changed by other processes arrive through
+invalidate() and are re-embedded by apply_changes(). A file lock serialises writers
+across processes.
+
+search() masks rows by type and price, scores the rest chunk by chunk with one
+matrix-vector product each, and returns the ids of the top k above VECTOR_MIN_SCORE.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Iterable, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.core.models import Product, VALID_PRODUCT_TYPES
+from app.db.catalog_index import CATALOG_LOAD_CHUNK, tokenize
+from app.db.engine import engine
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in one process are still serialised.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index")
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "512"))
+VECTOR_MIN_SCORE = float(os.getenv("VECTOR_MIN_SCORE", "0.15"))
+VECTOR_SYNC_SECONDS = float(os.getenv("VECTOR_SYNC_SECONDS", "300"))
+VECTOR_SCORE_CHUNK = 65536
+
+META_DTYPE = np.dtype([
+    ("id", "V16"),
+    ("price", "f8"),
+    ("type", "i1"),
+    ("alive", "u1"),
+    ("fingerprint", "u4"),
+])
+TYPE_CODES = {t: i for i, t in enumerate(VALID_PRODUCT_TYPES)}
+NO_TYPE = -1
+SPECS_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.5
+
+
+def _features(text: Optional[str], weight: float, buckets: list[int], weights: list[float], dim: int) -> None:
+    for token in tokenize(text):
+        padded = f"#{token}#"
+        grams = [("w", token, weight)] + [("g", padded[i:i + 3], weight * TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+        for kind, gram, w in grams:
+            # crc32 rather than hash(): buckets must agree across processes and restarts.
+            h = zlib.crc32(f"{kind}:{gram}".encode())
+            buckets.append(h % dim)
+            weights.append(-w if h & 0x80000000 else w)
+
+
+def _normalised(buckets: list[int], weights: list[float], dim: int) -> np.ndarray:
+    if not buckets:
+        return np.zeros(dim, dtype=np.float32)
+    vector = np.bincount(buckets, weights, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def embed(text: Optional[str], dim: int = VECTOR_DIM) -> np.ndarray:
+    buckets, weights = [], []
+    _features(text, 1.0, buckets, weights, dim)
+    return _normalised(buckets, weights, dim)
+
+
+def embed_product(product: Product, dim: int = VECTOR_DIM) -> np.ndarray:
+    buckets, weights = [], []
+    _features(product.name, 1.0, buckets, weights, dim)
+    _features(product.specs, SPECS_WEIGHT, buckets, weights, dim)
+    return _normalised(buckets, weights, dim)
+
+
+def fingerprint(product: Product) -> int:
+    return zlib.crc32(f"{product.name}\x1f{product.specs}\x1f{product.price!r}\x1f{product.type}".encode())
+
+
+class VectorIndex:
+    def __init__(self, path: str = VECTOR_INDEX_PATH, dim: int = VECTOR_DIM):
+        self.path = path
+        self.dim = dim
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._meta = np.zeros(0, dtype=META_DTYPE)
+        self._count = 0
+        self._capacity = 0
+        self._rows: dict[bytes, int] = {}
+        self._lock = threading.Lock()
+        # Separate from _lock, which a sync holds for its whole run: invalidate() runs on the event loop.
+        self._stale_lock = threading.Lock()
+        self._stale_ids: set[str] = set()
+        self._stale_all = False
+        self._changed: Optional[asyncio.Event] = None
+        self.loaded_at: Optional[float] = None
+        self.stats = {"searches": 0, "ranked": 0, "no_match": 0, "embedded": 0, "removed": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._meta["alive"][:self._count]))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_header(self) -> dict:
+        try:
+            with open(self._file("header.json"), encoding="utf-8") as f:
+                header = json.load(f)
+        except FileNotFoundError:
+            return {"dim": self.dim, "count": 0, "capacity": 0}
+        if header.get("dim") != self.dim:
+            logger.warning("Vector index at %s has dim %s, expected %s; rebuilding", self.path, header.get("dim"), self.dim)
+            return {"dim": self.dim, "count": 0, "capacity": 0}
+        return header
+
+    def _write_header(self, header: dict) -> None:
+        tmp = self._file("header.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        os.replace(tmp, self._file("header.json"))
+
+    def _install(self, header: dict) -> None:
+        capacity = header["capacity"]
+        if capacity:
+            vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            meta = np.memmap(self._file("meta.bin"), dtype=META_DTYPE, mode="r+", shape=(capacity,))
+        else:
+            vectors = np.zeros((0, self.dim), dtype=np.float32)
+            meta = np.zeros(0, dtype=META_DTYPE)
+        count = header["count"]
+        ids = meta["id"][:count].tobytes()
+        self._rows = {ids[i * 16:(i + 1) * 16]: i for i in range(count)}
+        # Searches read these three without the lock; rebinding them is atomic enough.
+        self._vectors, self._meta, self._capacity = vectors, meta, capacity
+        self._count = count
+        self.loaded_at = time.time()
+
+    def _grow(self, header: dict, needed: int) -> None:
+        capacity = max(needed, header["capacity"] * 2, 1024)
+        for name, row_size in (("vectors.f32", self.dim * 4), ("meta.bin", META_DTYPE.itemsize)):
+            with open(self._file(name), "ab") as f:
+                f.truncate(capacity * row_size)
+        header["capacity"] = capacity
+        self._install(header)
+
+    @contextmanager
+    def _writer(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(self._file(".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            header = self._read_header()
+            # Another process may have appended rows since this one last looked.
+            if not self.ready or header["count"] != self._count or header["capacity"] != self._capacity:
+                self._install(header)
+            yield header
+
+    def _apply(self, header: dict, products: list[Product], dead: Iterable[int] = ()) -> None:
+        new = sum(1 for p in products if p.product_id.bytes not in self._rows)
+        if header["count"] + new > header["capacity"]:
+            self._grow(header, header["count"] + new)
+        if products:
+            rows = []
+            for product in products:
+                key = product.product_id.bytes
+                row = self._rows.get(key)
+                if row is None:
+                    row = self._rows[key] = header["count"]
+                    header["count"] += 1
+                rows.append(row)
+            self._vectors[rows] = np.stack([embed_product(p, self.dim) for p in products])
+            self._meta[rows] = np.array([
+                (p.product_id.bytes, p.price, TYPE_CODES.get(p.type, NO_TYPE), 1, fingerprint(p))
+                for p in products
+            ], dtype=META_DTYPE)
+            self.stats["embedded"] += len(products)
+        dead = list(dead)
+        if dead:
+            self._meta["alive"][dead] = 0
+            self.stats["removed"] += len(dead)
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+            self._meta.flush()
+        self._write_header(header)
+        self._count = header["count"]
+
+    def open(self) -> None:
+        """Maps an existing index without touching the database."""
+        with self._writer():
+            pass
+
+    def upsert(self, product: Product) -> None:
+        with self._writer() as header:
+            self._apply(header, [product])
+
+    def remove(self, product_id) -> None:
+        with self._writer() as header:
+            row = self._rows.get(UUID(str(product_id)).bytes)
+            if row is not None:
+                self._apply(header, [], [row])
+
+    def invalidate(self, key: str, at: float = 0.0) -> None:
+        """Queues a product changed elsewhere ("*" for all of them) for apply_changes()."""
+        if not self.ready:
+            return
+        with self._stale_lock:
+            if key == "*":
+                self._stale_all = True
+            else:
+                self._stale_ids.add(key)
+        if self._changed is not None:
+            self._changed.set()
+
+    def apply_changes(self) -> None:
+        with self._stale_lock:
+            stale_all, stale_ids = self._stale_all, self._stale_ids
+            self._stale_all, self._stale_ids = False, set()
+        if stale_all:
+            self.sync()
+            return
+        ids = []
+        for pid in stale_ids:
+            try:
+                ids.append(UUID(pid))
+            except ValueError:
+                continue
+        found = []
+        with Session(engine) as session:
+            for start in range(0, len(ids), CATALOG_LOAD_CHUNK):
+                chunk = ids[start:start + CATALOG_LOAD_CHUNK]
+                found.extend(session.exec(select(Product).where(Product.product_id.in_(chunk))).all())
+            session.expunge_all()
+        gone = {i.bytes for i in ids} - {p.product_id.bytes for p in found}
+        with self._writer() as header:
+            dead = [self._rows[key] for key in gone if key in self._rows]
+            if found or dead:
+                self._apply(header, found, dead)
+
+    def sync(self, chunk: int = CATALOG_LOAD_CHUNK) -> None:
+        """Brings the index in line with the database, embedding only what changed."""
+        with self._writer() as header:
+            seen = np.zeros(header["count"], dtype=bool)
+            after = None
+            with Session(engine) as session:
+                while True:
+                    stmt = select(Product).order_by(Product.product_id).limit(chunk)
+                    if after is not None:
+                        stmt = stmt.where(Product.product_id > after)
+                    products = session.exec(stmt).all()
+                    if not products:
+                        break
+                    after = products[-1].product_id
+                    changed = []
+                    for product in products:
+                        row = self._rows.get(product.product_id.bytes)
+                        if row is not None and row < len(seen):
+                            seen[row] = True
+                            meta = self._meta[row]
+                            if meta["alive"] and meta["fingerprint"] == fingerprint(product):
+                                continue
+                        changed.append(product)
+                    if changed:
+                        self._apply(header, changed)
+                    session.expunge_all()
+            dead = np.flatnonzero(~seen & (self._meta["alive"][:len(seen)] == 1))
+            self._apply(header, [], dead.tolist())
+
+    def search(
+        self,
+        query: Optional[str],
+        product_type: Optional[str] = None,
+        price_filter: Optional[tuple] = None,
+        limit: int = 20,
+        min_score: float = VECTOR_MIN_SCORE,
+    ) -> list[UUID]:
+        """Ids of the best matches for query, best first; [] when nothing scores high enough."""
+        self.stats["searches"] += 1
+        vectors, meta, count = self._vectors, self._meta, self._count
+        q = embed(query, self.dim)
+        if not count or not q.any():
+            self.stats["no_match"] += 1
+            return []
+
+        type_code = None if product_type is None else TYPE_CODES.get(product_type, NO_TYPE)
+        low, high = price_filter if price_filter else (None, None)
+        best_scores, best_rows = [], []
+        for start in range(0, count, VECTOR_SCORE_CHUNK):
+            stop = min(start + VECTOR_SCORE_CHUNK, count)
+            rows = meta[start:stop]
+            mask = rows["alive"] == 1
+            if type_code is not None:
+                mask &= rows["type"] == type_code
+            if low is not None:
+                mask &= rows["price"] >= low
+            if high is not None:
+                mask &= rows["price"] <= high
+            candidates = np.flatnonzero(mask)
+            if not candidates.size:
+                continue
+            if candidates.size == stop - start:
+                scores = vectors[start:stop] @ q
+            else:
+                scores = vectors[start + candidates] @ q
+            keep = scores >= min_score
+            scores, candidates = scores[keep], candidates[keep] + start
+            if scores.size > limit:
+                top = np.argpartition(-scores, limit)[:limit]
+                scores, candidates = scores[top], candidates[top]
+            best_scores.append(scores)
+            best_rows.append(candidates)
+
+        if not best_scores:
+            self.stats["no_match"] += 1
+            return []
+        scores, rows = np.concatenate(best_scores), np.concatenate(best_rows)
+        order = np.argsort(-scores, kind="stable")[:limit]
+        if not order.size:
+            self.stats["no_match"] += 1
+            return []
+        self.stats["ranked"] += 1
+        return [UUID(bytes=meta["id"][row].tobytes()) for row in rows[order]]
+
+
+vector_index = VectorIndex()
+
+
+async def sync_vectors_periodically(interval: float = VECTOR_SYNC_SECONDS) -> None:
+    vector_index._changed = asyncio.Event()
+    work = vector_index.sync
+    while True:
+        try:
+            await asyncio.to_thread(work)
+        except Exception:
+            logger.exception("Vector index update failed; keeping the current index")
+            if not vector_index.ready:
+                await asyncio.to_thread(vector_index.open)
+        try:
+            await asyncio.wait_for(vector_index._changed.wait(), interval)
+        except asyncio.TimeoutError:
+            work = vector_index.sync
+            continue
+        vector_index._changed.clear()
+        work = vector_index.apply_changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or incrementally update the product vector index.")
+    parser.add_argument("--rebuild", action="store_true", help="discard the index and embed every product again")
+    args = parser.parse_args()
+    if args.rebuild:
+        shutil.rmtree(VECTOR_INDEX_PATH, ignore_errors=True)
+    started = time.perf_counter()
+    vector_index.sync()
+    print(
+        f"{len(vector_index)} products indexed at {VECTOR_INDEX_PATH} "
+        f"({vector_index.stats['embedded']} embedded, {vector_index.stats['removed']} removed) "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
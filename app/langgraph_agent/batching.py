@@ -0,0 +1,129 @@
+"""Micro-batching of concurrent model calls.
+
+When LLM_BATCH_ENABLED is set, calls from nodes in LLM_BATCH_NODES are not sent on their
+own. They wait up to LLM_BATCH_WINDOW_MS for others to arrive, and up to
+LLM_BATCH_MAX_SIZE of them go to the model's abatch() as one request. Each result is
+handed back to its waiting coroutine, and identical prompts in a batch are sent once.
+
+At most LLM_BATCH_MAX_QUEUE calls are queued or in flight. Beyond that a call fails
+at once with LLMUnavailable and the node falls back locally. A call whose caller has
+given up (llm_client's attempt timeout cancels it) is dropped before dispatch.
+
+The batcher sits below llm_client, so deadlines, retries and the circuit breaker still
+apply per call. It only pays off with a provider that serves a batch in about the time
+of one call. LangChain's default abatch() for Gemini just runs the calls concurrently,
+hence the default is off. Measure with python -m app.scripts.bench_batching.
+"""
+import asyncio
+import os
+from typing import Optional
+
+from app.langgraph_agent.resilience import LLMUnavailable
+
+LLM_BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "false").lower() == "true"
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "10"))
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "16"))
+LLM_BATCH_MAX_QUEUE = int(os.getenv("LLM_BATCH_MAX_QUEUE", "256"))
+LLM_BATCH_NODES = {
+    n.strip() for n in os.getenv("LLM_BATCH_NODES", "extract_intent_and_parameters,fill_pending_slots").split(",")
+    if n.strip()
+}
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        model,
+        window: float = LLM_BATCH_WINDOW_MS / 1000,
+        max_size: int = LLM_BATCH_MAX_SIZE,
+        max_queue: int = LLM_BATCH_MAX_QUEUE,
+        nodes: Optional[set[str]] = None,
+        enabled: bool = LLM_BATCH_ENABLED,
+    ):
+        self.model = model
+        self.window = window
+        self.max_size = max(1, max_size)
+        self.max_queue = max_queue
+        self.nodes = LLM_BATCH_NODES if nodes is None else nodes
+        self.enabled = enabled
+        self.outstanding = 0
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop = None
+        self._dispatches: set[asyncio.Task] = set()
+        self.stats = {"calls": 0, "batches": 0, "batched_calls": 0, "deduplicated": 0, "dropped": 0, "rejected": 0}
+
+    def target(self, node: str):
+        """What a node's calls should go through: this batcher, or the model directly."""
+        return self if self.enabled and node in self.nodes else self.model
+
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def ainvoke(self, prompt):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pending futures belong to one event loop; scripts may run several in turn.
+            self._pending, self._timer, self._loop = [], None, loop
+        if self.outstanding >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise LLMUnavailable("model batch queue is full")
+
+        self.stats["calls"] += 1
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        self.outstanding += 1
+        try:
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+            return await future
+        finally:
+            self.outstanding -= 1
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        waiting: dict[str, list[asyncio.Future]] = {}
+        for prompt, future in batch:
+            if future.done():
+                # The caller timed out or was cancelled while queued.
+                self.stats["dropped"] += 1
+                continue
+            waiting.setdefault(prompt, []).append(future)
+        if not waiting:
+            return
+        prompts = list(waiting)
+        self.stats["batches"] += 1
+        self.stats["batched_calls"] += sum(len(f) for f in waiting.values())
+        self.stats["deduplicated"] += sum(len(f) for f in waiting.values()) - len(prompts)
+        try:
+            results = await self.model.abatch(prompts, return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(prompts)
+        for prompt, result in zip(prompts, results):
+            for future in waiting[prompt]:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def snapshot(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "mean_batch_size": self.stats["batched_calls"] / batches if batches else 0.0,
+            "queue_depth": self.queue_depth(),
+            "outstanding": self.outstanding,
+        }
@@ -0,0 +1,88 @@
+"""Bounded conversation context carried between turns.
+
+Each session keeps the last CONTEXT_WINDOW_TURNS messages verbatim in "history".
+Older messages are folded into a one-line-per-turn "summary" capped at
+CONTEXT_SUMMARY_MAX_CHARS, and render() trims both to CONTEXT_TOKEN_BUDGET. A prompt
+therefore grows by at most a fixed amount however long a session runs.
+
+When a user has no session (first message, or the store entry expired), the window is
+seeded from their latest Conversation rows.
+"""
+import os
+from typing import Optional
+
+from app.db.functions import aget_recent_conversation
+from app.langgraph_agent.projection import estimate_tokens
+
+CONTEXT_WINDOW_TURNS = int(os.getenv("CONTEXT_WINDOW_TURNS", "6"))
+CONTEXT_TURN_MAX_CHARS = int(os.getenv("CONTEXT_TURN_MAX_CHARS", "300"))
+CONTEXT_SUMMARY_MAX_CHARS = int(os.getenv("CONTEXT_SUMMARY_MAX_CHARS", "600"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "300"))
+CONTEXT_PROMPT_NODES = {
+    n.strip() for n in os.getenv("CONTEXT_PROMPT_NODES", "extract_intent_and_parameters,formulate_response").split(",")
+    if n.strip()
+}
+
+ROLE_LABELS = {"user": "customer", "agent": "assistant"}
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _fold(summary: str, turn: dict) -> str:
+    role = ROLE_LABELS.get(turn["role"], turn["role"])
+    if turn.get("intent") and turn["intent"] != "chatting":
+        role = f"{role} ({turn['intent']})"
+    line = f"{role}: {_clip(turn['text'], 80)}"
+    summary = f"{summary}\n{line}" if summary else line
+    if len(summary) > CONTEXT_SUMMARY_MAX_CHARS:
+        # Forget the oldest lines first.
+        summary = summary[-CONTEXT_SUMMARY_MAX_CHARS:]
+        summary = summary.split("\n", 1)[-1]
+    return summary
+
+
+def compact(state: dict) -> None:
+    history = state.setdefault("history", [])
+    while len(history) > CONTEXT_WINDOW_TURNS:
+        state["summary"] = _fold(state.get("summary") or "", history.pop(0))
+
+
+def add_turn(state: dict, role: str, text: str, intent: Optional[str] = None) -> None:
+    turn = {"role": role, "text": _clip(text, CONTEXT_TURN_MAX_CHARS)}
+    if intent:
+        turn["intent"] = intent
+    state.setdefault("history", []).append(turn)
+    compact(state)
+
+
+async def load_recent_turns(user_id: str) -> list[dict]:
+    rows = await aget_recent_conversation(user_id, CONTEXT_WINDOW_TURNS)
+    return [{"role": row.direction, "text": _clip(row.message, CONTEXT_TURN_MAX_CHARS)} for row in rows]
+
+
+def render(state: dict, node: str, budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Returns a "Conversation so far" block for node's prompt, or "" when there is none."""
+    if node not in CONTEXT_PROMPT_NODES:
+        return ""
+    summary = state.get("summary") or ""
+    lines = [f"{ROLE_LABELS.get(t['role'], t['role'])}: {t['text']}" for t in state.get("history") or []]
+
+    def block() -> str:
+        parts = []
+        if summary:
+            parts.append(f"Earlier in this conversation:\n{summary}")
+        if lines:
+            parts.append("Recent messages:\n" + "\n".join(lines))
+        return "\n".join(parts)
+
+    text = block()
+    while lines and estimate_tokens(text) > budget:
+        lines.pop(0)
+        text = block()
+    if estimate_tokens(text) > budget:
+        summary = summary[-budget * 4:]
+        text = block()
+    return f"Conversation so far:\n{text}\n\n" if text else ""
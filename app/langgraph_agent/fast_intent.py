@@ -0,0 +1,127 @@
+"""Deterministic pre-classifier that answers trivial messages without an LLM call.
+
+classify() returns the same {"intent", "parameters"} shape the model is asked to
+produce, plus a confidence. extract_intent_and_parameters_node only trusts it when the
+confidence reaches FAST_INTENT_THRESHOLD and otherwise falls back to Gemini.
+"""
+import os
+import re
+import time
+from typing import Optional
+
+FAST_INTENT_ENABLED = os.getenv("FAST_INTENT_ENABLED", "true").lower() == "true"
+FAST_INTENT_THRESHOLD = float(os.getenv("FAST_INTENT_THRESHOLD", "0.9"))
+
+UUID_RE = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+
+# (intent, pattern, confidence). Checked in order; the first match wins.
+KEYWORD_RULES = [
+    ("get_my_orders", re.compile(r"\b(show|list|see|view|check|get|give)\b.*\b(all )?(of )?my orders\b"), 0.95),
+    ("get_my_orders", re.compile(r"\b(what|where) are (all )?(of )?my orders\b"), 0.95),
+    ("get_my_orders", re.compile(r"^\W*(all )?(of )?my orders\W*$"), 0.95),
+    ("get_my_orders", re.compile(r"\border history\b"), 0.9),
+    ("chatting", re.compile(
+        r"^\W*(hi|hello|hey|thanks|thank you|thx|bye|goodbye|good (morning|afternoon|evening)|ok(ay)?)"
+        r"( there)?( so much)?\W*$"
+    ), 0.95),
+]
+
+ORDER_WORDS_RE = re.compile(r"\b(order|status|track|tracking|where is|shipment|package)\b")
+# Looser than ORDER_WORDS_RE: only gates speculative order prefetches, never an intent.
+ORDER_HINT_RE = re.compile(
+    r"\b(orders?|purchases?|purchased|bought|deliver(y|ies|ed)|ship(ped|ping|ments?)?|track(ing)?|packages?)\b"
+)
+# update_profile writes, so only an explicit "change my email to <address>" skips the LLM.
+EMAIL_CHANGE_RE = re.compile(
+    r"\b(update|change|set|switch)\s+(my\s+)?(account\s+)?e-?mail(\s+address)?\s+to\s+"
+    r"(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})\b",
+    re.IGNORECASE,
+)
+NEGATION_RE = re.compile(r"\b(no|not|never|cancel|stop|dont|don't|do not)\b|n't\b")
+
+FAST_INTENT_STATS = {
+    "calls": 0,
+    "hits": 0,
+    "fallbacks": 0,
+    "total_latency_s": 0.0,
+}
+
+
+def extract_order_id(message: str) -> Optional[str]:
+    match = UUID_RE.search(message)
+    return match.group(0).lower() if match else None
+
+
+def mentions_orders(message: str) -> bool:
+    return bool(ORDER_HINT_RE.search(message.lower()))
+
+
+def extract_email(message: str) -> Optional[str]:
+    match = EMAIL_RE.search(message)
+    return match.group(0) if match else None
+
+
+def _classify(message: str) -> Optional[dict]:
+    text = message.strip().lower()
+    if not text:
+        return None
+
+    order_id = extract_order_id(text)
+    if order_id:
+        if UUID_RE.fullmatch(text.strip(" .!?\"'")):
+            return {"intent": "get_order", "parameters": {"order_id": order_id}, "confidence": 0.95}
+        if ORDER_WORDS_RE.search(text):
+            return {"intent": "get_order", "parameters": {"order_id": order_id}, "confidence": 0.95}
+        return {"intent": "get_order", "parameters": {"order_id": order_id}, "confidence": 0.7}
+
+    if extract_email(message):
+        # Anything short of an unnegated, explicit change request goes to the LLM; a
+        # rule that merely sees an address must never trigger a write.
+        change = EMAIL_CHANGE_RE.search(message)
+        if change and not NEGATION_RE.search(text):
+            return {"intent": "update_profile", "parameters": {"email": change.group("email")}, "confidence": 0.95}
+        return None
+
+    for intent, pattern, confidence in KEYWORD_RULES:
+        if pattern.search(text):
+            return {"intent": intent, "parameters": {}, "confidence": confidence}
+    return None
+
+
+def best_guess(message: str) -> Optional[dict]:
+    """The rule-based answer regardless of confidence, for when the LLM is unavailable."""
+    result = _classify(message)
+    if result is None:
+        return None
+    return {"intent": result["intent"], "parameters": result["parameters"]}
+
+
+def classify(message: str, record: bool = True) -> Optional[dict]:
+    """Returns {"intent", "parameters", "confidence"} when the rules are confident enough, else None.
+
+    record=False leaves FAST_INTENT_STATS alone, for callers that only peek at the answer.
+    """
+    if not FAST_INTENT_ENABLED:
+        return None
+    start = time.perf_counter()
+    result = _classify(message)
+    if not record:
+        return result if result is not None and result["confidence"] >= FAST_INTENT_THRESHOLD else None
+    FAST_INTENT_STATS["calls"] += 1
+    FAST_INTENT_STATS["total_latency_s"] += time.perf_counter() - start
+    if result is None or result["confidence"] < FAST_INTENT_THRESHOLD:
+        FAST_INTENT_STATS["fallbacks"] += 1
+        return None
+    FAST_INTENT_STATS["hits"] += 1
+    return result
+
+
+def fast_intent_stats() -> dict:
+    calls = FAST_INTENT_STATS["calls"]
+    return {
+        **FAST_INTENT_STATS,
+        "hit_rate": FAST_INTENT_STATS["hits"] / calls if calls else 0.0,
+        "avg_latency_us": FAST_INTENT_STATS["total_latency_s"] / calls * 1e6 if calls else 0.0,
+        "llm_calls_saved": FAST_INTENT_STATS["hits"],
+    }
@@ -1,20 +1,30 @@
 from typing import TypedDict, Optional, Dict
 from langgraph.graph import StateGraph, END
 from langchain_core.runnables import Runnable
-from langchain_google_genai import ChatGoogleGenerativeAI
+import asyncio
+import hashlib
+import importlib
 import json
+import logging
+import os
 import re
+import threading
+import time
 from dotenv import load_dotenv
 from app.db.functions import (
-    get_order,
-    update_profile,
-    search_products,
-    get_my_orders
+    aget_order,
+    aupdate_profile,
+    asearch_products,
+    aget_my_orders,
+    RankedProducts
 )
 from fastapi import HTTPException
+from app.observability import LLM_CALL_SECONDS, NODE_SECONDS
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class GraphState(TypedDict):
     user_id: str
     latest_user_message: str
@@ -23,10 +33,37 @@ class GraphState(TypedDict):
     missing_params: Optional[list[str]]
     LLM_response: Optional[str]
     execution_response: Optional[dict]
+    # Further complete intents from a multi-intent message, run alongside the primary one.
+    additional_intents: Optional[list[dict]]
+    additional_responses: Optional[list[dict]]
+    # Results fetched speculatively while the intent was being extracted.
+    prefetched: Optional[list[dict]]
+    # Bounded conversation context, see context.py.
+    history: Optional[list[dict]]
+    summary: Optional[str]
+
+from app.langgraph_agent import prompts, fast_intent, templates, projection, providers, context, slots
+
+# Gemini by default; LLM_PROVIDER=fake swaps in the offline scripted model. Built on first use.
+model = providers.LazyModel()
+from app.langgraph_agent.batching import MicroBatcher
+from app.langgraph_agent.llm_cache import build_llm_cache
+from app.langgraph_agent.resilience import LLMUnavailable, llm_client
 
-model = ChatGoogleGenerativeAI(model="gemini-1.5-flash", convert_system_message_to_human=True)
+llm_cache = build_llm_cache()
+batcher = MicroBatcher(model)
 
-from app.langgraph_agent.prompts import SYSTEM_PROMPT
+async def invoke_model(node: str, prompt: str, shareable: bool = True):
+    """Calls the module-level model through the response cache, llm_client's call policy
+    and, for batched nodes, the micro-batcher.
+
+    Raises LLMUnavailable when the model cannot answer; callers fall back locally.
+    """
+    start = time.perf_counter()
+    try:
+        return await llm_cache.ainvoke(llm_client.bind(batcher.target(node), node), node, prompt, shareable=shareable)
+    finally:
+        LLM_CALL_SECONDS.observe(time.perf_counter() - start, node=node)
 
 INTENT_REQUIRED_PARAMS = {
     "get_order": ["order_id"],
@@ -36,14 +73,32 @@ INTENT_REQUIRED_PARAMS = {
     "chatting": []
 }
 
-async def extract_intent_and_parameters_node(state: GraphState) -> GraphState:
-    message = state["latest_user_message"]
+# Parameter-free (or message-derived) reads started while the LLM extracts the intent.
+# Opt-in: every guess is a DB query, and it only pays off when the model agrees.
+SPECULATIVE_PREFETCH_INTENTS = {
+    i.strip() for i in os.getenv("SPECULATIVE_PREFETCH_INTENTS", "").split(",") if i.strip()
+}
+# wasted: started, then dropped because the model chose another intent.
+# skipped: enabled, but the message gave no hint of that intent.
+SPECULATION_STATS = {"started": 0, "used": 0, "wasted": 0, "failed": 0, "skipped": 0}
+
+async def _extract_with_llm(message: str, state: Optional[GraphState] = None) -> dict:
+    history = context.render(state, "extract_intent_and_parameters") if state else ""
     prompt = (
-        f"{SYSTEM_PROMPT}\n\nUser: {message}\n"
+        f"{prompts.SYSTEM_PROMPT}\n\n{history}User: {message}\n"
         "Again, respond with ONLY a JSON object, no markdown fences, no explanation."
     )
 
-    response = await model.ainvoke(prompt)
+    # Prompts carrying a user's history are unique per turn and may hold account data,
+    # so only history-free extractions go through the shared cache.
+    try:
+        response = await invoke_model("extract_intent_and_parameters", prompt, shareable=not history)
+    except LLMUnavailable as e:
+        # Take the rule-based guess even below the fast path's confidence threshold.
+        logger.warning("intent extraction fell back to rules: %s", e)
+        llm_client.record_fallback()
+        guess = fast_intent.best_guess(message)
+        return guess or {"intent": "chatting", "parameters": {}}
 
     raw = response.content.strip()
     raw = re.sub(r"^```(?:json)?\s*", "", raw)
@@ -52,103 +107,347 @@ async def extract_intent_and_parameters_node(state: GraphState) -> GraphState:
     if match:
         raw = match.group(0)
 
-    print(f"\nGEMINI RESPONSE: {response.content.strip()}")
+    logger.debug("model response: %s", response.content)
 
     try:
-        result = json.loads(raw)
+        return json.loads(raw)
     except json.JSONDecodeError:
-        result = {"intent": None, "parameters": {}}
+        return {"intent": None, "parameters": {}}
+
+def _missing(intent: Optional[str], parameters: dict) -> list[str]:
+    required = INTENT_REQUIRED_PARAMS.get(intent, [])
+    return [key for key in required if key not in parameters or not parameters[key]]
+
+def _intent_list(result: dict) -> list[dict]:
+    """Normalizes a single-intent result or an {"intents": [...]} result to a list."""
+    items = result.get("intents") if isinstance(result.get("intents"), list) else [result]
+    intents = [
+        {"intent": item.get("intent"), "parameters": dict(item.get("parameters") or {})}
+        for item in items if isinstance(item, dict)
+    ]
+    # Lead with a task that needs the database so small talk doesn't hide the rest.
+    intents.sort(key=lambda item: item["intent"] in (None, "chatting"))
+    return intents or [{"intent": None, "parameters": {}}]
+
+def _same_parameters(guess: dict, parameters: dict) -> bool:
+    return all(str(parameters.get(key)).lower() == str(value).lower() for key, value in guess.items())
+
+def _speculate(state: GraphState) -> list[dict]:
+    guesses = []
+    message = state["latest_user_message"]
+    if "get_my_orders" in SPECULATIVE_PREFETCH_INTENTS:
+        if fast_intent.mentions_orders(message):
+            guesses.append(("get_my_orders", {}))
+        else:
+            SPECULATION_STATS["skipped"] += 1
+    order_id = fast_intent.extract_order_id(message)
+    if order_id and "get_order" in SPECULATIVE_PREFETCH_INTENTS:
+        guesses.append(("get_order", {"order_id": order_id}))
+
+    SPECULATION_STATS["started"] += len(guesses)
+    return [
+        {"intent": intent, "parameters": params, "task": asyncio.create_task(_run_intent(intent, params, state["user_id"]))}
+        for intent, params in guesses
+    ]
+
+def _discard(task: asyncio.Task) -> None:
+    task.cancel()
+    # Retrieve any failure so a discarded guess never logs "exception was never retrieved".
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    SPECULATION_STATS["wasted"] += 1
+
+async def _claim_speculation(speculative: list[dict], intents: list[dict]) -> list[dict]:
+    """Keeps the guesses the model confirmed and cancels the rest."""
+    prefetched = []
+    for guess in speculative:
+        wanted = any(
+            item["intent"] == guess["intent"] and _same_parameters(guess["parameters"], item["parameters"])
+            for item in intents
+        )
+        if not wanted:
+            _discard(guess["task"])
+            continue
+        try:
+            response = await guess["task"]
+        except Exception:
+            # Let execute_intent retry it and surface the error on the normal path.
+            SPECULATION_STATS["failed"] += 1
+            continue
+        SPECULATION_STATS["used"] += 1
+        prefetched.append({"intent": guess["intent"], "parameters": guess["parameters"], "response": response})
+    return prefetched
 
-    state["intent"] = result.get("intent")
-    state["parameters"] = result.get("parameters", {})
+async def extract_intent_and_parameters_node(state: GraphState) -> GraphState:
+    message = state["latest_user_message"]
+    speculative = []
+
+    result = fast_intent.classify(message)
+    if result is None:
+        speculative = _speculate(state)
+        try:
+            result = await _extract_with_llm(message, state)
+        except BaseException:
+            for guess in speculative:
+                _discard(guess["task"])
+            raise
+
+    intents = _intent_list(result)
+    state["prefetched"] = await _claim_speculation(speculative, intents)
+
+    primary = intents[0]
+    state["intent"] = primary["intent"]
+    state["parameters"] = primary["parameters"]
     state["parameters"].setdefault("type", None)
     state["parameters"].setdefault("price_filter", None)
+    state["missing_params"] = _missing(state["intent"], state["parameters"])
 
-    required = INTENT_REQUIRED_PARAMS.get(state["intent"], [])
-    state["missing_params"] = [
-        key for key in required 
-        if key not in state["parameters"] or not state["parameters"][key]
+    # Extra intents only ride along when they can run without a follow-up question.
+    state["additional_intents"] = [
+        item for item in intents[1:]
+        if item["intent"] in INTENT_REQUIRED_PARAMS and item["intent"] != "chatting"
+        and not _missing(item["intent"], item["parameters"])
     ]
 
     return state
 
+SLOT_PROMPT_ENABLED = os.getenv("SLOT_PROMPT_ENABLED", "true").lower() == "true"
+
+def _parse_json_object(text: str) -> dict:
+    match = re.search(r"\{[\s\S]*\}", text)
+    try:
+        parsed = json.loads(match.group(0)) if match else None
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+async def _fill_with_prompt(intent: str, remaining: list[str], message: str) -> dict:
+    prompt = (
+        f"Extract {', '.join(remaining)} for a '{intent}' request from the customer's reply below. "
+        "Respond with ONLY a JSON object mapping each name to its value, or null if the reply does not contain it.\n"
+        f"Reply: {message}"
+    )
+    try:
+        response = await invoke_model("fill_pending_slots", prompt)
+    except LLMUnavailable as e:
+        logger.warning("slot prompt skipped: %s", e)
+        llm_client.record_fallback()
+        return {}
+    values = _parse_json_object(response.content)
+    return {slot: values[slot] for slot in remaining if values.get(slot)}
+
+def _entry(state: GraphState) -> str:
+    # A turn answering a follow-up question resumes the stored intent instead of re-extracting.
+    if state.get("intent") and state.get("missing_params"):
+        return "fill_pending_slots"
+    return "extract_intent_and_parameters"
+
+# Intents that change data. A regex that merely sees a value must not complete them.
+WRITE_INTENTS = {"update_profile"}
+
+def _drop_pending(state: GraphState) -> GraphState:
+    """Forgets the pending request so the turn is extracted afresh."""
+    state["intent"] = None
+    state["parameters"] = {}
+    state["missing_params"] = []
+    state["additional_intents"] = []
+    state["prefetched"] = []
+    return state
+
+async def fill_pending_slots_node(state: GraphState) -> GraphState:
+    message = state["latest_user_message"]
+    missing = state["missing_params"]
+    write = state["intent"] in WRITE_INTENTS
+
+    if write and fast_intent.NEGATION_RE.search(message.lower()):
+        # "don't change it, a@b.com is my old address" cancels the write rather than filling it.
+        logger.debug("pending %s abandoned: negated reply", state["intent"])
+        return _drop_pending(state)
+
+    filled = {} if write else slots.extract(missing, message)
+    remaining = [slot for slot in missing if slot not in filled]
+    if remaining:
+        guess = fast_intent.classify(message, record=False)
+        if guess and guess["intent"] != state["intent"]:
+            # The reply is about something else: drop the pending request and extract afresh.
+            logger.debug("pending %s abandoned for %s", state["intent"], guess["intent"])
+            return _drop_pending(state)
+        # A typed slot its extractor missed is not in the reply; only free text needs the model.
+        # Writes send every slot to the model, which reads the reply rather than matching it.
+        to_prompt = remaining if write else [slot for slot in remaining if slot not in slots.SLOT_EXTRACTORS]
+        if to_prompt and SLOT_PROMPT_ENABLED:
+            filled.update(await _fill_with_prompt(state["intent"], to_prompt, message))
+            remaining = [slot for slot in missing if slot not in filled]
+
+    if state["intent"] == "search_products" and not state["parameters"].get("price_filter"):
+        price_filter = slots.extract_price_range(message)
+        if price_filter:
+            filled["price_filter"] = price_filter
+
+    logger.debug("slot filling for %s: filled=%s remaining=%s", state["intent"], filled, remaining)
+    state["parameters"] = {**state["parameters"], **filled}
+    state["missing_params"] = remaining
+    state["additional_intents"] = []
+    state["prefetched"] = []
+    return state
+
 async def ask_for_missing_node(state: GraphState) -> GraphState:
-    print("\nHEREEE missing")
     missing = state["missing_params"]
-    print(f"\n\nMISSING parameters: {missing}")
+    logger.debug("missing parameters for %s: %s", state["intent"], missing)
     prompt = (
         f"You are assisting a user who wants to '{state['intent']}'.\n"
         f"However, you're missing the following parameters: {', '.join(missing)}.\n"
         f"Kindly ask the user to provide them one by one in a polite, conversational tone."
     )
-    response = await model.ainvoke(prompt)
-    # print(f"\nResponse from Gemini: {response.content.strip()}")
-    state["LLM_response"] = response.content.strip()
+    try:
+        response = await invoke_model("ask_for_missing", prompt)
+        state["LLM_response"] = response.content.strip()
+    except LLMUnavailable as e:
+        logger.warning("ask_for_missing used the canned prompt: %s", e)
+        llm_client.record_fallback()
+        state["LLM_response"] = f"Could you please share your {' and '.join(p.replace('_', ' ') for p in missing)}?"
     return state
 
-async def execute_intent_node(state: GraphState) -> GraphState:
-    intent = state["intent"]
-    parameters = state["parameters"]
-
+async def _run_intent(intent: Optional[str], parameters: dict, user_id: str):
     try:
         if intent == "get_order":
-            state["execution_response"] = get_order(parameters["order_id"])
+            return await aget_order(parameters["order_id"])
         elif intent == "update_profile":
-            state["execution_response"] = update_profile(state["user_id"], parameters["email"])
+            return await aupdate_profile(user_id, parameters["email"])
         elif intent == "search_products":
-            state["execution_response"] = search_products(
+            return await asearch_products(
                 product_type=parameters.get("type"),
-                price_filter=parameters.get("price_filter")
+                price_filter=parameters.get("price_filter"),
+                query=parameters.get("query")
             )
         elif intent == "get_my_orders":
-            state["execution_response"] = get_my_orders(state["user_id"])
+            return await aget_my_orders(user_id)
         else:
-            state["execution_response"] = {"error": "Unknown intent"}
+            return {"error": "Unknown intent"}
     except HTTPException as e:
-        state["execution_response"] = {
+        return {
             "error": e.detail,
             "status_code": e.status_code
         }
 
-    print(f"\nRESPONSE when executing intent '{intent}': {state['execution_response']}")
+async def _prefetched_or_run(state: GraphState, intent: Optional[str], parameters: dict):
+    for item in state.get("prefetched") or []:
+        if item["intent"] == intent and _same_parameters(item["parameters"], parameters):
+            return item["response"]
+    return await _run_intent(intent, parameters, state["user_id"])
+
+async def execute_intent_node(state: GraphState) -> GraphState:
+    intent = state["intent"]
+    extra = state.get("additional_intents") or []
+
+    responses = await asyncio.gather(
+        _prefetched_or_run(state, intent, state["parameters"]),
+        *(_prefetched_or_run(state, item["intent"], item["parameters"]) for item in extra)
+    )
+    state["execution_response"] = responses[0]
+    state["additional_responses"] = [
+        {"intent": item["intent"], "execution_response": response}
+        for item, response in zip(extra, responses[1:])
+    ]
+
+    logger.debug("executed intent %s: %s", intent, state["execution_response"])
     return state
 
+FALLBACK_REPLY = "Sorry, I'm having trouble answering right now. Please try again in a moment."
+
 async def formulate_response_node(state: GraphState) -> GraphState:
     execution_response = state.get("execution_response", {})
-    print(f"\nFORMULATING RESPONSE with execution_response: {execution_response}")
+    logger.debug("formulating response from: %s", execution_response)
     user_message = state.get("latest_user_message", "")
     intent = state.get("intent", "unknown")
 
+    # Replies for extra intents are always rendered locally so they never interleave
+    # with the streamed LLM reply for the primary intent.
+    extra_replies = [
+        templates.render(item["intent"], item["execution_response"], force=True)
+        or projection.project(item["intent"], item["execution_response"])
+        for item in state.get("additional_responses") or []
+    ]
+
+    # Results ranked by the vector index already match the query; no LLM re-filtering.
+    ranked = isinstance(execution_response, RankedProducts)
+    reply = templates.render(intent, execution_response, force=ranked)
+    if reply is not None:
+        state["LLM_response"] = "\n\n".join([reply, *extra_replies])
+        return state
+
+    result_text = projection.project(intent, execution_response)
+
+    history = context.render(state, "formulate_response") if intent == "chatting" else ""
+
     if intent == "search_products":
         prompt = (
             f"You are an AI assistant refining search results for the user.\n"
             f"The user requested: '{user_message}'.\n"
-            f"The initial search results are: {execution_response}.\n"
+            f"The initial search results are:\n{result_text}\n"
             "Please filter these results further based on the user's original request and provide a concise response."
         )
     else:
         prompt = (
             f"You are an AI assistant formulating a response for the user.\n"
+            f"{history}"
             f"The user requested: '{user_message}'.\n"
             f"The intent identified was: '{intent}'.\n"
-            f"The result of the execution is: {execution_response}.\n"
+            f"The result of the execution is: {result_text}\n"
             "Please provide a polite and concise response to the user summarizing what was executed and the result."
         )
 
-    response = await model.ainvoke(prompt)
-    state["LLM_response"] = response.content.strip()
+    # Only small talk without history is safe to share; every other reply embeds this
+    # user's account data or conversation.
+    try:
+        response = await invoke_model("formulate_response", prompt, shareable=intent == "chatting" and not history)
+        reply = response.content.strip()
+    except LLMUnavailable as e:
+        logger.warning("formulate_response used a local reply: %s", e)
+        llm_client.record_fallback()
+        reply = templates.render(intent, execution_response, force=True) or FALLBACK_REPLY
+    state["LLM_response"] = "\n\n".join([reply, *extra_replies])
 
     return state
 
+NODE_STATS: Dict[str, dict] = {}
+
+def _timed(name: str, node):
+    async def timed_node(state: GraphState) -> GraphState:
+        start = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            elapsed = time.perf_counter() - start
+            NODE_SECONDS.observe(elapsed, node=name)
+            stats = NODE_STATS.setdefault(name, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["calls"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+    return timed_node
+
+def node_stats() -> Dict[str, dict]:
+    return {
+        name: {**stats, "avg_seconds": stats["total_seconds"] / stats["calls"]}
+        for name, stats in NODE_STATS.items() if stats["calls"]
+    }
+
 def build_graph() -> Runnable:
     builder = StateGraph(GraphState)
-    builder.add_node("extract_intent_and_parameters", extract_intent_and_parameters_node)
-    builder.add_node("ask_for_missing", ask_for_missing_node)
-    builder.add_node("execute_intent", execute_intent_node)
-    builder.add_node("formulate_response", formulate_response_node)
+    builder.add_node("fill_pending_slots", _timed("fill_pending_slots", fill_pending_slots_node))
+    builder.add_node("extract_intent_and_parameters", _timed("extract_intent_and_parameters", extract_intent_and_parameters_node))
+    builder.add_node("ask_for_missing", _timed("ask_for_missing", ask_for_missing_node))
+    builder.add_node("execute_intent", _timed("execute_intent", execute_intent_node))
+    builder.add_node("formulate_response", _timed("formulate_response", formulate_response_node))
     builder.add_node("end", lambda x: x)
 
-    builder.set_entry_point("extract_intent_and_parameters")
+    builder.set_conditional_entry_point(_entry, ["fill_pending_slots", "extract_intent_and_parameters"])
+
+    # Slots still missing, or a dropped intent, mean the reply was about something else:
+    # extract it from scratch.
+    builder.add_conditional_edges(
+        "fill_pending_slots",
+        lambda s: "execute_intent" if s["intent"] and not s["missing_params"] else "extract_intent_and_parameters"
+    )
 
     builder.add_conditional_edges(
         "extract_intent_and_parameters",
@@ -165,8 +464,61 @@ def build_graph() -> Runnable:
 
     return builder.compile()
 
+# Bump whenever build_graph's nodes or edges change so running workers hot-swap on reload.
+GRAPH_VERSION = "4"
+GRAPH_HOT_RELOAD = os.getenv("GRAPH_HOT_RELOAD", "false").lower() == "true"
+
+_COMPILED_GRAPH: Optional[Runnable] = None
+_COMPILED_FINGERPRINT: Optional[str] = None
+_PROMPTS_MTIME: float = 0.0
+_GRAPH_LOCK = threading.Lock()
+
+def graph_fingerprint() -> str:
+    digest = hashlib.sha256(GRAPH_VERSION.encode())
+    digest.update(prompts.SYSTEM_PROMPT.encode())
+    return digest.hexdigest()[:16]
+
+def _prompts_mtime() -> float:
+    try:
+        return os.path.getmtime(prompts.__file__)
+    except OSError:
+        return 0.0
+
+def _swap_graph() -> None:
+    global _COMPILED_GRAPH, _COMPILED_FINGERPRINT, _PROMPTS_MTIME
+    compiled = build_graph()
+    _COMPILED_FINGERPRINT = graph_fingerprint()
+    _PROMPTS_MTIME = _prompts_mtime()
+    _COMPILED_GRAPH = compiled
+
+def warm_up_graph() -> Runnable:
+    """Compiles the graph once per process; later calls return the cached graph."""
+    with _GRAPH_LOCK:
+        if _COMPILED_GRAPH is None:
+            _swap_graph()
+        return _COMPILED_GRAPH
+
+def reload_graph(reload_prompts: bool = True) -> Runnable:
+    """Re-reads the prompts and swaps in a freshly compiled graph if its fingerprint changed."""
+    global _PROMPTS_MTIME
+    with _GRAPH_LOCK:
+        if reload_prompts:
+            importlib.reload(prompts)
+        if _COMPILED_GRAPH is None or graph_fingerprint() != _COMPILED_FINGERPRINT:
+            _swap_graph()
+        _PROMPTS_MTIME = _prompts_mtime()
+        return _COMPILED_GRAPH
+
+def get_graph() -> Runnable:
+    graph = _COMPILED_GRAPH
+    if graph is None:
+        return warm_up_graph()
+    if GRAPH_HOT_RELOAD and _prompts_mtime() != _PROMPTS_MTIME:
+        return reload_graph()
+    return graph
+
 async def run_graph(user_id: str, message: str) -> dict:
-    graph = build_graph()
+    graph = get_graph()
     result = await graph.ainvoke({
         "user_id": user_id,
         "latest_user_message": message,
@@ -183,9 +535,38 @@ async def run_graph(user_id: str, message: str) -> dict:
         "LLM_response": result.get("LLM_response")
     }
 
+# Nodes whose LLM output is user-facing and worth streaming token by token.
+STREAMED_NODES = {"formulate_response", "ask_for_missing"}
+
+async def stream_graph(state: GraphState):
+    """Runs the graph and yields ("node", name), ("token", text) and finally ("final", state).
+
+    llm_client retries a call that failed part-way through, and the retry streams the
+    reply again from the start. Each attempt is its own model run, so when a node's
+    tokens switch to a new run, ("reset", node) tells the client to drop that node's
+    partial text first.
+    """
+    graph = get_graph()
+    final = state
+    streaming_run: dict[str, str] = {}
+    async for mode, payload in graph.astream(state, stream_mode=["updates", "messages", "values"]):
+        if mode == "updates":
+            for node in payload:
+                yield "node", node
+        elif mode == "messages":
+            chunk, metadata = payload
+            node = metadata.get("langgraph_node")
+            if node in STREAMED_NODES and isinstance(chunk.content, str) and chunk.content:
+                if node in streaming_run and streaming_run[node] != chunk.id:
+                    yield "reset", node
+                streaming_run[node] = chunk.id
+                yield "token", chunk.content
+        else:
+            final = payload
+    yield "final", final
+
 async def run_graph_with_state(state: GraphState) -> GraphState:
     """Continues the graph from an existing state snapshot."""
-    print("\nHERE in run_graph_with_state")
-    print(f"\nSTATE before invoking graph: {state}")
-    graph = build_graph()
+    logger.debug("resuming graph from state: %s", state)
+    graph = get_graph()
     return await graph.ainvoke(state)
\ No newline at end of file
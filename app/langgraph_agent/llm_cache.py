@@ -0,0 +1,222 @@
+"""Exact-match response cache for LLM calls, keyed on the prompt with whitespace collapsed.
+
+Case is kept: emails, order references and product queries that differ only in case
+are different prompts. Nodes opt in through LLM_CACHE_NODES. A node may additionally
+mark a single call as not shareable (for example a reply built from one user's account
+data or conversation history); those calls always go to the model and are never stored.
+The SQLite disk tier is read and written in a worker thread, off the event loop.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.messages import AIMessage
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_NODES = {
+    node.strip()
+    for node in os.getenv(
+        "LLM_CACHE_NODES", "extract_intent_and_parameters,fill_pending_slots,ask_for_missing,formulate_response"
+    ).split(",")
+    if node.strip()
+}
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_DISK_PATH = os.getenv("LLM_CACHE_DISK_PATH")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    return _WHITESPACE_RE.sub(" ", prompt).strip()
+
+
+def cache_key(node: str, prompt: str) -> str:
+    return hashlib.sha256(f"{node}\x00{normalize_prompt(prompt)}".encode()).hexdigest()
+
+
+class MemoryBackend:
+    """Size-bounded LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: float = LLM_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def aget(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str) -> None:
+        self.set(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskBackend:
+    """SQLite-file backend so cached responses survive restarts."""
+
+    def __init__(self, path: str, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: float = LLM_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class TieredBackend:
+    """Memory LRU in front of a slower persistent backend."""
+
+    def __init__(self, front: MemoryBackend, back: DiskBackend):
+        self.front = front
+        self.back = back
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.front.get(key)
+        if value is None:
+            value = self.back.get(key)
+            if value is not None:
+                self.front.set(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.front.set(key, value)
+        self.back.set(key, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        value = self.front.get(key)
+        if value is None:
+            value = await self.back.aget(key)
+            if value is not None:
+                self.front.set(key, value)
+        return value
+
+    async def aset(self, key: str, value: str) -> None:
+        self.front.set(key, value)
+        await self.back.aset(key, value)
+
+    def clear(self) -> None:
+        self.front.clear()
+        self.back.clear()
+
+    def __len__(self) -> int:
+        return len(self.back)
+
+
+class LLMCache:
+    def __init__(self, backend, nodes: set[str], enabled: bool = True):
+        self.backend = backend
+        self.nodes = nodes
+        self.enabled = enabled
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, node: str, outcome: str) -> None:
+        node_stats = self.stats.setdefault(node, {"hits": 0, "misses": 0, "bypassed": 0})
+        node_stats[outcome] += 1
+
+    async def ainvoke(self, model, node: str, prompt: str, shareable: bool = True):
+        if not (self.enabled and shareable and node in self.nodes):
+            self._count(node, "bypassed")
+            return await model.ainvoke(prompt)
+
+        key = cache_key(node, prompt)
+        cached = await self.backend.aget(key)
+        if cached is not None:
+            self._count(node, "hits")
+            return AIMessage(content=cached)
+
+        self._count(node, "misses")
+        response = await model.ainvoke(prompt)
+        if isinstance(response.content, str) and response.content.strip():
+            await self.backend.aset(key, response.content)
+        return response
+
+    def metrics(self) -> dict:
+        report = {}
+        for node, node_stats in self.stats.items():
+            lookups = node_stats["hits"] + node_stats["misses"]
+            report[node] = {**node_stats, "hit_rate": node_stats["hits"] / lookups if lookups else 0.0}
+        return report
+
+
+def build_llm_cache() -> LLMCache:
+    backend = MemoryBackend()
+    if LLM_CACHE_DISK_PATH:
+        backend = TieredBackend(backend, DiskBackend(LLM_CACHE_DISK_PATH))
+    return LLMCache(backend, LLM_CACHE_NODES, enabled=LLM_CACHE_ENABLED)
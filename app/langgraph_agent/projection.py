@@ -0,0 +1,100 @@
+"""Compacts execution results before they are interpolated into an LLM prompt.
+
+The raw result is the repr of SQLModel objects, which repeats class and field names for
+every row. project() keeps only the fields each intent needs, encodes lists as a
+pipe-separated table with a single header row, keeps the top-k rows plus an "N more"
+line, and shrinks k until the block fits PROMPT_RESULT_TOKEN_BUDGET.
+"""
+import json
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+PROMPT_RESULT_TOKEN_BUDGET = int(os.getenv("PROMPT_RESULT_TOKEN_BUDGET", "600"))
+PROJECTION_TOP_K = int(os.getenv("PROJECTION_TOP_K", "10"))
+
+FIELD_WHITELISTS = {
+    "search_products": ["name", "price", "specs", "in_stock"],
+    "get_my_orders": ["order_id", "product_name", "price", "status", "quantity", "created_at"],
+    "get_order": ["order_id", "status", "quantity", "created_at"],
+    "update_profile": ["name", "email"],
+}
+
+logger = logging.getLogger(__name__)
+
+PROJECTION_STATS = {"requests": 0, "raw_tokens": 0, "projected_tokens": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for English text and compact tables.
+    return math.ceil(len(text) / 4)
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _fields(intent: str, row: Any) -> dict:
+    if isinstance(row, dict):
+        fields = FIELD_WHITELISTS.get(intent) or list(row)
+        return {f: _value(row.get(f)) for f in fields if f in row}
+    fields = FIELD_WHITELISTS.get(intent) or list(getattr(row, "model_fields", {}))
+    return {f: _value(getattr(row, f, None)) for f in fields}
+
+
+def _table(intent: str, rows: list, k: int) -> str:
+    projected = [_fields(intent, row) for row in rows[:k]]
+    columns = list(projected[0]) if projected else []
+    lines = ["|".join(columns)]
+    for row in projected:
+        lines.append("|".join("" if row.get(c) is None else str(row.get(c)).replace("|", "/") for c in columns))
+    if len(rows) > k:
+        lines.append(f"... and {len(rows) - k} more")
+    return "\n".join(lines)
+
+
+def project(intent: str, execution_response: Any, budget: int = PROMPT_RESULT_TOKEN_BUDGET) -> str:
+    """Returns a compact, budget-bounded text form of execution_response for a prompt."""
+    if execution_response is None:
+        text = "none"
+    elif isinstance(execution_response, (list, tuple)):
+        rows = list(execution_response)
+        if not rows:
+            text = "no results"
+        else:
+            k = min(PROJECTION_TOP_K, len(rows))
+            text = _table(intent, rows, k)
+            while estimate_tokens(text) > budget and k > 1:
+                k = max(1, k // 2)
+                text = _table(intent, rows, k)
+    elif isinstance(execution_response, dict) and "error" in execution_response:
+        text = json.dumps(execution_response, default=str, separators=(",", ":"))
+    else:
+        text = json.dumps(_fields(intent, execution_response), default=str, separators=(",", ":"))
+
+    if estimate_tokens(text) > budget:
+        text = text[: budget * 4] + " ...(truncated)"
+
+    raw_tokens = estimate_tokens(str(execution_response))
+    projected_tokens = estimate_tokens(text)
+    PROJECTION_STATS["requests"] += 1
+    PROJECTION_STATS["raw_tokens"] += raw_tokens
+    PROJECTION_STATS["projected_tokens"] += projected_tokens
+    logger.debug("projected %s result: raw_tokens=%d projected_tokens=%d", intent, raw_tokens, projected_tokens)
+    return text
+
+
+def projection_stats() -> dict:
+    return {
+        **PROJECTION_STATS,
+        "tokens_saved": PROJECTION_STATS["raw_tokens"] - PROJECTION_STATS["projected_tokens"],
+    }
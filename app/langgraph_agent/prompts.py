@@ -12,4 +12,5 @@ SYSTEM_PROMPT = (
     "The available types are: 'mobile', 'laptop', 'clothing', 'home_appliance'.\n"
     "Use the chatting intent if the user is just chatting or asking general questions.\n"
     "Respond only with the intent and parameters in a JSON format, where the first attribute is the intent name and the second is an object containing the parameters and their values.\n"
+    "If the user asks for several things in one message, respond with {\"intents\": [...]} holding one such object per request, in the order they were asked.\n"
 )
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""Chat model providers for the agent graph.
+
+LLM_PROVIDER=gemini (default) uses Google Gemini; LLM_PROVIDER=fake uses
+ScriptedChatModel, a local model that answers intent-extraction prompts from regex
+rules with canned JSON after a configurable, seeded latency. The fake lets the API
+be benchmarked and load-tested offline without a Google API key.
+
+LazyModel defers build_model() to the first call, so importing the graph does not load
+the Google GenAI SDK (about half a second) until a turn needs the model or the
+start-up warm-up (LLM_WARMUP_ENABLED) calls it.
+
+The fake serves abatch() as one request costing FAKE_LLM_BATCH_ITEM_MS per extra prompt,
+and FAKE_LLM_MAX_CONCURRENCY (0 = unlimited) caps requests in flight, as a provider's
+rate limit would.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field, PrivateAttr
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "50"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+FAKE_LLM_SCRIPT = os.getenv("FAKE_LLM_SCRIPT", "")
+FAKE_LLM_BATCH_ITEM_MS = float(os.getenv("FAKE_LLM_BATCH_ITEM_MS", "10"))
+FAKE_LLM_MAX_CONCURRENCY = int(os.getenv("FAKE_LLM_MAX_CONCURRENCY", "0"))
+
+# The extraction prompt ends with "User: <message>"; other prompts never contain it.
+_USER_LINE = re.compile(r"^User: (.*)$", re.MULTILINE)
+# The slot-filling prompt ends with "Reply: <message>".
+_REPLY_LINE = re.compile(r"^Reply: (.*)$", re.MULTILINE)
+
+# Each rule maps a regex over the user message to an intent. Named groups become
+# parameters; a rule may instead give the full "response" object verbatim.
+DEFAULT_SCRIPT = [
+    {"match": r"(?P<order_id>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})", "intent": "get_order"},
+    {"match": r"(?P<email>[\w.+-]+@[\w-]+\.[\w.-]+)", "intent": "update_profile"},
+    {"match": r"\b(my orders?|bought|purchases?)\b", "intent": "get_my_orders"},
+    {"match": r"\b(?P<query>laptops?|notebooks?)\b", "intent": "search_products", "parameters": {"type": "laptop"}},
+    {"match": r"\b(?P<query>phones?|iphone|smartphones?)\b", "intent": "search_products", "parameters": {"type": "mobile"}},
+    {"match": r"\b(?P<query>sweaters?|jackets?|jeans|shirts?)\b", "intent": "search_products", "parameters": {"type": "clothing"}},
+    {"match": r"\b(?P<query>fridges?|refrigerators?|microwaves?|air conditioners?)\b", "intent": "search_products", "parameters": {"type": "home_appliance"}},
+]
+
+
+def load_script(path: str) -> list[dict]:
+    """Reads rules from a JSON list or a jsonl file with one rule per line."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class ScriptedChatModel(BaseChatModel):
+    rules: list[dict] = Field(default_factory=lambda: list(DEFAULT_SCRIPT))
+    latency: float = 0.3
+    jitter: float = 0.05
+    seed: int = 0
+    batch_item_latency: float = 0.01
+    max_concurrency: int = 0
+    calls: int = 0
+    requests: int = 0
+    _rng: random.Random = PrivateAttr()
+    _slots: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _slots_loop: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls) -> "ScriptedChatModel":
+        rules = load_script(FAKE_LLM_SCRIPT) + DEFAULT_SCRIPT if FAKE_LLM_SCRIPT else list(DEFAULT_SCRIPT)
+        return cls(
+            rules=rules,
+            latency=FAKE_LLM_LATENCY_MS / 1000,
+            jitter=FAKE_LLM_JITTER_MS / 1000,
+            seed=FAKE_LLM_SEED,
+            batch_item_latency=FAKE_LLM_BATCH_ITEM_MS / 1000,
+            max_concurrency=FAKE_LLM_MAX_CONCURRENCY,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def reply_for(self, prompt: str) -> str:
+        self.calls += 1
+        reply = _REPLY_LINE.search(prompt)
+        if reply is not None:
+            slots = {}
+            for rule in self.rules:
+                match = re.search(rule["match"], reply.group(1), re.IGNORECASE)
+                if match:
+                    slots.update({k: v for k, v in match.groupdict().items() if v is not None})
+            return json.dumps(slots)
+
+        user = _USER_LINE.search(prompt)
+        if user is None:
+            if "missing the following parameters" in prompt:
+                return "Could you share the missing details so I can help with that?"
+            return "Here is what I found for you."
+
+        message = user.group(1)
+        for rule in self.rules:
+            match = re.search(rule["match"], message, re.IGNORECASE)
+            if match is None:
+                continue
+            if "response" in rule:
+                return json.dumps(rule["response"])
+            groups = {k: v for k, v in match.groupdict().items() if v is not None}
+            return json.dumps({"intent": rule["intent"], "parameters": {**rule.get("parameters", {}), **groups}})
+        return json.dumps({"intent": "chatting", "parameters": {}})
+
+    @staticmethod
+    def _prompt(messages: list[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    async def _serve(self, delay: float) -> None:
+        self.requests += 1
+        if self.max_concurrency <= 0:
+            await asyncio.sleep(delay)
+            return
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_concurrency), loop
+        async with self._slots:
+            await asyncio.sleep(delay)
+
+    async def abatch(self, inputs: list, config=None, *, return_exceptions: bool = False, **kwargs) -> list:
+        await self._serve(self._delay() + self.batch_item_latency * max(0, len(inputs) - 1))
+        replies = []
+        for item in inputs:
+            prompt = item if isinstance(item, str) else self._prompt(list(item))
+            replies.append(AIMessage(content=self.reply_for(prompt)))
+        return replies
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply_for(self._prompt(messages))))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await self._serve(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply_for(self._prompt(messages))))])
+
+    def _stream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self._delay())
+        for token in re.findall(r"\S+\s*", self.reply_for(self._prompt(messages))):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await self._serve(self._delay())
+        for token in re.findall(r"\S+\s*", self.reply_for(self._prompt(messages))):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def build_model(provider: str = LLM_PROVIDER) -> BaseChatModel:
+    if provider == "fake":
+        return ScriptedChatModel.from_env()
+    if provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        # Retries are left to resilience.llm_client; the SDK's own backoff can run for minutes.
+        return ChatGoogleGenerativeAI(model=LLM_MODEL, convert_system_message_to_human=True, max_retries=1)
+    raise ValueError(f"Unknown LLM_PROVIDER {provider!r}; expected 'gemini' or 'fake'")
+
+
+class LazyModel:
+    """Stands in for build_model(provider) and builds it on first attribute access."""
+
+    def __init__(self, provider: str = LLM_PROVIDER):
+        self.provider = provider
+        self._model: Optional[BaseChatModel] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self) -> BaseChatModel:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = build_model(self.provider)
+        return self._model
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
@@ -0,0 +1,246 @@
+"""Deadline, retry, hedging, concurrency and circuit-breaker policy for model calls.
+
+Every graph call goes through llm_client.ainvoke(model, node, prompt):
+- the whole call, retries included, must finish within LLM_DEADLINE_SECONDS, and each
+  attempt within LLM_ATTEMPT_TIMEOUT_SECONDS;
+- transient failures (timeouts, connection errors, 429/5xx-style API errors) are
+  retried up to LLM_MAX_RETRIES times with full-jitter exponential backoff;
+- for nodes in LLM_HEDGE_NODES a second identical request is started when the first
+  has not answered after LLM_HEDGE_AFTER_SECONDS, and the first answer wins;
+- at most LLM_MAX_CONCURRENCY calls are in flight per process;
+- LLM_BREAKER_THRESHOLD consecutive transient failures open the circuit for
+  LLM_BREAKER_COOLDOWN_SECONDS, after which a single trial call decides whether it closes.
+
+When a call cannot be served it raises LLMUnavailable; graph nodes catch it and fall
+back to local answers instead of failing the request.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "30"))
+LLM_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.25"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "4"))
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+# Hedging is limited to nodes whose output is not streamed to the client.
+LLM_HEDGE_NODES = {
+    n.strip() for n in os.getenv("LLM_HEDGE_NODES", "extract_intent_and_parameters,fill_pending_slots").split(",")
+    if n.strip()
+}
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# Matched by class name anywhere in the exception's MRO or cause chain, so no provider
+# SDK has to be imported here.
+TRANSIENT_ERROR_NAMES = {
+    "TimeoutError", "ConnectionError", "TransportError", "ResourceExhausted", "ServiceUnavailable",
+    "DeadlineExceeded", "InternalServerError", "TooManyRequests", "Aborted", "ServerError",
+}
+
+
+class LLMUnavailable(Exception):
+    """The model could not answer in time; callers should use a local fallback."""
+
+
+def is_transient(error: BaseException) -> bool:
+    seen = 0
+    while error is not None and seen < 5:
+        if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+            return True
+        error = error.__cause__ or error.__context__
+        seen += 1
+    return False
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        # A half-open trial that failed for a non-transient reason proves nothing either way.
+        self._trial_in_flight = False
+
+
+class _BoundCall:
+    """Adapts llm_client to the model.ainvoke(prompt) shape the response cache calls."""
+
+    def __init__(self, client: "LLMClient", model, node: str):
+        self.client, self.model, self.node = client, model, node
+
+    async def ainvoke(self, prompt):
+        return await self.client.ainvoke(self.model, self.node, prompt)
+
+
+class LLMClient:
+    def __init__(
+        self,
+        deadline: float = LLM_DEADLINE_SECONDS,
+        attempt_timeout: float = LLM_ATTEMPT_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        hedge_after: float = LLM_HEDGE_AFTER_SECONDS,
+        hedge_nodes: Optional[set[str]] = None,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+        self.hedge_nodes = LLM_HEDGE_NODES if hedge_nodes is None else hedge_nodes
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN_SECONDS)
+        self.in_flight = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.stats = {
+            "calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "timeouts": 0,
+            "hedges": 0, "hedge_wins": 0, "short_circuited": 0, "saturated": 0, "fallbacks": 0,
+        }
+
+    def bind(self, model, node: str) -> _BoundCall:
+        return _BoundCall(self, model, node)
+
+    def _slots(self) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop; scripts may run several in turn.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _race(self, model, node: str, prompt, timeout: float):
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + timeout
+        first = asyncio.create_task(model.ainvoke(prompt))
+        pending = {first}
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                wait_for = give_up - loop.time()
+                if not hedged and node in self.hedge_nodes and self.hedge_after > 0:
+                    wait_for = min(wait_for, self.hedge_after)
+                if wait_for <= 0:
+                    raise asyncio.TimeoutError()
+                done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+                if not done and not hedged and node in self.hedge_nodes and self.hedge_after > 0:
+                    hedged = True
+                    self.stats["hedges"] += 1
+                    pending.add(asyncio.create_task(model.ainvoke(prompt)))
+                elif not done:
+                    raise asyncio.TimeoutError()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _attempt(self, model, node: str, prompt, deadline: float):
+        loop = asyncio.get_running_loop()
+        slots = self._slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.stats["saturated"] += 1
+            raise LLMUnavailable("too many model calls in flight")
+        self.in_flight += 1
+        try:
+            timeout = min(self.attempt_timeout, deadline - loop.time())
+            return await self._race(model, node, prompt, timeout)
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    async def ainvoke(self, model, node: str, prompt):
+        self.stats["calls"] += 1
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            raise LLMUnavailable("model circuit is open")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                result = await self._attempt(model, node, prompt, deadline)
+            except LLMUnavailable:
+                self.breaker.release()
+                self.stats["failed"] += 1
+                raise
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats["timeouts"] += 1
+                transient = isinstance(e, asyncio.TimeoutError) or is_transient(e)
+                attempt += 1
+                delay = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+                if transient and attempt <= self.max_retries and loop.time() + delay < deadline:
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(delay)
+                    continue
+                if transient:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release()
+                self.stats["failed"] += 1
+                raise LLMUnavailable(f"model call failed after {attempt} attempt(s): {e!r}") from e
+            self.breaker.record_success()
+            self.stats["succeeded"] += 1
+            return result
+
+    def record_fallback(self) -> None:
+        self.stats["fallbacks"] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "in_flight": self.in_flight,
+        }
+
+
+llm_client = LLMClient()
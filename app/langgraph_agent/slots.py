@@ -0,0 +1,62 @@
+"""Typed extractors for the slots a follow-up message usually fills.
+
+fill_pending_slots_node tries these first and only asks the model, with a short
+targeted prompt, for slots no extractor can read (such as a free-text query). Write
+intents (update_profile) skip the extractors and always use the prompt.
+"""
+import re
+from typing import Optional
+
+from app.langgraph_agent.fast_intent import extract_email, extract_order_id
+
+_NUM = r"\$?\s*(\d[\d,]*(?:\.\d+)?)\s*(k\b)?"
+BETWEEN_RE = re.compile(rf"\b(?:between|from)\s+{_NUM}\s*(?:and|to|-)\s*{_NUM}", re.IGNORECASE)
+# A bare "13-14" is as likely a model number as a price, so this form needs a currency marker.
+RANGE_RE = re.compile(
+    rf"(?<![\w-]){_NUM}\s*(?:-|to)\s*{_NUM}(?![\w-])(\s*(?:dollars|bucks|usd)\b)?", re.IGNORECASE
+)
+UPPER_RE = re.compile(
+    rf"\b(?:under|below|less than|cheaper than|up to|at most|max(?:imum)?|no more than|within)\s+{_NUM}",
+    re.IGNORECASE,
+)
+LOWER_RE = re.compile(rf"\b(?:over|above|more than|at least|min(?:imum)?|starting at)\s+{_NUM}", re.IGNORECASE)
+
+
+def _amount(number: str, thousands: Optional[str]) -> float:
+    value = float(number.replace(",", ""))
+    return value * 1000 if thousands else value
+
+
+def extract_price_range(message: str) -> Optional[list]:
+    """Returns [min, max] with None for an open side, as the extraction prompt does."""
+    match = BETWEEN_RE.search(message)
+    if match:
+        low, high = _amount(*match.group(1, 2)), _amount(*match.group(3, 4))
+        return [min(low, high), max(low, high)]
+    for match in RANGE_RE.finditer(message):
+        if "$" in match.group(0) or match.group(2) or match.group(4) or match.group(5):
+            low, high = _amount(*match.group(1, 2)), _amount(*match.group(3, 4))
+            return [min(low, high), max(low, high)]
+    upper = UPPER_RE.search(message)
+    lower = LOWER_RE.search(message)
+    if upper or lower:
+        return [_amount(*lower.group(1, 2)) if lower else None, _amount(*upper.group(1, 2)) if upper else None]
+    return None
+
+
+SLOT_EXTRACTORS = {
+    "order_id": extract_order_id,
+    "email": extract_email,
+    "price_filter": extract_price_range,
+}
+
+
+def extract(slots: list[str], message: str) -> dict:
+    """Returns the slots a typed extractor could read from the message."""
+    filled = {}
+    for slot in slots:
+        extractor = SLOT_EXTRACTORS.get(slot)
+        value = extractor(message) if extractor else None
+        if value:
+            filled[slot] = value
+    return filled
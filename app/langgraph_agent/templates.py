@@ -0,0 +1,104 @@
+"""Local reply templates for intents whose answer is fully determined by the DB result.
+
+Templates live in response_templates.json (override with RESPONSE_TEMPLATES_PATH) and
+use str.format syntax against the attributes of the Order, Users or Product result.
+They are parsed once at import; rendering only does field lookups and formatting.
+"""
+import json
+import os
+from string import Formatter
+from typing import Any, Optional
+
+RESPONSE_TEMPLATES_ENABLED = os.getenv("RESPONSE_TEMPLATES_ENABLED", "true").lower() == "true"
+RESPONSE_TEMPLATES_PATH = os.getenv(
+    "RESPONSE_TEMPLATES_PATH",
+    os.path.join(os.path.dirname(__file__), "response_templates.json"),
+)
+
+# Intents that still go to the LLM when they have something to say beyond a template.
+LLM_INTENTS = {"chatting", "search_products"}
+
+_formatter = Formatter()
+
+
+class CompiledTemplate:
+    def __init__(self, source: str):
+        self.source = source
+        self.parts = [
+            (literal, field, spec or "", conversion)
+            for literal, field, spec, conversion in _formatter.parse(source)
+        ]
+
+    def render(self, obj: Any) -> str:
+        out = []
+        for literal, field, spec, conversion in self.parts:
+            out.append(literal)
+            if field is None:
+                continue
+            value = _lookup(obj, field)
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            if value is None:
+                out.append("n/a")
+                continue
+            try:
+                out.append(format(value, spec))
+            except (TypeError, ValueError):
+                out.append(str(value))
+        return "".join(out)
+
+
+def _lookup(obj: Any, field: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(field)
+    return getattr(obj, field, None)
+
+
+def load_templates(path: str = RESPONSE_TEMPLATES_PATH) -> dict[str, dict[str, CompiledTemplate]]:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return {
+        intent: {name: CompiledTemplate(source) for name, source in parts.items()}
+        for intent, parts in raw.items()
+    }
+
+
+TEMPLATES = load_templates()
+
+
+def _render_list(parts: dict[str, CompiledTemplate], rows: list) -> Optional[str]:
+    if not rows:
+        return parts["empty"].render({}) if "empty" in parts else None
+    if "item" not in parts:
+        return None
+    lines = [parts["item"].render(row) for row in rows]
+    if "header" in parts:
+        lines.insert(0, parts["header"].render({}))
+    return "\n".join(lines)
+
+
+def render(intent: Optional[str], execution_response: Any, force: bool = False) -> Optional[str]:
+    """Renders a reply locally, or returns None when the LLM should phrase it.
+
+    force renders LLM intents too, for callers that cannot reach the model.
+    """
+    if not RESPONSE_TEMPLATES_ENABLED or intent is None:
+        return None
+    parts = TEMPLATES.get(intent)
+
+    if isinstance(execution_response, dict) and "error" in execution_response:
+        if parts and "empty" in parts and execution_response.get("status_code") == 404:
+            return parts["empty"].render({})
+        return TEMPLATES["error"]["single"].render(execution_response)
+
+    if parts is None:
+        return None
+    if isinstance(execution_response, (list, tuple)):
+        if intent in LLM_INTENTS and execution_response and not force:
+            return None
+        return _render_list(parts, list(execution_response))
+    if intent in LLM_INTENTS and not force:
+        return None
+    if "single" in parts and execution_response is not None:
+        return parts["single"].render(execution_response)
+    return None
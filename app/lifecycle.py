@@ -0,0 +1,173 @@
+"""Process lifecycle: warm-up, readiness, in-flight chat tracking and graceful draining.
+
+A worker is "starting" until the lifespan has compiled the graph, filled the DB pool
+and (optionally) made a first model call. Without that call the model's SDK is
+imported in the background after the worker turns ready. The worker then stays
+"ready" until SIGTERM.
+
+uvicorn stops accepting connections as soon as it handles SIGTERM, so a readiness
+probe sent after that never gets an answer. The hook installed by
+install_shutdown_hook() therefore moves the worker to "stopping" first: /health/ready
+answers 503 while chats are still served. uvicorn gets the signal
+SHUTDOWN_GRACE_SECONDS later, which leaves a load balancer time to see the 503 and
+route elsewhere. Once uvicorn has closed its connections, the lifespan is "draining".
+New chat turns are refused with 503 and Retry-After. Shutdown waits up to
+DRAIN_TIMEOUT_SECONDS for running turns, including streamed ones whose client went
+away, before closing pools and clients.
+"""
+import asyncio
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DRAIN_TIMEOUT_SECONDS = float(os.getenv("DRAIN_TIMEOUT_SECONDS", "30"))
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", "2"))
+LLM_WARMUP_ENABLED = os.getenv("LLM_WARMUP_ENABLED", "false").lower() == "true"
+READY_CHECK_TIMEOUT_SECONDS = float(os.getenv("READY_CHECK_TIMEOUT_SECONDS", "2"))
+# python -m app.server defaults this to 5; a reloading dev server should exit at once.
+SHUTDOWN_GRACE_SECONDS = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "0"))
+
+
+class DrainingError(Exception):
+    pass
+
+
+class Lifecycle:
+    STARTING, READY, STOPPING, DRAINING, STOPPED = "starting", "ready", "stopping", "draining", "stopped"
+
+    def __init__(self):
+        self.phase = self.STARTING
+        self.started_at = time.time()
+        self.in_flight = 0
+        self.checks: dict[str, str] = {}
+        self._idle: Optional[asyncio.Event] = None
+        self.stats = {"turns": 0, "refused_draining": 0, "abandoned_on_shutdown": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == self.READY
+
+    @property
+    def draining(self) -> bool:
+        return self.phase in (self.DRAINING, self.STOPPED)
+
+    def begin(self) -> None:
+        """Counts a chat turn as in flight until end() is called."""
+        if self.draining:
+            self.stats["refused_draining"] += 1
+            raise DrainingError("This worker is shutting down")
+        self.in_flight += 1
+        self.stats["turns"] += 1
+
+    def end(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0 and self._idle is not None:
+            self._idle.set()
+
+    @asynccontextmanager
+    async def track(self):
+        self.begin()
+        try:
+            yield
+        finally:
+            self.end()
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> int:
+        """Stops admitting turns and waits for running ones; returns how many were abandoned."""
+        self.phase = self.DRAINING
+        if self.in_flight:
+            logger.info("draining %d in-flight chat turn(s)", self.in_flight)
+            self._idle = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("drain timed out with %d chat turn(s) still running", self.in_flight)
+                self.stats["abandoned_on_shutdown"] += self.in_flight
+        return self.in_flight
+
+
+lifecycle = Lifecycle()
+
+
+def install_shutdown_hook(grace: float = SHUTDOWN_GRACE_SECONDS) -> None:
+    """Wraps the SIGTERM handler uvicorn installed, so readiness fails before uvicorn
+    stops accepting connections. Call it from the lifespan, after uvicorn's handlers exist."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+    loop = asyncio.get_running_loop()
+
+    def on_sigterm(sig, frame):
+        first = lifecycle.phase == lifecycle.READY
+        if first:
+            lifecycle.phase = lifecycle.STOPPING
+        if first and grace > 0:
+            logger.info("SIGTERM: reporting unready for %.1fs before shutting down", grace)
+            loop.call_soon_threadsafe(loop.call_later, grace, previous, sig, frame)
+        else:
+            # A second SIGTERM, or no grace period: shut down now.
+            previous(sig, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+async def _ping(engine) -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def warm_db_pool(engine, connections: int = DB_WARM_CONNECTIONS) -> None:
+    """Opens pool connections up front so the first requests do not pay for the handshakes."""
+    try:
+        await asyncio.gather(*(_ping(engine) for _ in range(max(1, connections))))
+        lifecycle.checks["database"] = "ok"
+    except Exception as e:
+        # Stay alive but unready; /health/ready keeps probing.
+        logger.warning("database warm-up failed: %s", e)
+        lifecycle.checks["database"] = f"error: {e}"
+
+
+async def warm_up_model(client, model) -> None:
+    if not LLM_WARMUP_ENABLED:
+        lifecycle.checks["model"] = "skipped"
+        return
+    try:
+        await client.ainvoke(model, "warmup", "Reply with the single word OK.")
+        lifecycle.checks["model"] = "ok"
+    except Exception as e:
+        # The model has local fallbacks, so a failed warm-up does not block readiness.
+        logger.warning("model warm-up failed: %s", e)
+        lifecycle.checks["model"] = f"error: {e}"
+
+
+async def preload_model(model) -> None:
+    """Builds a LazyModel in a thread once the worker serves, so neither readiness nor the
+    first chat turn waits for the provider SDK import."""
+    if getattr(model, "loaded", True):
+        return
+    try:
+        await asyncio.to_thread(model.get)
+    except Exception as e:
+        # Turns retry the build and fall back locally while it keeps failing.
+        logger.warning("model preload failed: %s", e)
+        lifecycle.checks["model"] = f"error: {e}"
+
+
+async def check_database(engine, timeout: float = READY_CHECK_TIMEOUT_SECONDS) -> bool:
+    try:
+        await asyncio.wait_for(_ping(engine), timeout)
+        lifecycle.checks["database"] = "ok"
+        return True
+    except Exception as e:
+        lifecycle.checks["database"] = f"error: {e!r}"
+        return False
@@ -1,9 +1,65 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.observability import TRACE_IDS_ENABLED, TraceIdMiddleware, configure_logging
 from app.api.messages import router as messages_router
 from app.api.chatbot_sessions import router as sessions_router
 from app.api.auth import router as auth_router
+from app.api.metrics import router as metrics_router
+from app.api.health import router as health_router
+from app.api.products import router as products_router
+from app.langgraph_agent import graph
+from app.langgraph_agent.resilience import llm_client
+from app.db.conversation_writer import conversation_writer
+from app.db.invalidation import CACHE_INVALIDATION_POLL_SECONDS, poll_invalidations_periodically
+from app.db.engine import async_engine, engine
+from app.lifecycle import install_shutdown_hook, lifecycle, preload_model, warm_db_pool, warm_up_model
+from app.sessions.concurrency import user_runs
+from app.sessions.store import get_session_store
+from app.db.catalog_index import CATALOG_INDEX_ENABLED, refresh_catalog_periodically
+from app.core.config import VECTOR_INDEX_ENABLED
 
-app = FastAPI()
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the agent graph and open pool connections before the first request instead of on it.
+    graph.warm_up_graph()
+    await warm_db_pool(async_engine)
+    await warm_up_model(llm_client, graph.model)
+    # With several workers, turns of one user are serialised through the shared store.
+    user_runs.remote_lock = get_session_store().user_lock()
+    await conversation_writer.start()
+    invalidation_poll = (
+        asyncio.create_task(poll_invalidations_periodically()) if CACHE_INVALIDATION_POLL_SECONDS > 0 else None
+    )
+    catalog_refresh = asyncio.create_task(refresh_catalog_periodically()) if CATALOG_INDEX_ENABLED else None
+    vector_sync = None
+    if VECTOR_INDEX_ENABLED:
+        # NumPy and the index are only imported when the index is on.
+        from app.db.vector_index import sync_vectors_periodically
+        vector_sync = asyncio.create_task(sync_vectors_periodically())
+    lifecycle.phase = lifecycle.READY
+    install_shutdown_hook()
+    model_preload = asyncio.create_task(preload_model(graph.model))
+    yield
+    await lifecycle.drain()
+    for task in (model_preload, invalidation_poll, catalog_refresh, vector_sync):
+        if task is not None:
+            task.cancel()
+    await conversation_writer.stop()
+    get_session_store().close()
+    await async_engine.dispose()
+    engine.dispose()
+    lifecycle.phase = lifecycle.STOPPED
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(messages_router)
 app.include_router(sessions_router)
-app.include_router(auth_router)  
\ No newline at end of file
+app.include_router(auth_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
+app.include_router(products_router)
+
+if TRACE_IDS_ENABLED:
+    app.add_middleware(TraceIdMiddleware)
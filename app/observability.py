@@ -0,0 +1,206 @@
+"""Logging, metrics and trace IDs.
+
+Logging goes through the standard logging module. LOG_LEVEL sets the level and
+LOG_SAMPLE_RATE keeps only that fraction of DEBUG/INFO records; warnings and errors
+are always kept. Debug messages use %-style arguments, so a full graph state is only
+formatted when its record is actually emitted.
+
+Metrics live in a small in-process registry rendered in the Prometheus text format by
+GET /metrics. Histograms and counters are updated on the hot path. Collectors are
+callbacks that read existing stats dicts only when /metrics is scraped.
+
+When TRACE_IDS_ENABLED is set, TraceIdMiddleware gives each request a trace ID. The ID
+comes from the X-Request-ID header or is freshly generated. It is returned as
+X-Trace-ID and added to every log line written while the request runs.
+"""
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+from uuid import uuid4
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+TRACE_IDS_ENABLED = os.getenv("TRACE_IDS_ENABLED", "false").lower() == "true"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+trace_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="-")
+
+
+class _SamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+
+def configure_logging(level: str = LOG_LEVEL, sample_rate: float = LOG_SAMPLE_RATE) -> None:
+    handler = logging.StreamHandler()
+    handler.addFilter(_SamplingFilter(sample_rate))
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s"))
+    root = logging.getLogger("app")
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    root.propagate = False
+
+
+def _labels(names: tuple[str, ...], values: dict) -> tuple:
+    return tuple(str(values.get(name, "")) for name in names)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _labels(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help, labelnames, tuple(buckets)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(self.labelnames, labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Collector:
+    """A metric read on scrape: fn returns (labels, value) pairs."""
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], Iterable[tuple[dict, float]]]):
+        self.name, self.help, self.kind, self.fn = name, help, kind, fn
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.fn():
+            lines.append(f"{self.name}{_format_labels(labels.keys(), labels.values())} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logging.getLogger(__name__).exception("metric %s failed to render", metric.name)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+NODE_SECONDS = registry.register(Histogram("agent_node_seconds", "Time spent in each graph node.", ("node",)))
+LLM_CALL_SECONDS = registry.register(Histogram("llm_call_seconds", "Model call latency by graph node, cache hits included.", ("node",)))
+DB_QUERIES = registry.register(Counter("db_queries_total", "Statements executed per engine.", ("engine",)))
+DB_QUERY_SECONDS = registry.register(Histogram(
+    "db_query_seconds", "Statement execution time per engine.", ("engine",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+))
+
+
+def instrument_engine(engine, label: str) -> None:
+    """Counts and times every statement run on a sync engine (or an async engine's sync_engine)."""
+    from sqlalchemy import event
+
+    # The start time lives on the statement's execution context, which is dropped with it.
+    # after_cursor_execute does not fire when a statement fails, so anything kept per
+    # connection would pile up.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is not None:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, engine=label)
+        DB_QUERIES.inc(engine=label)
+
+
+class TraceIdMiddleware:
+    """Plain ASGI middleware, so it adds no per-request task or body buffering."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace_id = _request_id(scope) or uuid4().hex
+        token = trace_id_var.set(trace_id)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", trace_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            trace_id_var.reset(token)
+
+
+def _request_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-request-id":
+            return value.decode("latin-1")[:64]
+    return None
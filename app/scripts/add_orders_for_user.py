@@ -2,8 +2,9 @@ from uuid import uuid4, UUID
 from datetime import datetime, timezone
 
 from sqlmodel import Session, select
-from app.db.init_db import engine
+from app.db.engine import engine
 from app.core.models import Order, Product
+from app.db.invalidation import ORDERS, publish
 
 USER_ID = UUID("7bc56007-ada0-4ca1-a640-a1fbddc16f48")
 
@@ -28,6 +29,7 @@ def main():
             session.add(order)
 
         session.commit()
+        publish(ORDERS, USER_ID)
         print("✅ Inserted 5 orders for user", USER_ID)
 
 if __name__ == "__main__":
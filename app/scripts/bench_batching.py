@@ -0,0 +1,97 @@
+"""Batch size vs. latency of micro-batched intent extraction against the fake model.
+
+Run with: python -m app.scripts.bench_batching [--users N] [--requests N] [--latency-ms MS]
+          [--item-ms MS] [--provider-concurrency N] [--windows 2,5,10,20] [--sizes 4,8,16,32]
+
+Closed loop: each simulated user sends extraction prompts (the real SYSTEM_PROMPT plus a
+distinct message) one after another through llm_client, first straight to the model
+and then through MicroBatcher for every window/size pair. The fake model costs
+--latency-ms per request plus --item-ms per extra prompt in a batch. At most
+--provider-concurrency requests are served at once, standing in for a rate limit.
+Reports throughput, p50/p95/p99 latency, provider requests and mean batch size.
+"""
+import argparse
+import asyncio
+import time
+
+from app.langgraph_agent.batching import MicroBatcher
+from app.langgraph_agent.prompts import SYSTEM_PROMPT
+from app.langgraph_agent.providers import ScriptedChatModel
+from app.langgraph_agent.resilience import LLMClient, LLMUnavailable
+
+MESSAGES = [
+    "I need a new laptop for work, order {i}",
+    "do you have any phones? ref {i}",
+    "I'm looking for a warm sweater #{i}",
+    "show my orders please ({i})",
+]
+NODE = "extract_intent_and_parameters"
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _run(label: str, model: ScriptedChatModel, target, users: int, requests: int) -> None:
+    client = LLMClient(max_concurrency=users, hedge_after=0)
+    latencies: list[float] = []
+    failures = 0
+    counter = iter(range(requests))
+    model.requests = 0
+
+    async def user() -> None:
+        nonlocal failures
+        for i in counter:
+            prompt = f"{SYSTEM_PROMPT}\n\nUser: {MESSAGES[i % len(MESSAGES)].format(i=i)}\n"
+            start = time.perf_counter()
+            try:
+                await client.ainvoke(target, NODE, prompt)
+            except LLMUnavailable:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    batch = target.snapshot()["mean_batch_size"] if isinstance(target, MicroBatcher) else 1.0
+    print(
+        f"{label:<22} {len(latencies) / elapsed:8.1f} req/s  p50 {_percentile(latencies, 0.5) * 1000:7.1f}  "
+        f"p95 {_percentile(latencies, 0.95) * 1000:7.1f}  p99 {_percentile(latencies, 0.99) * 1000:7.1f} ms  "
+        f"provider requests {model.requests:6}  mean batch {batch:5.1f}  failed {failures}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--item-ms", type=float, default=10)
+    parser.add_argument("--provider-concurrency", type=int, default=16)
+    parser.add_argument("--windows", default="2,5,10,20", help="batch windows in ms")
+    parser.add_argument("--sizes", default="4,8,16,32", help="maximum batch sizes")
+    args = parser.parse_args()
+
+    model = ScriptedChatModel(
+        latency=args.latency_ms / 1000,
+        jitter=args.latency_ms / 20000,
+        batch_item_latency=args.item_ms / 1000,
+        max_concurrency=args.provider_concurrency,
+    )
+    print(
+        f"{args.users} users, {args.requests} requests, {args.latency_ms:.0f} ms per request "
+        f"+ {args.item_ms:.0f} ms per extra prompt, provider concurrency {args.provider_concurrency}"
+    )
+    await _run("unbatched", model, model, args.users, args.requests)
+    for window in (float(w) for w in args.windows.split(",")):
+        for size in (int(s) for s in args.sizes.split(",")):
+            batcher = MicroBatcher(model, window=window / 1000, max_size=size, max_queue=args.users * 2, enabled=True)
+            await _run(f"window {window:g}ms size {size}", model, batcher, args.users, args.requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""Load test: blocking Session(engine) queries vs. the async session inside coroutines.
+
+Run with: python -m app.scripts.bench_db_concurrency [concurrency] [requests]
+
+Uses DATABASE_URL when set, otherwise a local SQLite file as a Postgres stand-in.
+Each simulated chat turn runs get_my_orders plus a short awaited "LLM" pause, which is
+where the async layer pays off: blocking queries stall every other turn on the loop.
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_db.sqlite3")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlmodel import SQLModel, Session, select
+
+from app.core.models import Order, Product, Users
+from app.db.functions import aget_my_orders
+from app.db.engine import engine
+
+SIMULATED_LLM_SECONDS = 0.02
+SEED_ORDERS = 20000
+
+
+def _seed() -> list:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user_ids = session.exec(select(Users.user_id)).all()
+        if user_ids:
+            return list(user_ids)
+        users = [Users(name=f"bench {i}", email=f"bench{i}@example.com", hashed_password="x") for i in range(50)]
+        product = Product(name="Bench product", price=10.0, specs="bench", type="mobile")
+        session.add_all(users + [product])
+        session.commit()
+        session.add_all([
+            Order(
+                order_id=uuid4(),
+                user_id=random.choice(users).user_id,
+                product_id=product.product_id,
+                quantity=1,
+                status="pending",
+            )
+            for _ in range(SEED_ORDERS)
+        ])
+        session.commit()
+        return [u.user_id for u in users]
+
+
+async def _blocking_turn(user_id) -> None:
+    with Session(engine) as session:
+        session.exec(select(Order).where(Order.user_id == user_id)).all()
+    await asyncio.sleep(SIMULATED_LLM_SECONDS)
+
+
+async def _async_turn(user_id) -> None:
+    await aget_my_orders(str(user_id))
+    await asyncio.sleep(SIMULATED_LLM_SECONDS)
+
+
+async def _run(turn, user_ids: list, concurrency: int, total: int) -> tuple[float, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    max_lag = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal max_lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+
+    async def one():
+        async with semaphore:
+            await turn(random.choice(user_ids))
+
+    ticker = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker
+    return elapsed, max_lag
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    user_ids = _seed()
+
+    for label, turn in (("blocking Session", _blocking_turn), ("async session", _async_turn)):
+        elapsed, max_lag = asyncio.run(_run(turn, user_ids, concurrency, total))
+        print(
+            f"{label:17} {total} turns @ {concurrency} concurrent: "
+            f"{total / elapsed:8.1f} turns/s, max event-loop lag {max_lag * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Measures fast-path hit rate and classification latency over a sample message mix.
+
+Run with: python -m app.scripts.bench_fast_intent [repeats]
+"""
+import sys
+import time
+
+from app.langgraph_agent import fast_intent
+
+SAMPLE_MESSAGES = [
+    "show my orders",
+    "what are all of my orders?",
+    "d0ba6eb9-167d-44bf-bbb5-ec3f7adb56f6",
+    "where is order d0ba6eb9-167d-44bf-bbb5-ec3f7adb56f6",
+    "can you update my email to zein_zein@example.com",
+    "hello",
+    "thanks!",
+    "do you have any phones that are for under 800 bucks?",
+    "can you tell me what's the status of my order",
+    "I'm looking for a warm sweater",
+]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for message in SAMPLE_MESSAGES:
+        result = fast_intent.classify(message)
+        label = f"{result['intent']} {result['parameters']}" if result else "-> LLM"
+        print(f"{message!r:60} {label}")
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for message in SAMPLE_MESSAGES:
+            fast_intent.classify(message)
+    elapsed = time.perf_counter() - start
+
+    stats = fast_intent.fast_intent_stats()
+    print(f"\nclassified {stats['calls']} messages in {elapsed:.2f}s")
+    print(f"hit rate:        {stats['hit_rate']:.1%}")
+    print(f"avg latency:     {stats['avg_latency_us']:.1f} us")
+    print(f"LLM calls saved: {stats['llm_calls_saved']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Micro-benchmark: per-request graph compilation vs. the cached compiled graph.
+
+Run with: python -m app.scripts.bench_graph_compile [iterations]
+
+The model is replaced with an instant stub so only graph overhead is measured.
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_API_KEY", "bench-key")
+
+from langchain_core.messages import AIMessage
+
+from app.langgraph_agent import graph as agent_graph
+
+
+class _InstantModel:
+    async def ainvoke(self, prompt):
+        return AIMessage(content='{"intent": "chatting", "parameters": {}}')
+
+
+def _initial_state() -> dict:
+    return {
+        "user_id": "bench-user",
+        "latest_user_message": "hello",
+        "intent": None,
+        "parameters": {},
+        "missing_params": [],
+        "LLM_response": None,
+    }
+
+
+async def _per_call(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await agent_graph.build_graph().ainvoke(_initial_state())
+    return time.perf_counter() - start
+
+
+async def _cached(iterations: int) -> float:
+    agent_graph.warm_up_graph()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await agent_graph.get_graph().ainvoke(_initial_state())
+    return time.perf_counter() - start
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    agent_graph.model = agent_graph.batcher.model = _InstantModel()
+    agent_graph.llm_cache.enabled = False
+
+    compile_start = time.perf_counter()
+    for _ in range(iterations):
+        agent_graph.build_graph()
+    compile_only = time.perf_counter() - compile_start
+
+    per_call = asyncio.run(_per_call(iterations))
+    cached = asyncio.run(_cached(iterations))
+
+    print(f"iterations:                 {iterations}")
+    print(f"build_graph() alone:        {compile_only / iterations * 1000:.3f} ms/call")
+    print(f"compile + invoke per call:  {per_call / iterations * 1000:.3f} ms/request")
+    print(f"cached graph + invoke:      {cached / iterations * 1000:.3f} ms/request")
+    print(f"overhead saved per request: {(per_call - cached) / iterations * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
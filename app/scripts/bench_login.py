@@ -0,0 +1,71 @@
+"""Login throughput at different password-hashing pool sizes.
+
+Run with: python -m app.scripts.bench_login [logins] [rounds]
+
+Fires a burst of concurrent bcrypt verifications through averify_password, the same
+path /api/auth/token uses, and reports completed logins per second, how many were
+rejected by the queue-depth limit, and the worst event-loop stall seen meanwhile.
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from app.security import (
+    PasswordHasherBusy,
+    averify_password,
+    configure_password_pool,
+    hash_password,
+)
+
+POOL_SIZES = [1, 2, 4, 8]
+MAX_PENDING = 64
+
+
+async def _burst(hashed: str, logins: int) -> tuple[int, int, float, float]:
+    max_lag = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal max_lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+
+    async def login():
+        try:
+            return await averify_password("correct horse", hashed)
+        except PasswordHasherBusy:
+            return None
+
+    ticker = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker
+    ok = sum(1 for r in results if r)
+    rejected = sum(1 for r in results if r is None)
+    return ok, rejected, elapsed, max_lag
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    hashed = hash_password("correct horse", rounds=rounds)
+    print(f"{logins} concurrent logins, bcrypt cost {rounds}, queue limit {MAX_PENDING}")
+
+    for workers in POOL_SIZES:
+        configure_password_pool(workers=workers, max_pending=MAX_PENDING)
+        ok, rejected, elapsed, max_lag = asyncio.run(_burst(hashed, logins))
+        print(
+            f"pool={workers}: {ok / elapsed:7.1f} logins/s, {rejected} rejected, "
+            f"max event-loop lag {max_lag * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
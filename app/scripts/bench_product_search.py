@@ -0,0 +1,141 @@
+"""Product search over a synthetic catalog: unindexed scan vs. indexed keyset query vs. catalog
+index vs. vector index.
+
+Run with: python -m app.scripts.bench_product_search [products] [queries]
+
+Uses DATABASE_URL when set, otherwise a local SQLite file. The synthetic catalog is
+generated once and reused on later runs.
+"""
+import os
+import random
+import sys
+import time
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_catalog.sqlite3")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("VECTOR_INDEX_PATH", "bench_vectors")
+
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, func, select
+
+from app.core.models import Product, VALID_PRODUCT_TYPES
+from app.db.catalog_index import catalog_index, tokenize
+from app.db.engine import engine
+from app.db.functions import search_products
+from app.db.init_db import create_indexes
+from app.db.vector_index import vector_index
+
+BRANDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Soylent"]
+NOUNS = {
+    "mobile": ["phone", "smartphone", "flip phone"],
+    "laptop": ["notebook", "ultrabook", "gaming laptop"],
+    "clothing": ["sweater", "jeans", "t-shirt", "jacket"],
+    "home_appliance": ["microwave", "refrigerator", "air conditioner", "toaster"],
+}
+
+
+def _seed(products: int) -> None:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        existing = session.exec(select(func.count()).select_from(Product)).one()
+    if existing >= products:
+        return
+    rows = []
+    for i in range(existing, products):
+        product_type = random.choice(VALID_PRODUCT_TYPES)
+        rows.append({
+            "product_id": uuid4(),
+            "name": f"{random.choice(BRANDS)} {random.choice(NOUNS[product_type])} {i}",
+            "price": round(random.uniform(5, 3000), 2),
+            "specs": f"model {i % 97}, {random.choice(['black', 'white', 'blue', 'red'])}",
+            "in_stock": random.random() > 0.1,
+            "type": product_type,
+        })
+        if len(rows) == 10000:
+            with engine.begin() as conn:
+                conn.execute(insert(Product), rows)
+            rows = []
+    if rows:
+        with engine.begin() as conn:
+            conn.execute(insert(Product), rows)
+
+
+def _queries(count: int) -> list[dict]:
+    queries = []
+    for _ in range(count):
+        product_type = random.choice(VALID_PRODUCT_TYPES)
+        low = random.uniform(5, 2500)
+        queries.append({
+            "product_type": product_type,
+            "price_filter": (low, low + random.uniform(20, 400)),
+            "query": random.choice([None, random.choice(NOUNS[product_type]), random.choice(BRANDS)]),
+        })
+    return queries
+
+
+def _unbounded_scan(q: dict) -> list:
+    # The original search_products: type + price filter, no query, no limit.
+    with Session(engine) as session:
+        stmt = select(Product).where(
+            Product.type == q["product_type"],
+            Product.price >= q["price_filter"][0],
+            Product.price <= q["price_filter"][1],
+        )
+        return session.exec(stmt).all()
+
+
+def _time(label: str, fn, queries: list[dict]) -> None:
+    start = time.perf_counter()
+    rows = 0
+    for q in queries:
+        rows += len(fn(q))
+    elapsed = time.perf_counter() - start
+    print(f"{label:38} {elapsed / len(queries) * 1000:8.3f} ms/query, {rows / len(queries):8.1f} rows/query")
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    _seed(products)
+    queries = _queries(query_count)
+
+    with engine.begin() as conn:
+        for index in Product.__table__.indexes:
+            index.drop(conn, checkfirst=True)
+    _time("before: no indexes, no limit", _unbounded_scan, queries)
+    _time("no indexes, capped + query", lambda q: search_products(**q), queries)
+
+    create_indexes()
+    _time("indexed, keyset + cap + query", lambda q: search_products(**q), queries)
+
+    start = time.perf_counter()
+    catalog_index.refresh()
+    print(f"catalog index load: {len(catalog_index)} products in {time.perf_counter() - start:.2f}s")
+    _time(
+        "in-process catalog index",
+        lambda q: catalog_index.search(q["product_type"], q["price_filter"], tokenize(q["query"])),
+        queries,
+    )
+
+    start = time.perf_counter()
+    vector_index.sync()
+    print(
+        f"vector index sync: {vector_index.stats['embedded']} embedded, "
+        f"{len(vector_index)} products in {time.perf_counter() - start:.2f}s"
+    )
+    text_queries = [q for q in queries if q["query"]]
+    _time(
+        "vector index, ranked (query only)",
+        lambda q: vector_index.search(q["query"], q["product_type"], q["price_filter"]),
+        text_queries,
+    )
+    _time(
+        "vector index, no type/price filter",
+        lambda q: vector_index.search(q["query"]),
+        text_queries,
+    )
+
+
+if __name__ == "__main__":
+    main()
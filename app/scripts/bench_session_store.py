@@ -0,0 +1,81 @@
+"""Memory and latency benchmark for each SessionStore backend.
+
+Run with: python -m app.scripts.bench_session_store [sessions]
+
+The SQL backend uses a temporary SQLite file unless SESSION_DB_URL is set. The Redis
+backend talks to REDIS_URL when it is set, otherwise to the in-process stand-in from
+tests/local_redis.py (run from the repository root).
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_API_KEY", "bench-key")
+
+from app.sessions.store import InMemorySessionStore, RedisSessionStore, SQLSessionStore
+from tests.local_redis import LocalRedis
+
+
+def _state(user_id: str) -> dict:
+    return {
+        "user_id": user_id,
+        "latest_user_message": "where is my order?",
+        "intent": "get_order",
+        "parameters": {"order_id": None, "type": None, "price_filter": None},
+        "missing_params": ["order_id"],
+        "LLM_response": "Could you please share your order ID?",
+    }
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(pct) - 1] if len(samples) > 1 else samples[0]
+
+
+def _bench(label: str, store, sessions: int) -> None:
+    user_ids = [str(uuid4()) for _ in range(sessions)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    writes = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        store.set(user_id, _state(user_id))
+        writes.append(time.perf_counter() - start)
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    reads = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        store.get(user_id)
+        reads.append(time.perf_counter() - start)
+
+    print(
+        f"{label:8} {sessions} sessions | "
+        f"set p50 {_percentile(writes, 50) * 1e6:7.1f} us p99 {_percentile(writes, 99) * 1e6:8.1f} us | "
+        f"get p50 {_percentile(reads, 50) * 1e6:7.1f} us p99 {_percentile(reads, 99) * 1e6:8.1f} us | "
+        f"python heap +{memory / 1024:8.1f} KiB | size {store.size()}"
+    )
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    _bench("memory", InMemorySessionStore(max_entries=sessions), sessions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = os.getenv("SESSION_DB_URL") or f"sqlite:///{tmp}/sessions.sqlite3"
+        _bench("sql", SQLSessionStore(url=url), sessions)
+
+    redis_client = None if os.getenv("REDIS_URL") else LocalRedis()
+    _bench("redis", RedisSessionStore(client=redis_client), sessions)
+
+
+if __name__ == "__main__":
+    main()
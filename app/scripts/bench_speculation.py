@@ -0,0 +1,119 @@
+"""Per-intent wall clock of a chat turn with and without speculative prefetching.
+
+Run with: python -m app.scripts.bench_speculation [turns] [llm_ms] [db_ms]
+
+The model is a stub that sleeps llm_ms before answering with canned intent JSON, and
+every DB call made by the graph is delayed by db_ms to stand in for a remote database.
+Messages are chosen so the fast intent path misses and extraction goes to the "LLM".
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_speculation.sqlite3")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_API_KEY", "bench-key")
+
+from langchain_core.messages import AIMessage
+from sqlmodel import SQLModel, Session, select
+
+from app.core.models import Order
+from app.db.init_db import engine, init_db
+from app.db.order_cache import clear_order_cache
+from app.langgraph_agent import graph as agent_graph
+
+SCENARIOS = {
+    "get_my_orders": (
+        "could you pull up everything I have bought from you",
+        '{"intent": "get_my_orders", "parameters": {}}',
+    ),
+    "search_products": (
+        "I need a new laptop for work",
+        '{"intent": "search_products", "parameters": {"query": "laptop", "type": "laptop"}}',
+    ),
+    "chatting": (
+        "how is your day going",
+        '{"intent": "chatting", "parameters": {}}',
+    ),
+    "multi-intent": (
+        "what did I buy, and also do you sell laptops?",
+        '{"intents": [{"intent": "get_my_orders", "parameters": {}}, '
+        '{"intent": "search_products", "parameters": {"query": "laptop", "type": "laptop"}}]}',
+    ),
+}
+
+
+class _SlowModel:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        for message, reply in SCENARIOS.values():
+            if f"User: {message}\n" in prompt:
+                return AIMessage(content=reply)
+        return AIMessage(content="Here is what I found for you.")
+
+
+def _slow(fn, delay: float):
+    async def wrapper(*args, **kwargs):
+        await asyncio.sleep(delay)
+        return await fn(*args, **kwargs)
+    return wrapper
+
+
+def _user_id() -> str:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        order = session.exec(select(Order)).first()
+        if order is None:
+            init_db()
+            order = session.exec(select(Order)).first()
+        return str(order.user_id)
+
+
+async def _time(user_id: str, message: str, turns: int) -> float:
+    graph = agent_graph.get_graph()
+    start = time.perf_counter()
+    for _ in range(turns):
+        clear_order_cache()
+        await graph.ainvoke({
+            "user_id": user_id,
+            "latest_user_message": message,
+            "intent": None,
+            "parameters": {},
+            "missing_params": [],
+            "LLM_response": None,
+        })
+    return (time.perf_counter() - start) / turns
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    llm_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 300
+    db_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 40
+
+    agent_graph.model = agent_graph.batcher.model = _SlowModel(llm_ms / 1000)
+    agent_graph.llm_cache.enabled = False
+    for name in ("aget_order", "aget_my_orders", "asearch_products", "aupdate_profile"):
+        setattr(agent_graph, name, _slow(getattr(agent_graph, name), db_ms / 1000))
+    user_id = _user_id()
+    configured = set(agent_graph.SPECULATIVE_PREFETCH_INTENTS) or {"get_my_orders", "get_order"}
+
+    print(f"{turns} turns per scenario, LLM {llm_ms:.0f} ms, DB {db_ms:.0f} ms per call")
+    print(f"{'intent':18} {'sequential':>12} {'speculative':>12} {'saved':>10}")
+    for label, (message, _) in SCENARIOS.items():
+        agent_graph.SPECULATIVE_PREFETCH_INTENTS.clear()
+        sequential = asyncio.run(_time(user_id, message, turns))
+        agent_graph.SPECULATIVE_PREFETCH_INTENTS.update(configured)
+        speculative = asyncio.run(_time(user_id, message, turns))
+        print(
+            f"{label:18} {sequential * 1000:9.1f} ms {speculative * 1000:9.1f} ms "
+            f"{(sequential - speculative) * 1000:7.1f} ms"
+        )
+    print(f"speculation: {agent_graph.SPECULATION_STATS}")
+
+
+if __name__ == "__main__":
+    main()
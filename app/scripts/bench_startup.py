@@ -0,0 +1,130 @@
+"""Cold-start profile: import time per module and package of the API or another entry point.
+
+Run with: python -m app.scripts.bench_startup [--modules app.main,...] [--runs N] [--top N]
+          [--json report.json] [--baseline report.json] [--max-regression PCT]
+
+Each run imports a module in a fresh interpreter under python -X importtime. The
+benchmark reports the median over runs of four things: the process's wall time, the
+module's cumulative import time, the slowest modules and packages by self time, and
+which optional heavy dependencies were loaded.
+
+--json writes the report so it can be kept as a baseline. --baseline compares a run
+with an earlier report. The exit status is 1 when a module's import time grew by more
+than --max-regression percent.
+
+Defaults: the Gemini provider with a dummy key (its SDK should not load at import), a
+SQLite DATABASE_URL and a throwaway SECRET_KEY, unless the environment sets them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///startup_bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_API_KEY", "bench-key")
+
+# Dependencies the API should only load when a feature or a first request needs them.
+WATCHED = ["faker", "numpy", "passlib", "google.genai", "langchain_google_genai"]
+
+
+def _profile(module: str) -> tuple[float, dict[str, tuple[int, int]]]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, timings
+
+
+def _median(runs: list[dict[str, tuple[int, int]]], name: str, field: int) -> float:
+    return statistics.median(run[name][field] if name in run else 0 for run in runs) / 1000
+
+
+def measure(module: str, runs: int, top: int) -> dict:
+    walls, profiles = [], []
+    for _ in range(runs):
+        wall, timings = _profile(module)
+        walls.append(wall)
+        profiles.append(timings)
+
+    names = set().union(*profiles)
+    modules = {name: _median(profiles, name, 0) for name in names}
+    packages: dict[str, float] = {}
+    for name, ms in modules.items():
+        packages[name.split(".")[0]] = packages.get(name.split(".")[0], 0.0) + ms
+    return {
+        "module": module,
+        "runs": runs,
+        "wall_ms": statistics.median(walls) * 1000,
+        "import_ms": _median(profiles, module, 1),
+        "top_modules": dict(sorted(modules.items(), key=lambda item: -item[1])[:top]),
+        "top_packages": dict(sorted(packages.items(), key=lambda item: -item[1])[:top]),
+        "loaded": {name: name in names for name in WATCHED},
+    }
+
+
+def _print(report: dict, baseline: dict | None) -> None:
+    change = ""
+    if baseline:
+        change = f"  (baseline {baseline['import_ms']:.0f} ms, {_change(report, baseline):+.1f}%)"
+    print(
+        f"{report['module']}: import {report['import_ms']:.0f} ms{change}, "
+        f"process wall {report['wall_ms']:.0f} ms, median of {report['runs']}"
+    )
+    print("  slowest packages (self ms): " + ", ".join(f"{k} {v:.0f}" for k, v in report["top_packages"].items()))
+    print("  slowest modules (self ms):")
+    for name, ms in report["top_modules"].items():
+        print(f"    {ms:8.1f}  {name}")
+    print("  heavy dependencies loaded: " + ", ".join(f"{k}={'yes' if v else 'no'}" for k, v in report["loaded"].items()))
+
+
+def _change(report: dict, baseline: dict) -> float:
+    return (report["import_ms"] / baseline["import_ms"] - 1) * 100 if baseline["import_ms"] else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default="app.main", help="comma-separated modules to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="compare with a report written by --json")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+
+    baselines = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = {report["module"]: report for report in json.load(f)}
+
+    reports, regressed = [], []
+    for module in (m.strip() for m in args.modules.split(",") if m.strip()):
+        report = measure(module, args.runs, args.top)
+        reports.append(report)
+        baseline = baselines.get(module)
+        _print(report, baseline)
+        if baseline and _change(report, baseline) > args.max_regression:
+            regressed.append(module)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    if regressed:
+        raise SystemExit(f"import time regressed by more than {args.max_regression:g}%: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
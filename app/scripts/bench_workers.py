@@ -0,0 +1,103 @@
+"""Throughput of the production server (app.server) as the number of workers grows.
+
+Run with: python -m app.scripts.bench_workers [--workers 1,2,4] [--users N]
+          [--concurrency N] [--requests N] [--port 8765]
+
+For each worker count it starts python -m app.server as a subprocess. It waits until
+/health/live has answered from every worker process, then registers users and sends
+chat messages with the load_test client. Finally it stops the server with SIGTERM, as
+an orchestrator would. Reports req/s and latency per worker count, and speed-up over the
+first count.
+
+Defaults: the fake model (FAKE_LLM_LATENCY_MS=20, so CPU rather than the model is the
+limit), SESSION_BACKEND=sql and the load test's SQLite file. Point DATABASE_URL at
+PostgreSQL for numbers that are not bounded by SQLite's single writer.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SESSION_BACKEND", "sql")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "20")
+os.environ.setdefault("FAKE_LLM_JITTER_MS", "5")
+
+import httpx
+
+from app.scripts.load_test import DEFAULT_SCENARIOS, _chat, _login_all, _prepare_database
+
+
+async def _wait_for_workers(base_url: str, workers: int, timeout: float = 60) -> set[int]:
+    pids: set[int] = set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and len(pids) < workers:
+        try:
+            # A fresh connection each time, so the kernel can hand it to any worker.
+            async with httpx.AsyncClient(base_url=base_url, timeout=2) as client:
+                response = await client.get("/health/live")
+                ready = await client.get("/health/ready")
+            if response.status_code == 200 and ready.status_code == 200:
+                pids.add(response.json()["pid"])
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.05)
+    return pids
+
+
+async def _measure(args, workers: int) -> float:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(args.port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        pids = await _wait_for_workers(base_url, workers)
+        if not pids:
+            print(f"{workers} worker(s): server did not become ready")
+            return 0.0
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            tokens, _ = await _login_all(client, args.users, args.concurrency)
+            if not tokens:
+                print(f"{workers} worker(s): no user could log in")
+                return 0.0
+            chat = await _chat(client, tokens, DEFAULT_SCENARIOS, args.requests, args.concurrency, args.seed)
+        print(f"{workers} worker(s), {len(pids)} seen  {chat.report()}")
+        return len(chat.latencies) / max(chat.finished - chat.started, 1e-9)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, *(n for n in (2, 4, 8, 16) if n <= cores), cores})
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)))
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _prepare_database()
+    print(f"{cores} CPU(s); fake model {os.environ['FAKE_LLM_LATENCY_MS']} ms; sessions {os.environ['SESSION_BACKEND']}")
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        throughput = await _measure(args, workers)
+        if throughput and baseline is None:
+            baseline = throughput
+        if baseline:
+            print(f"  speed-up over first run: {throughput / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,197 @@
+"""End-to-end load test of /api/auth/token and /messages.
+
+Run with: python -m app.scripts.load_test [--users N] [--concurrency N] [--requests N]
+          [--scenarios file.jsonl] [--base-url http://host:8000]
+
+Without --base-url the FastAPI app runs in-process (lifespan included) behind an ASGI
+transport, with LLM_PROVIDER=fake and a local SQLite file unless those are already set,
+so the numbers measure this service's own overhead plus the fake model's latency.
+Scenario files are jsonl; each line's "message" (or "body", then "title") is sent as a
+chat message, so a backlog file such as requests.jsonl works as-is.
+
+Reports throughput, p50/p95/p99 latency and status codes per endpoint, and for the
+in-process run the time spent in each graph node.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from contextlib import AsyncExitStack
+from uuid import uuid4
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("DATABASE_URL", "sqlite:///load_test.sqlite3")
+os.environ.setdefault("SECRET_KEY", "load-test-secret")
+
+import httpx
+
+DEFAULT_SCENARIOS = [
+    "hello there",
+    "could you pull up everything I have bought from you",
+    "show my orders",
+    "I need a new laptop for work",
+    "do you have any phones?",
+    "I'm looking for a warm sweater",
+    "where is order d0ba6eb9-167d-44bf-bbb5-ec3f7adb56f6",
+    "what did you think of the weather today",
+]
+PASSWORD = "load-test-password"
+
+
+def load_scenarios(path: str) -> list[str]:
+    messages = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            message = row.get("message") or row.get("body") or row.get("title")
+            if message:
+                messages.append(message)
+    return messages
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class Recorder:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: list[float] = []
+        self.statuses: Counter = Counter()
+        self.started = time.perf_counter()
+        self.finished = self.started
+
+    def record(self, latency: float, status: int) -> None:
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+        self.finished = time.perf_counter()
+
+    def report(self) -> str:
+        elapsed = max(self.finished - self.started, 1e-9)
+        ms = lambda p: percentile(self.latencies, p) * 1000
+        return (
+            f"{self.name:18} {len(self.latencies):6d} req {len(self.latencies) / elapsed:8.1f} req/s  "
+            f"p50 {ms(50):7.1f}  p95 {ms(95):7.1f}  p99 {ms(99):7.1f}  max {ms(100):7.1f} ms  "
+            f"status {dict(self.statuses)}"
+        )
+
+
+async def _timed_request(client: httpx.AsyncClient, recorder: Recorder, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError:
+        response, status = None, 0
+    recorder.record(time.perf_counter() - start, status)
+    return response
+
+
+async def _login_all(client: httpx.AsyncClient, users: int, concurrency: int) -> tuple[list[str], Recorder]:
+    run = uuid4().hex[:8]
+    emails = [f"load-{run}-{i}@example.com" for i in range(users)]
+    register = Recorder("register")
+    login = Recorder("/api/auth/token")
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(email: str):
+        async with gate:
+            await _timed_request(client, register, "POST", "/api/auth/users",
+                                 json={"email": email, "name": "Load Test", "password": PASSWORD})
+            response = await _timed_request(client, login, "POST", "/api/auth/token",
+                                            data={"username": email, "password": PASSWORD})
+            return response.json()["access_token"] if response is not None and response.status_code == 200 else None
+
+    login.started = register.started = time.perf_counter()
+    tokens = [t for t in await asyncio.gather(*(one(e) for e in emails)) if t]
+    print(register.report())
+    return tokens, login
+
+
+async def _chat(client: httpx.AsyncClient, tokens: list[str], scenarios: list[str], requests: int, concurrency: int, seed: int) -> Recorder:
+    recorder = Recorder("/messages")
+    rng = random.Random(seed)
+    plan = [rng.choice(scenarios) for _ in range(requests)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, message in enumerate(plan):
+        queue.put_nowait((i, message))
+
+    async def worker(n: int):
+        # One user per worker while there are enough, so the per-user turn lock is not the bottleneck.
+        headers = {"Authorization": f"Bearer {tokens[n % len(tokens)]}"}
+        while not queue.empty():
+            _, message = queue.get_nowait()
+            await _timed_request(client, recorder, "POST", "/messages", json={"message": message}, headers=headers)
+
+    recorder.started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return recorder
+
+
+def _prepare_database() -> None:
+    from sqlmodel import SQLModel, Session, select
+
+    from app.core.models import Product
+    from app.db.init_db import engine, init_db
+
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        if session.exec(select(Product)).first() is None:
+            init_db()
+
+
+async def run(args) -> None:
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else DEFAULT_SCENARIOS
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=args.base_url, timeout=120))
+            agent_graph = None
+        else:
+            _prepare_database()
+            from app.langgraph_agent import graph as agent_graph
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=120))
+
+        print(f"{args.users} users, concurrency {args.concurrency}, {args.requests} messages, {len(scenarios)} scenarios")
+        tokens, login = await _login_all(client, args.users, args.concurrency)
+        print(login.report())
+        if not tokens:
+            print("no user could log in; aborting")
+            return
+        chat = await _chat(client, tokens, scenarios, args.requests, args.concurrency, args.seed)
+        print(chat.report())
+
+    if agent_graph is not None:
+        print("\nper-node time:")
+        for name, stats in agent_graph.node_stats().items():
+            print(
+                f"  {name:30} {stats['calls']:6d} calls  avg {stats['avg_seconds'] * 1000:7.1f} ms  "
+                f"max {stats['max_seconds'] * 1000:7.1f} ms"
+            )
+        print(f"model calls: {getattr(agent_graph.model, 'calls', 'n/a')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--scenarios", help="jsonl file with one message per line")
+    parser.add_argument("--base-url", help="target a running server instead of the in-process app")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
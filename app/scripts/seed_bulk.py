@@ -0,0 +1,266 @@
+"""Bulk seeder for production-sized datasets: users, products, orders and conversations.
+
+Run with: python -m app.scripts.seed_bulk [--users N] [--products N] [--orders N]
+          [--messages N] [--chunk N] [--seed N] [--password PW] [--no-copy]
+
+Rows are produced by generators one chunk at a time, so memory stays flat whatever the
+totals. Each chunk goes to the database in one transaction: COPY on PostgreSQL with
+psycopg2, a Core executemany insert elsewhere.
+
+Every row's primary key is a uuid5 of its table and position, so the run is idempotent:
+before a chunk is written the keys already present are skipped. An interrupted run
+resumes where it stopped, and a rerun with larger totals only adds the new rows.
+
+All users share one bcrypt hash of --password, computed once at SEED_BCRYPT_ROUNDS, so
+seeded accounts can log in (as user<N>@seed.example.com) during load tests.
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+from uuid import UUID, uuid5
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from faker import Faker
+from sqlalchemy import insert, select, text
+
+from app.core.models import Conversation, Order, Product, Users, VALID_PRODUCT_TYPES
+from app.db.engine import engine
+from app.db.init_db import SEED_BCRYPT_ROUNDS, create_indexes
+from app.db.invalidation import ORDERS, PRODUCTS, publish
+from app.security import hash_password
+from sqlmodel import SQLModel
+
+NAMESPACE = UUID("5f0c8a52-3d1e-4b7a-9c43-2a6de1f0b7c1")
+STATUSES = ["pending", "shipped", "delivered"]
+BRANDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Soylent", "Apple", "Samsung"]
+CATALOG = {
+    "mobile": (["phone", "smartphone", "flip phone", "phone mini"], 99, 1599),
+    "laptop": (["notebook", "ultrabook", "gaming laptop", "laptop"], 299, 3499),
+    "clothing": (["sweater", "jeans", "t-shirt", "jacket", "shirt"], 9, 249),
+    "home_appliance": (["microwave", "refrigerator", "air conditioner", "toaster"], 29, 2499),
+}
+# (customer message, agent reply) exchanges for the conversation table.
+EXCHANGES = [
+    ("show my orders", "Here are your recent orders."),
+    ("where is order {order_id}", "Your order is on its way."),
+    ("do you have any phones under $500?", "Here are some phones within your budget."),
+    ("I need a laptop for work", "Here are some laptops you might like."),
+    ("looking for a warm sweater", "Here are some sweaters you might like."),
+    ("update my email to {email}", "Your profile has been updated."),
+    ("hello there", "Hello! How can I help you today?"),
+    ("thanks, that's all", "You're welcome, have a nice day!"),
+]
+
+
+def seed_uuid(kind: str, index: int) -> UUID:
+    return uuid5(NAMESPACE, f"{kind}:{index}")
+
+
+def _rng(seed: int, kind: str, start: int) -> random.Random:
+    # Seeded per chunk, so a resumed run regenerates exactly the rows it skipped.
+    return random.Random(f"{seed}:{kind}:{start}")
+
+
+def _skewed(rng: random.Random, n: int) -> int:
+    # A few heavy customers and popular products, as in real order tables.
+    return min(n - 1, int(n * rng.random() ** 2))
+
+
+def _when(rng: random.Random, now: datetime, days: int) -> datetime:
+    return now - timedelta(seconds=rng.uniform(0, days * 86400))
+
+
+def gen_users(start: int, stop: int, seed: int, hashed_password: str, names: list[str], now: datetime, days: int) -> Iterator[dict]:
+    rng = _rng(seed, "users", start)
+    for i in range(start, stop):
+        yield {
+            "user_id": seed_uuid("user", i),
+            "name": rng.choice(names),
+            "email": f"user{i}@seed.example.com",
+            "hashed_password": hashed_password,
+            "created_at": _when(rng, now, days),
+        }
+
+
+def gen_products(start: int, stop: int, seed: int) -> Iterator[dict]:
+    rng = _rng(seed, "products", start)
+    for i in range(start, stop):
+        product_type = VALID_PRODUCT_TYPES[i % len(VALID_PRODUCT_TYPES)]
+        nouns, low, high = CATALOG[product_type]
+        yield {
+            "product_id": seed_uuid("product", i),
+            "name": f"{rng.choice(BRANDS)} {rng.choice(nouns)} {i}",
+            "price": round(rng.uniform(low, high), 2),
+            "specs": f"model {i % 97}, {rng.choice(['black', 'white', 'blue', 'red'])}",
+            "in_stock": rng.random() > 0.1,
+            "type": product_type,
+        }
+
+
+def gen_orders(start: int, stop: int, seed: int, users: int, products: int, now: datetime, days: int) -> Iterator[dict]:
+    rng = _rng(seed, "orders", start)
+    for i in range(start, stop):
+        created_at = _when(rng, now, days)
+        # Old orders have mostly been delivered.
+        age = (now - created_at).days
+        status = "delivered" if age > 14 else rng.choice(STATUSES)
+        yield {
+            "order_id": seed_uuid("order", i),
+            "user_id": seed_uuid("user", _skewed(rng, users)),
+            "product_id": seed_uuid("product", _skewed(rng, products)),
+            "quantity": rng.randint(1, 5),
+            "status": status,
+            "created_at": created_at,
+        }
+
+
+def gen_messages(start: int, stop: int, seed: int, users: int, orders: int, now: datetime, days: int) -> Iterator[dict]:
+    # Messages come in user/agent pairs; an exchange's two rows share user and time.
+    rng = _rng(seed, "messages", start)
+    exchange = None
+    for i in range(start, stop):
+        if exchange is None or i % 2 == 0:
+            exchange = (seed_uuid("user", _skewed(rng, users)), _when(rng, now, days), rng.choice(EXCHANGES))
+        user_id, sent_at, (question, answer) = exchange
+        if i % 2 == 0:
+            message = question.format(
+                order_id=seed_uuid("order", rng.randrange(max(orders, 1))),
+                email=f"new{i}@seed.example.com",
+            )
+            yield {"conv_id": seed_uuid("message", i), "user_id": user_id, "timestamp": sent_at,
+                   "message": message, "direction": "user"}
+        else:
+            yield {"conv_id": seed_uuid("message", i), "user_id": user_id, "timestamp": sent_at + timedelta(seconds=2),
+                   "message": answer, "direction": "agent"}
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class Loader:
+    """Writes chunks of rows to one table, skipping rows that are already there."""
+
+    def __init__(self, model, use_copy: bool):
+        self.table = model.__table__
+        self.key = next(iter(self.table.primary_key.columns))
+        self.use_copy = use_copy
+        self.inserted = 0
+        self.skipped = 0
+
+    def _existing(self, conn, keys: list[UUID]) -> set[UUID]:
+        found = set()
+        for i in range(0, len(keys), 1000):
+            found.update(conn.execute(select(self.key).where(self.key.in_(keys[i:i + 1000]))).scalars())
+        return found
+
+    def _copy(self, conn, rows: list[dict]) -> None:
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_csv_value(row[c]) for c in columns])
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY "{self.table.name}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+            )
+        finally:
+            cursor.close()
+
+    def load(self, rows: list[dict]) -> None:
+        with engine.begin() as conn:
+            existing = self._existing(conn, [row[self.key.name] for row in rows])
+            if existing:
+                rows = [row for row in rows if row[self.key.name] not in existing]
+                self.skipped += len(existing)
+            if not rows:
+                return
+            if self.use_copy:
+                self._copy(conn, rows)
+            else:
+                conn.execute(insert(self.table), rows)
+        self.inserted += len(rows)
+
+
+def seed_table(name: str, model, total: int, chunk: int, use_copy: bool, rows_for) -> None:
+    loader = Loader(model, use_copy)
+    started = last_report = time.perf_counter()
+    for start in range(0, total, chunk):
+        loader.load(list(rows_for(start, min(start + chunk, total))))
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            done = loader.inserted + loader.skipped
+            print(f"  {name}: {done:,}/{total:,} ({loader.inserted / (now - started):,.0f} rows/s)")
+            last_report = now
+    elapsed = time.perf_counter() - started
+    rate = loader.inserted / elapsed if elapsed else 0.0
+    print(
+        f"{name:<13} inserted {loader.inserted:>10,}  skipped {loader.skipped:>10,}"
+        f"  {elapsed:8.2f}s  {rate:>10,.0f} rows/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--messages", type=int, default=1_000_000, help="conversation rows, in user/agent pairs")
+    parser.add_argument("--chunk", type=int, default=5000, help="rows per transaction")
+    parser.add_argument("--days", type=int, default=365, help="spread timestamps over this many past days")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--password", default="seed-password", help="password shared by all seeded users")
+    parser.add_argument("--no-copy", action="store_true", help="use INSERT even on PostgreSQL")
+    args = parser.parse_args()
+    if args.orders and (not args.users or not args.products):
+        parser.error("orders need at least one user and one product")
+    if args.messages and not args.users:
+        parser.error("conversations need at least one user")
+
+    use_copy = not args.no_copy and engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+    print(f"Seeding {engine.url.render_as_string(hide_password=True)} "
+          f"({'COPY' if use_copy else 'INSERT'}, {args.chunk:,} rows per chunk)")
+
+    SQLModel.metadata.create_all(engine)
+    create_indexes()
+
+    hashed_password = hash_password(args.password, rounds=SEED_BCRYPT_ROUNDS)
+    fake = Faker()
+    fake.seed_instance(args.seed)
+    names = [fake.name() for _ in range(2000)]
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    started = time.perf_counter()
+    seed_table("users", Users, args.users, args.chunk, use_copy,
+               lambda a, b: gen_users(a, b, args.seed, hashed_password, names, now, args.days))
+    seed_table("products", Product, args.products, args.chunk, use_copy,
+               lambda a, b: gen_products(a, b, args.seed))
+    seed_table("orders", Order, args.orders, args.chunk, use_copy,
+               lambda a, b: gen_orders(a, b, args.seed, args.users, args.products, now, args.days))
+    seed_table("conversations", Conversation, args.messages, args.chunk, use_copy,
+               lambda a, b: gen_messages(a, b, args.seed, args.users, args.orders, now, args.days))
+
+    if engine.dialect.name == "postgresql":
+        # Fresh statistics, so the planner uses the indexes on the new data right away.
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    publish(PRODUCTS)
+    publish(ORDERS)
+    print(f"Done in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
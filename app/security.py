@@ -1,8 +1,13 @@
 # app/security.py
-from passlib.context import CryptContext
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from jose import JWTError, jwt
+import asyncio
 import os
+import threading
+import time
 
 # load SECRET_KEY and other settings from .env
 from dotenv import load_dotenv
@@ -13,20 +18,147 @@ if not SECRET_KEY:
     raise RuntimeError("SECRET_KEY must be set in .env")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Put name/email into access tokens so most requests can skip the Users lookup.
+AUTH_EMBED_CLAIMS = os.getenv("AUTH_EMBED_CLAIMS", "false").lower() == "true"
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
 
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so a small thread pool gives real parallelism without pickling costs.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
 
-def hash_password(password: str) -> str:
-    return pwd_ctx.hash(password)
+@lru_cache(maxsize=1)
+def pwd_ctx():
+    # passlib is loaded on the first login or registration, not when the API starts.
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+class PasswordHasherBusy(Exception):
+    pass
+
+def hash_password(password: str, rounds: int | None = None) -> str:
+    if rounds is not None:
+        return pwd_ctx().handler("bcrypt").using(rounds=rounds).hash(password)
+    return pwd_ctx().hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_ctx.verify(plain, hashed)
+    return pwd_ctx().verify(plain, hashed)
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_max_pending = PASSWORD_HASH_MAX_PENDING
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+PASSWORD_HASH_STATS = {"completed": 0, "rejected": 0}
+
+def configure_password_pool(workers: int, max_pending: int) -> None:
+    global _hash_pool, _hash_max_pending
+    old_pool = _hash_pool
+    _hash_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    _hash_max_pending = max_pending
+    old_pool.shutdown(wait=False)
+
+def password_pool_depth() -> int:
+    return _hash_pending
+
+async def _offload(func, *args):
+    """Runs a bcrypt call on the hashing pool, failing fast once too many are queued."""
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= _hash_max_pending:
+            PASSWORD_HASH_STATS["rejected"] += 1
+            raise PasswordHasherBusy("Password hashing is overloaded, retry shortly")
+        _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, func, *args)
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+            PASSWORD_HASH_STATS["completed"] += 1
+
+async def ahash_password(password: str) -> str:
+    return await _offload(hash_password, password)
+
+async def averify_password(plain: str, hashed: str) -> bool:
+    return await _offload(verify_password, plain, hashed)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": now})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str) -> dict:
     return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+# Verified principals keyed by token. Entries never outlive the token's exp, and all
+# of a user's entries are dropped when their profile changes.
+_PRINCIPAL_CACHE: OrderedDict[str, tuple[float, str, object]] = OrderedDict()
+_TOKENS_BY_USER: dict[str, set[str]] = {}
+# Tokens issued at or before this time carry stale claims for the user.
+_CLAIMS_STALE_BEFORE: dict[str, float] = {}
+_principal_lock = threading.Lock()
+
+PRINCIPAL_CACHE_STATS = {"hits": 0, "misses": 0, "invalidations": 0}
+
+def get_cached_principal(token: str):
+    with _principal_lock:
+        entry = _PRINCIPAL_CACHE.get(token)
+        if entry is None:
+            PRINCIPAL_CACHE_STATS["misses"] += 1
+            return None
+        expires_at, user_id, principal = entry
+        if expires_at <= time.time():
+            _drop_token(token, user_id)
+            PRINCIPAL_CACHE_STATS["misses"] += 1
+            return None
+        _PRINCIPAL_CACHE.move_to_end(token)
+        PRINCIPAL_CACHE_STATS["hits"] += 1
+        return principal
+
+def cache_principal(token: str, user_id: str, principal, token_exp: float) -> None:
+    if PRINCIPAL_CACHE_MAX_ENTRIES <= 0:
+        return
+    expires_at = min(token_exp, time.time() + PRINCIPAL_CACHE_TTL_SECONDS)
+    with _principal_lock:
+        _PRINCIPAL_CACHE[token] = (expires_at, user_id, principal)
+        _PRINCIPAL_CACHE.move_to_end(token)
+        _TOKENS_BY_USER.setdefault(user_id, set()).add(token)
+        while len(_PRINCIPAL_CACHE) > PRINCIPAL_CACHE_MAX_ENTRIES:
+            oldest, (_, oldest_user, _) = _PRINCIPAL_CACHE.popitem(last=False)
+            _TOKENS_BY_USER.get(oldest_user, set()).discard(oldest)
+
+def _drop_token(token: str, user_id: str) -> None:
+    _PRINCIPAL_CACHE.pop(token, None)
+    tokens = _TOKENS_BY_USER.get(user_id)
+    if tokens is not None:
+        tokens.discard(token)
+        if not tokens:
+            del _TOKENS_BY_USER[user_id]
+
+def invalidate_principal(user_id: str, at: float | None = None) -> None:
+    """Forgets cached principals for a user and stops trusting claims in their tokens
+    issued up to at (default now). Other processes pass the time the change was made,
+    see app/db/invalidation.py."""
+    with _principal_lock:
+        for token in _TOKENS_BY_USER.pop(user_id, set()):
+            _PRINCIPAL_CACHE.pop(token, None)
+        now = time.time()
+        # Markers older than the token lifetime cannot match any live token.
+        horizon = now - ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        for stale_user in [u for u, t in _CLAIMS_STALE_BEFORE.items() if t < horizon]:
+            del _CLAIMS_STALE_BEFORE[stale_user]
+        stale_before = now if at is None else at
+        _CLAIMS_STALE_BEFORE[user_id] = max(stale_before, _CLAIMS_STALE_BEFORE.get(user_id, 0.0))
+        PRINCIPAL_CACHE_STATS["invalidations"] += 1
+
+def claims_are_fresh(user_id: str, issued_at) -> bool:
+    stale_before = _CLAIMS_STALE_BEFORE.get(user_id)
+    return stale_before is None or (issued_at is not None and issued_at > stale_before)
+
+def clear_principal_cache() -> None:
+    with _principal_lock:
+        _PRINCIPAL_CACHE.clear()
+        _TOKENS_BY_USER.clear()
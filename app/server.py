@@ -0,0 +1,67 @@
+"""Production entry point: several uvicorn workers, no reload, graceful shutdown.
+
+Run with: python -m app.server [--workers N] [--host 0.0.0.0] [--port 8000] [--shutdown-grace S]
+
+Workers default to WEB_CONCURRENCY, else the CPU count. Each worker is a separate
+process with its own pools, caches and compiled graph, so per-user state must live in
+a shared session store. With more than one worker, SESSION_BACKEND=memory is refused.
+Use redis to also serialise each user's turns across workers. Cache invalidations
+reach the other workers through the database (app.db.invalidation), so that polling
+must stay on when there are several workers.
+
+On SIGTERM, a worker first answers /health/ready with 503 for --shutdown-grace seconds
+(SHUTDOWN_GRACE_SECONDS, default 5) while still serving. uvicorn then stops accepting
+connections and waits up to DRAIN_TIMEOUT_SECONDS for open requests. Finally the
+lifespan drains chats still running in the background (streams whose client left)
+before closing its pools.
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import uvicorn
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info").lower())
+    parser.add_argument("--shutdown-grace", type=float, default=float(os.getenv("SHUTDOWN_GRACE_SECONDS", "5")))
+    args = parser.parse_args()
+
+    # Read the environment directly: importing the session store would build the app's engines here.
+    if args.workers > 1 and os.getenv("SESSION_BACKEND", "memory") == "memory":
+        sys.exit(
+            "SESSION_BACKEND=memory keeps sessions inside one process; "
+            "set SESSION_BACKEND=redis (or sql) to run more than one worker."
+        )
+    if args.workers > 1 and float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "1")) <= 0:
+        sys.exit(
+            "CACHE_INVALIDATION_POLL_SECONDS=0 leaves each worker's principal and order caches "
+            "unaware of changes made by the others; keep polling on to run more than one worker."
+        )
+    # Workers inherit the environment, and app.lifecycle reads the grace period from it at
+    # import, so it is imported only after this.
+    os.environ["SHUTDOWN_GRACE_SECONDS"] = str(args.shutdown_grace)
+    from app.lifecycle import DRAIN_TIMEOUT_SECONDS
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+        # Open requests get this long to finish; the lifespan then drains detached streamed runs.
+        timeout_graceful_shutdown=max(1, int(DRAIN_TIMEOUT_SECONDS)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Per-user serialization of graph runs, with optional coalescing of duplicate messages.
+
+Each user gets an asyncio.Lock so load_state -> graph -> save_state runs one turn at a
+time per user. At most USER_LOCK_MAX_WAITERS requests may queue behind a running turn;
+further ones are rejected with UserBusyError. With COALESCE_MESSAGES enabled, an
+identical message that is still in flight for the same user shares the running turn's
+result instead of starting a second one (the usual double-submit case).
+
+With several workers, set remote_lock to the session store's user_lock(). The turn then
+also holds a lock shared by all workers, taken after the local one so waiters on this
+worker do not poll the store.
+"""
+import asyncio
+import os
+import re
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+USER_LOCK_MAX_WAITERS = int(os.getenv("USER_LOCK_MAX_WAITERS", "4"))
+USER_LOCK_TIMEOUT = float(os.getenv("USER_LOCK_TIMEOUT", "60"))
+COALESCE_MESSAGES = os.getenv("COALESCE_MESSAGES", "true").lower() == "true"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class UserBusyError(Exception):
+    pass
+
+
+class _UserLock:
+    __slots__ = ("lock", "waiters")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.waiters = 0
+
+
+class UserRunCoordinator:
+    def __init__(
+        self,
+        max_waiters: int = USER_LOCK_MAX_WAITERS,
+        timeout: float = USER_LOCK_TIMEOUT,
+        coalesce: bool = COALESCE_MESSAGES,
+    ):
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self.coalesce = coalesce
+        self._locks: dict[str, _UserLock] = {}
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self.remote_lock = None
+        self.stats = {"runs": 0, "waited": 0, "rejected": 0, "coalesced": 0}
+
+    @asynccontextmanager
+    async def user_lock(self, user_id: str):
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = self._locks[user_id] = _UserLock()
+        if not entry.lock.locked() and entry.waiters == 0:
+            # Uncontended: acquire() returns without suspending.
+            await entry.lock.acquire()
+        else:
+            if entry.waiters >= self.max_waiters:
+                self.stats["rejected"] += 1
+                raise UserBusyError(f"Too many pending requests for user {user_id}")
+            self.stats["waited"] += 1
+            entry.waiters += 1
+            try:
+                await asyncio.wait_for(entry.lock.acquire(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected"] += 1
+                raise UserBusyError(f"Timed out waiting for the previous request of user {user_id}")
+            finally:
+                entry.waiters -= 1
+
+        try:
+            token = None
+            if self.remote_lock is not None:
+                token = await self.remote_lock.acquire(user_id, self.timeout)
+                if token is None:
+                    self.stats["rejected"] += 1
+                    raise UserBusyError(f"Timed out waiting for the previous request of user {user_id} on another worker")
+            try:
+                yield
+            finally:
+                if token is not None:
+                    await self.remote_lock.release(user_id, token)
+        finally:
+            entry.lock.release()
+            if entry.waiters == 0 and not entry.lock.locked():
+                self._locks.pop(user_id, None)
+
+    async def run(self, user_id: str, message: str, turn: Callable[[], Awaitable]):
+        """Runs turn() under the user's lock, sharing the result with identical in-flight messages."""
+        key = (user_id, _WHITESPACE_RE.sub(" ", message).strip().lower())
+        if self.coalesce and key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the outcome as retrieved so an unshared failure does not log a warning.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            async with self.user_lock(user_id):
+                self.stats["runs"] += 1
+                result = await turn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def active_users(self) -> int:
+        return len(self._locks)
+
+
+user_runs = UserRunCoordinator()
@@ -1,20 +1,310 @@
+"""Per-user conversation state, behind a pluggable SessionStore.
+
+SESSION_BACKEND picks the backend:
+- memory: in-process LRU with idle-TTL eviction (single worker only)
+- sql:    a session_state table on SESSION_DB_URL (defaults to DATABASE_URL)
+- redis:  any Redis-protocol server at REDIS_URL
+
+Only the fields needed to resume a conversation are stored, as JSON, so every backend
+holds the same data and nothing ties a session to one process.
+
+With several workers, the redis backend also provides a cross-worker per-user lock,
+so two turns of one user never run at once on different workers. The sql backend
+serialises turns per worker only.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Optional
+
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, create_engine, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
 from app.langgraph_agent.graph import GraphState
 
-_SESSION_STORE: dict[str, GraphState] = {}
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_DB_URL = os.getenv("SESSION_DB_URL") or os.getenv("DATABASE_URL")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Must outlast the longest turn; a crashed worker's lock expires after this.
+USER_LOCK_TTL_SECONDS = float(os.getenv("USER_LOCK_TTL_SECONDS", "120"))
+
+logger = logging.getLogger(__name__)
+
+SESSION_FIELDS = ("intent", "parameters", "missing_params", "LLM_response", "history", "summary")
+
+
+def _snapshot(state: dict) -> dict:
+    return {key: state.get(key) for key in SESSION_FIELDS if key in state}
+
+
+class SessionStore(ABC):
+    # Backends doing network or disk I/O are called from a worker thread by the async helpers.
+    blocking = True
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def set(self, user_id: str, state: dict) -> None: ...
+
+    @abstractmethod
+    def delete(self, user_id: str) -> bool: ...
+
+    @abstractmethod
+    def size(self) -> int: ...
+
+    def user_lock(self):
+        """A lock shared by every worker using this store, or None when there is none."""
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    blocking = False
+
+    def __init__(self, max_entries: int = SESSION_MAX_ENTRIES, ttl_seconds: float = SESSION_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            last_seen, state = entry
+            now = time.monotonic()
+            if now - last_seen > self.ttl_seconds:
+                del self._entries[user_id]
+                return None
+            self._entries[user_id] = (now, state)
+            self._entries.move_to_end(user_id)
+            return state
+
+    def set(self, user_id: str, state: dict) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), _snapshot(state))
+            self._entries.move_to_end(user_id)
+            self._evict()
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            oldest_user, (last_seen, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and last_seen >= cutoff:
+                break
+            del self._entries[oldest_user]
+
+    def delete(self, user_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(user_id, None) is not None
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLSessionStore(SessionStore):
+    """Durable store shared by every worker that can reach the same database."""
+
+    def __init__(self, url: str = SESSION_DB_URL, ttl_seconds: float = SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.engine = create_engine(url, pool_pre_ping=True)
+        metadata = MetaData()
+        self.table = Table(
+            "session_state",
+            metadata,
+            Column("user_id", String(64), primary_key=True),
+            Column("state", Text, nullable=False),
+            Column("updated_at", Float, nullable=False, index=True),
+        )
+        metadata.create_all(self.engine)
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(self.table.c.state, self.table.c.updated_at).where(self.table.c.user_id == user_id)
+            ).first()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row.updated_at > self.ttl_seconds:
+                conn.execute(delete(self.table).where(self.table.c.user_id == user_id))
+                return None
+            conn.execute(update(self.table).where(self.table.c.user_id == user_id).values(updated_at=now))
+            return json.loads(row.state)
+
+    def set(self, user_id: str, state: dict) -> None:
+        payload = json.dumps(_snapshot(state), default=str)
+        values = {"state": payload, "updated_at": time.time()}
+        with self.engine.begin() as conn:
+            result = conn.execute(update(self.table).where(self.table.c.user_id == user_id).values(**values))
+            if result.rowcount:
+                return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self.table.insert().values(user_id=user_id, **values))
+        except IntegrityError:
+            # Another worker inserted the row first; ours is the newer write.
+            with self.engine.begin() as conn:
+                conn.execute(update(self.table).where(self.table.c.user_id == user_id).values(**values))
+
+    def delete(self, user_id: str) -> bool:
+        with self.engine.begin() as conn:
+            return conn.execute(delete(self.table).where(self.table.c.user_id == user_id)).rowcount > 0
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self.engine.begin() as conn:
+            return conn.execute(delete(self.table).where(self.table.c.updated_at < cutoff)).rowcount
+
+    def size(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(self.table)).scalar_one()
+
+    def close(self) -> None:
+        self.engine.dispose()
+
+
+class RedisSessionStore(SessionStore):
+    """Works with redis-py or any client exposing get/set(ex=)/expire/delete/scan_iter."""
+
+    def __init__(self, client=None, url: str = REDIS_URL, ttl_seconds: float = SESSION_TTL_SECONDS, prefix: str = "session:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = int(ttl_seconds)
+        self.prefix = prefix
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}{user_id}"
+
+    def get(self, user_id: str) -> Optional[dict]:
+        raw = self.client.get(self._key(user_id))
+        if raw is None:
+            return None
+        self.client.expire(self._key(user_id), self.ttl)
+        return json.loads(raw)
+
+    def set(self, user_id: str, state: dict) -> None:
+        self.client.set(self._key(user_id), json.dumps(_snapshot(state), default=str), ex=self.ttl)
+
+    def delete(self, user_id: str) -> bool:
+        return bool(self.client.delete(self._key(user_id)))
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*"))
+
+    def user_lock(self) -> "RedisUserLock":
+        return RedisUserLock(self.client)
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+
+class RedisUserLock:
+    """Per-user lock across workers: SET NX PX with a random token, released only by its owner."""
+
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, client, ttl_seconds: float = USER_LOCK_TTL_SECONDS, prefix: str = "user_lock:"):
+        self.client = client
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.prefix = prefix
+
+    async def acquire(self, user_id: str, timeout: float) -> Optional[str]:
+        key = f"{self.prefix}{user_id}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            if await asyncio.to_thread(self.client.set, key, token, nx=True, px=self.ttl_ms):
+                return token
+            if time.monotonic() + delay > deadline:
+                return None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    async def release(self, user_id: str, token: str) -> None:
+        key = f"{self.prefix}{user_id}"
+        if hasattr(self.client, "eval"):
+            await asyncio.to_thread(self.client.eval, self._RELEASE, 1, key, token)
+            return
+        current = await asyncio.to_thread(self.client.get, key)
+        if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+            await asyncio.to_thread(self.client.delete, key)
+
+
+def build_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "sql":
+        return SQLSessionStore()
+    if backend == "redis":
+        return RedisSessionStore()
+    raise RuntimeError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+_SESSION_STORE: SessionStore = build_session_store()
+
+
+def get_session_store() -> SessionStore:
+    return _SESSION_STORE
+
+
+def set_session_store(store: SessionStore) -> None:
+    global _SESSION_STORE
+    _SESSION_STORE = store
+
 
 def load_state(user_id: str) -> Optional[GraphState]:
     state = _SESSION_STORE.get(user_id)
-    print(f"LOAD_STATE: user_id={user_id}, state={state}")
+    logger.debug("loaded state for user_id=%s: %s", user_id, state)
     return state
 
 def save_state(user_id: str, state: GraphState) -> None:
-    _SESSION_STORE[user_id] = state
-    print(f"SAVE_STATE: user_id={user_id}, state={state}")
+    _SESSION_STORE.set(user_id, state)
+    logger.debug("saved state for user_id=%s: %s", user_id, state)
 
 def clear_state(user_id: str) -> None:
-    if user_id in _SESSION_STORE:
-        print(f"CLEAR_STATE: Clearing state for user_id={user_id}")
-        del _SESSION_STORE[user_id]
+    if _SESSION_STORE.delete(user_id):
+        logger.debug("cleared state for user_id=%s", user_id)
     else:
-        print(f"CLEAR_STATE: No state found for user_id={user_id}")
+        logger.debug("no state to clear for user_id=%s", user_id)
+
+def end_session(user_id: str) -> None:
+    """Leaves an empty session behind rather than none. With no session, the next turn
+    would pick the thread back up from the conversation log; this one starts fresh."""
+    _SESSION_STORE.set(user_id, {"intent": None, "parameters": {}, "missing_params": [], "history": [], "summary": None})
+    logger.debug("ended session for user_id=%s", user_id)
+
+
+async def _call(func, *args):
+    if _SESSION_STORE.blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+async def aload_state(user_id: str) -> Optional[GraphState]:
+    return await _call(load_state, user_id)
+
+async def asave_state(user_id: str, state: GraphState) -> None:
+    await _call(save_state, user_id, state)
+
+async def aclear_state(user_id: str) -> None:
+    await _call(clear_state, user_id)
+
+async def aend_session(user_id: str) -> None:
+    await _call(end_session, user_id)
@@ -1,11 +1,18 @@
 # chat_ui.py
 import gradio as gr
 import asyncio
-from app.langgraph_agent.graph import run_graph
+import threading
+
+def agent():
+    # The agent graph takes over a second to import; load it while the UI starts.
+    from app.langgraph_agent.graph import run_graph
+    return run_graph
+
+threading.Thread(target=agent, daemon=True).start()
 
 # Wrapper to run async call in sync Gradio UI
 def chatbot_wrapper(user_message, user_id="demo-user"):
-    result = asyncio.run(run_graph(user_id=user_id, message=user_message))
+    result = asyncio.run(agent()(user_id=user_id, message=user_message))
     if result["follow_up_prompt"]:
         return result["follow_up_prompt"]
     return f"Intent: {result['intent']}\nParameters: {result['parameters']}"
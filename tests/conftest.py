@@ -0,0 +1,6 @@
+import os
+
+# Offline defaults so app modules import without a .env, a database server or an API key.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("LLM_PROVIDER", "fake")
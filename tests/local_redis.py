@@ -0,0 +1,67 @@
+"""In-process stand-in for the Redis commands the session store and user lock use.
+
+Supports GET, SET with EX/PX/NX, EXPIRE, DELETE, SCAN and the lock's release script.
+The clock is injectable so tests can expire keys without sleeping.
+"""
+import threading
+import time
+
+
+class LocalRedis:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._data: dict[str, tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] <= self.clock():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            if ex is not None:
+                expires = self.clock() + ex
+            elif px is not None:
+                expires = self.clock() + px / 1000
+            else:
+                expires = float("inf")
+            self._data[key] = (value.encode() if isinstance(value, str) else value, expires)
+            return True
+
+    def expire(self, key, seconds):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return 0
+            self._data[key] = (entry[0], self.clock() + seconds)
+            return 1
+
+    def delete(self, key):
+        with self._lock:
+            return 1 if self._live(key) is not None and self._data.pop(key) else 0
+
+    def scan_iter(self, match="*"):
+        prefix = match.rstrip("*")
+        with self._lock:
+            keys = [key for key in list(self._data) if self._live(key) is not None]
+        return (key for key in keys if key.startswith(prefix))
+
+    def eval(self, script, numkeys, key, token):
+        # Only RedisUserLock's compare-and-delete release script is understood.
+        assert "redis.call('del'" in script and numkeys == 1
+        with self._lock:
+            entry = self._live(key)
+            if entry is not None and entry[0] == (token.encode() if isinstance(token, str) else token):
+                del self._data[key]
+                return 1
+            return 0
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.langgraph_agent.batching import MicroBatcher
+from app.langgraph_agent.resilience import LLMUnavailable
+
+
+class _BatchModel:
+    def __init__(self, delay=0.0, fail=None):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+
+    async def abatch(self, prompts, return_exceptions=False):
+        self.batches.append(list(prompts))
+        await asyncio.sleep(self.delay)
+        return [self.fail or f"reply to {p}" for p in prompts]
+
+
+def _batcher(model, **kwargs):
+    options = dict(window=0.02, max_size=8, max_queue=16, nodes={"node"}, enabled=True)
+    options.update(kwargs)
+    return MicroBatcher(model, **options)
+
+
+def test_concurrent_calls_share_one_batch_and_identical_prompts_are_sent_once():
+    model = _BatchModel()
+    batcher = _batcher(model)
+
+    async def run():
+        return await asyncio.gather(*(batcher.ainvoke(p) for p in ("a", "b", "a")))
+
+    assert asyncio.run(run()) == ["reply to a", "reply to b", "reply to a"]
+    assert model.batches == [["a", "b"]]
+    assert batcher.stats["deduplicated"] == 1
+    assert batcher.stats["batched_calls"] == 3
+
+
+def test_a_full_batch_is_sent_without_waiting_for_the_window():
+    model = _BatchModel()
+    batcher = _batcher(model, window=10, max_size=2)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(batcher.ainvoke("a"), batcher.ainvoke("b")), 1)
+
+    assert asyncio.run(run()) == ["reply to a", "reply to b"]
+
+
+def test_a_call_cancelled_while_queued_is_dropped_before_dispatch():
+    model = _BatchModel()
+    batcher = _batcher(model)
+
+    async def run():
+        gone = asyncio.create_task(batcher.ainvoke("gone"))
+        kept = asyncio.create_task(batcher.ainvoke("kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        return await kept
+
+    assert asyncio.run(run()) == "reply to kept"
+    assert model.batches == [["kept"]]
+    assert batcher.stats["dropped"] == 1
+    assert batcher.outstanding == 0
+
+
+def test_calls_beyond_the_queue_limit_are_rejected_at_once():
+    model = _BatchModel(delay=0.05)
+    batcher = _batcher(model, max_queue=2)
+
+    async def run():
+        first = [asyncio.create_task(batcher.ainvoke(p)) for p in ("a", "b")]
+        await asyncio.sleep(0)
+        with pytest.raises(LLMUnavailable):
+            await batcher.ainvoke("c")
+        return await asyncio.gather(*first)
+
+    assert asyncio.run(run()) == ["reply to a", "reply to b"]
+    assert batcher.stats["rejected"] == 1
+
+
+def test_a_failed_batch_fails_each_waiting_call():
+    batcher = _batcher(_BatchModel(fail=ConnectionError("down")))
+
+    async def run():
+        return await asyncio.gather(batcher.ainvoke("a"), batcher.ainvoke("b"), return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in asyncio.run(run()))
+
+
+def test_only_enabled_nodes_go_through_the_batcher():
+    model = _BatchModel()
+    assert _batcher(model).target("node") is not model
+    assert _batcher(model).target("other") is model
+    assert _batcher(model, enabled=False).target("node") is model
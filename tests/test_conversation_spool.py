@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from app.db.conversation_writer import ConversationWriter, _to_row
+
+USER = "7bc56007-ada0-4ca1-a640-a1fbddc16f48"
+
+
+class _Writer(ConversationWriter):
+    """Inserts into a list; rows whose message is "poison" always fail."""
+
+    def __init__(self, tmp_path, reachable=True):
+        super().__init__(
+            batch_size=10,
+            flush_interval=0.01,
+            replay_interval=0.05,
+            spool_path=str(tmp_path / "spool.jsonl"),
+            max_attempts=2,
+            dead_letter_path=str(tmp_path / "dead.jsonl"),
+        )
+        self.inserted = []
+        self.reachable = reachable
+
+    async def _insert(self, rows):
+        if any(row["message"] == "poison" for row in rows) or not self.reachable:
+            raise RuntimeError("insert failed")
+        self.inserted.extend(rows)
+
+    async def _reachable(self):
+        return self.reachable
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def test_a_bad_row_does_not_block_its_batch_and_is_dead_lettered(tmp_path):
+    writer = _Writer(tmp_path)
+    asyncio.run(writer._spool([_to_row(USER, m, "user") for m in ("a", "poison", "b")]))
+
+    asyncio.run(writer._replay_spool())
+    assert [row["message"] for row in writer.inserted] == ["a", "b"]
+    assert [(r["message"], r["attempts"]) for r in _lines(tmp_path / "spool.jsonl")] == [("poison", 1)]
+
+    asyncio.run(writer._replay_spool())
+    assert not (tmp_path / "spool.jsonl").exists()
+    assert [(r["message"], r["attempts"]) for r in _lines(tmp_path / "dead.jsonl")] == [("poison", 2)]
+    assert writer.stats["dead_lettered"] == 1
+    assert not list(tmp_path.glob("spool.jsonl.replay*"))
+
+
+def test_rows_are_kept_without_an_attempt_while_the_database_is_down(tmp_path):
+    writer = _Writer(tmp_path, reachable=False)
+    asyncio.run(writer._spool([_to_row(USER, m, "user") for m in ("a", "b")]))
+
+    asyncio.run(writer._replay_spool())
+    assert [(r["message"], r.get("attempts", 0)) for r in _lines(tmp_path / "spool.jsonl")] == [("a", 0), ("b", 0)]
+    assert not (tmp_path / "dead.jsonl").exists()
+
+
+def test_appends_after_rotation_go_to_a_new_spool(tmp_path):
+    writer = _Writer(tmp_path)
+    asyncio.run(writer._spool([_to_row(USER, "before", "user")]))
+    writer._rotate()
+    asyncio.run(writer._spool([_to_row(USER, "after", "user")]))
+
+    [replay] = tmp_path.glob("spool.jsonl.replay*")
+    assert [r["message"] for r in _lines(replay)] == ["before"]
+    assert [r["message"] for r in _lines(tmp_path / "spool.jsonl")] == ["after"]
+
+    asyncio.run(writer._replay_spool())
+    assert sorted(row["message"] for row in writer.inserted) == ["after", "before"]
+
+
+def test_a_running_writer_replays_its_spool_once_the_database_is_back(tmp_path):
+    writer = _Writer(tmp_path, reachable=False)
+
+    async def run():
+        await writer.start()
+        await writer.enqueue(USER, "while down", "user")
+        await asyncio.sleep(0.1)
+        assert writer.stats["spooled"] == 1
+        writer.reachable = True
+        await asyncio.sleep(0.2)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert [row["message"] for row in writer.inserted] == ["while down"]
+    assert not (tmp_path / "spool.jsonl").exists()
@@ -0,0 +1,30 @@
+import pytest
+
+from app.langgraph_agent import fast_intent
+
+
+@pytest.mark.parametrize("message, email", [
+    ("can you update my email to zein_zein@example.com", "zein_zein@example.com"),
+    ("Please change my email address to Jane.Doe@Example.com", "Jane.Doe@Example.com"),
+    ("set my e-mail to a@b.io", "a@b.io"),
+])
+def test_explicit_email_change_is_fast_pathed(message, email):
+    result = fast_intent.classify(message)
+    assert result["intent"] == "update_profile"
+    assert result["parameters"] == {"email": email}
+
+
+@pytest.mark.parametrize("message", [
+    "which address do you use? mine is a@b.com",
+    "don't change my email to x@y.com",
+    "do not update my email to x@y.com",
+    "never set my email to x@y.com",
+    "I didn't ask to change my email to x@y.com",
+    "use a@b.com for the invoice",
+    "my email is a@b.com",
+    "a@b.com",
+])
+def test_other_messages_with_an_address_never_fast_path_a_write(message):
+    assert fast_intent.classify(message) is None
+    # Not even as the fallback guess used while the model is unavailable.
+    assert fast_intent.best_guess(message) is None
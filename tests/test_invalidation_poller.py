@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+from app import security
+from app.core.models import CacheInvalidation
+from app.db import invalidation
+from app.db.engine import async_engine, async_session
+
+
+def test_start_replays_profile_changes_newer_than_the_token_lifetime(monkeypatch):
+    monkeypatch.setattr(security, "_CLAIMS_STALE_BEFORE", {})
+    orders = []
+    monkeypatch.setitem(invalidation.HANDLERS, invalidation.ORDERS, lambda key, at: orders.append(key))
+    now = time.time()
+    lifetime = security.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    async def run():
+        async with async_engine.begin() as conn:
+            await conn.run_sync(CacheInvalidation.__table__.create, checkfirst=True)
+        async with async_session() as session:
+            session.add_all([
+                CacheInvalidation(scope=invalidation.PRINCIPAL, key="recent", at=now - 60),
+                CacheInvalidation(scope=invalidation.PRINCIPAL, key="expired", at=now - lifetime - 60),
+                CacheInvalidation(scope=invalidation.ORDERS, key="u1", at=now - 60),
+            ])
+            await session.commit()
+        poller = invalidation.InvalidationPoller()
+        await poller.start()
+        # Nothing is applied twice by the first poll.
+        await poller.poll()
+
+    asyncio.run(run())
+    # A token issued before the change still carries the old claims.
+    assert not security.claims_are_fresh("recent", now - 120)
+    assert security.claims_are_fresh("recent", now)
+    # Every token issued before this change has expired, and caches start empty.
+    assert "expired" not in security._CLAIMS_STALE_BEFORE
+    assert orders == []
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from langchain_core.messages import AIMessage
+
+from app.langgraph_agent.llm_cache import DiskBackend, LLMCache, MemoryBackend, TieredBackend, cache_key
+
+
+class _Model:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content=f"reply to {prompt}")
+
+
+def test_keys_ignore_whitespace_but_keep_case():
+    assert cache_key("n", "order  ABC-1\n") == cache_key("n", "order ABC-1")
+    assert cache_key("n", "email Jane@Example.com") != cache_key("n", "email jane@example.com")
+
+
+def test_disk_tier_runs_off_the_event_loop(tmp_path, monkeypatch):
+    disk = DiskBackend(str(tmp_path / "cache.sqlite3"))
+    threads = []
+    for name in ("get", "set"):
+        original = getattr(disk, name)
+
+        def record(*args, _original=original):
+            threads.append(threading.get_ident())
+            return _original(*args)
+
+        monkeypatch.setattr(disk, name, record)
+    model = _Model()
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = LLMCache(TieredBackend(MemoryBackend(), disk), {"n"})
+        await first.ainvoke(model, "n", "Hello")
+        # A fresh memory tier, as after a restart, has to read the disk.
+        second = LLMCache(TieredBackend(MemoryBackend(), disk), {"n"})
+        reply = await second.ainvoke(model, "n", "Hello")
+        return loop_thread, reply
+
+    loop_thread, reply = asyncio.run(run())
+    assert reply.content == "reply to Hello"
+    assert model.calls == 1
+    assert threads and loop_thread not in threads
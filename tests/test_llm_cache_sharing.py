@@ -0,0 +1,66 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from app.langgraph_agent import graph
+from app.langgraph_agent.llm_cache import LLMCache, LLM_CACHE_NODES, MemoryBackend
+
+
+class _EchoModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content=f"reply {len(self.prompts)}")
+
+
+def _state(user_id: str, private_line: str) -> dict:
+    return {
+        "user_id": user_id,
+        "latest_user_message": "thanks, that's all",
+        "intent": "chatting",
+        "parameters": {},
+        "missing_params": [],
+        "execution_response": {},
+        "additional_responses": [],
+        "history": [{"role": "agent", "text": private_line}],
+        "summary": "",
+    }
+
+
+def test_history_bearing_calls_are_never_shared_between_users(monkeypatch):
+    model = _EchoModel()
+    cache = LLMCache(MemoryBackend(), LLM_CACHE_NODES, enabled=True)
+    monkeypatch.setattr(graph, "llm_cache", cache)
+    monkeypatch.setattr(graph.batcher, "model", model)
+    alice = _state("alice", "Your order ships to 1 Main St, Springfield.")
+    bob = _state("bob", "Your email is now bob@example.com.")
+
+    async def turn(state):
+        await graph._extract_with_llm(state["latest_user_message"], state)
+        return (await graph.formulate_response_node(dict(state)))["LLM_response"]
+
+    alice_reply = asyncio.run(turn(alice))
+    bob_reply = asyncio.run(turn(bob))
+
+    assert len(model.prompts) == 4
+    assert alice_reply != bob_reply
+    assert "1 Main St" not in bob_reply
+    assert len(cache.backend) == 0
+    assert cache.stats["formulate_response"] == {"hits": 0, "misses": 0, "bypassed": 2}
+    assert cache.stats["extract_intent_and_parameters"] == {"hits": 0, "misses": 0, "bypassed": 2}
+
+
+def test_history_free_small_talk_is_still_cached(monkeypatch):
+    model = _EchoModel()
+    cache = LLMCache(MemoryBackend(), LLM_CACHE_NODES, enabled=True)
+    monkeypatch.setattr(graph, "llm_cache", cache)
+    monkeypatch.setattr(graph.batcher, "model", model)
+
+    async def turn(user_id):
+        state = {**_state(user_id, ""), "history": []}
+        return (await graph.formulate_response_node(state))["LLM_response"]
+
+    assert asyncio.run(turn("alice")) == asyncio.run(turn("bob"))
+    assert len(model.prompts) == 1
@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine, text
+
+from app.observability import DB_QUERY_SECONDS, instrument_engine
+
+
+def _count(label):
+    return next(line for line in DB_QUERY_SECONDS.render() if line.startswith(f'db_query_seconds_count{{engine="{label}"}}'))
+
+
+def test_failed_statements_leave_no_timing_state_on_the_connection():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, "test_failed")
+    with engine.connect() as conn:
+        for _ in range(3):
+            try:
+                conn.execute(text("SELECT * FROM missing_table"))
+            except Exception:
+                pass
+        conn.execute(text("SELECT 1"))
+        assert not conn.info
+    assert _count("test_failed").endswith(" 1")
@@ -0,0 +1,22 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import SQLModel
+
+from app.db import functions
+from app.db.engine import engine
+from app.db.order_cache import clear_order_cache, get_cached_orders, invalidate_orders
+
+
+def test_sync_lookup_caches_under_the_key_invalidations_use():
+    SQLModel.metadata.create_all(engine)
+    clear_order_cache()
+    user_id = uuid4()
+
+    with pytest.raises(HTTPException):
+        functions.get_my_orders(f" {str(user_id).upper()} ")
+    assert get_cached_orders(str(user_id)) == []
+
+    invalidate_orders(user_id)
+    assert get_cached_orders(str(user_id)) is None
@@ -0,0 +1,83 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from app.langgraph_agent import graph, slots
+
+
+class _CountingModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content='{"query": "iphone 16"}')
+
+
+def _pending(intent, missing, message):
+    return {
+        "user_id": "u1",
+        "latest_user_message": message,
+        "intent": intent,
+        "parameters": {"type": None, "price_filter": None},
+        "missing_params": missing,
+    }
+
+
+def _fill(monkeypatch, state):
+    model = _CountingModel()
+    monkeypatch.setattr(graph.batcher, "model", model)
+    monkeypatch.setattr(graph.llm_cache, "enabled", False)
+    return asyncio.run(graph.fill_pending_slots_node(state)), model
+
+
+def test_typed_slot_is_filled_without_the_model(monkeypatch):
+    order_id = "7bc56007-ada0-4ca1-a640-a1fbddc16f48"
+    state, model = _fill(monkeypatch, _pending("get_order", ["order_id"], f"it's {order_id}"))
+    assert state["parameters"]["order_id"] == order_id
+    assert state["missing_params"] == []
+    assert model.prompts == []
+
+
+def test_unrelated_reply_to_a_typed_slot_skips_the_model(monkeypatch):
+    state, model = _fill(monkeypatch, _pending("get_order", ["order_id"], "what laptops do you sell?"))
+    assert state["missing_params"] == ["order_id"]
+    assert model.prompts == []
+
+
+def test_reply_with_another_intent_clears_the_pending_request(monkeypatch):
+    state, model = _fill(monkeypatch, _pending("search_products", ["query"], "show me my orders"))
+    assert state["intent"] is None
+    assert state["parameters"] == {}
+    assert state["missing_params"] == []
+    assert model.prompts == []
+
+
+def test_free_text_slot_still_asks_the_model(monkeypatch):
+    state, model = _fill(monkeypatch, _pending("search_products", ["query"], "the new iphone 16"))
+    assert state["parameters"]["query"] == "iphone 16"
+    assert len(model.prompts) == 1
+
+
+def test_negated_reply_never_fills_a_pending_write(monkeypatch):
+    state, model = _fill(
+        monkeypatch, _pending("update_profile", ["email"], "no wait, don't change it, a@b.com is my old address")
+    )
+    assert "email" not in state["parameters"]
+    assert state["intent"] is None
+    assert state["missing_params"] == []
+    assert model.prompts == []
+
+
+def test_pending_write_is_filled_by_the_model_not_the_regex(monkeypatch):
+    state, model = _fill(monkeypatch, _pending("update_profile", ["email"], "use a@b.com please"))
+    # The scripted model answers without an email, so nothing is written.
+    assert state["missing_params"] == ["email"]
+    assert len(model.prompts) == 1
+
+
+def test_model_numbers_are_not_read_as_a_price_range(monkeypatch):
+    state, model = _fill(monkeypatch, _pending("search_products", ["query"], "the iphone 13-14 models"))
+    assert state["parameters"]["price_filter"] is None
+    assert slots.extract_price_range("$500-800") == [500.0, 800.0]
+    assert slots.extract_price_range("500 to 800 dollars") == [500.0, 800.0]
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.langgraph_agent import resilience
+from app.langgraph_agent.resilience import CircuitBreaker, LLMClient, LLMUnavailable
+
+
+def _cool_down(breaker):
+    breaker.opened_at -= breaker.cooldown
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial_after_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=10)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    _cool_down(breaker)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one trial at a time while half-open.
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    _cool_down(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_release_frees_the_trial_without_deciding():
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    _cool_down(breaker)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+class _Model:
+    """Replays a script of (delay, outcome) per call; an exception outcome is raised."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        delay, outcome = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def _client(**kwargs):
+    options = dict(deadline=2, attempt_timeout=1, max_retries=2, hedge_after=0, hedge_nodes=set(),
+                   breaker=CircuitBreaker(threshold=5, cooldown=30))
+    options.update(kwargs)
+    return LLMClient(**options)
+
+
+def test_hedge_starts_a_second_request_and_takes_the_first_answer():
+    client = _client(hedge_after=0.05, hedge_nodes={"node"})
+    model = _Model((0.5, "slow"), (0.0, "fast"))
+    assert asyncio.run(client.ainvoke(model, "node", "p")) == "fast"
+    assert model.calls == 2
+    assert client.stats["hedges"] == 1
+    assert client.stats["hedge_wins"] == 1
+
+
+def test_nodes_outside_hedge_nodes_are_never_hedged():
+    client = _client(hedge_after=0.05, hedge_nodes={"other"})
+    model = _Model((0.1, "only"))
+    assert asyncio.run(client.ainvoke(model, "node", "p")) == "only"
+    assert model.calls == 1
+    assert client.stats["hedges"] == 0
+
+
+def test_attempt_timeouts_are_retried_then_reported_unavailable(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_RETRY_MAX_SECONDS", 0)
+    client = _client(attempt_timeout=0.02, max_retries=1)
+    model = _Model((1, "late"))
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(client.ainvoke(model, "node", "p"))
+    assert model.calls == 2
+    assert client.stats["timeouts"] == 2
+    assert client.stats["retries"] == 1
+    assert client.breaker.failures == 1
+
+
+def test_transient_errors_are_retried_until_success(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_RETRY_MAX_SECONDS", 0)
+    client = _client()
+    model = _Model((0, ConnectionError("reset")), (0, "ok"))
+    assert asyncio.run(client.ainvoke(model, "node", "p")) == "ok"
+    assert client.stats["retries"] == 1
+    assert client.breaker.failures == 0
+
+
+def test_non_transient_errors_fail_at_once_and_release_the_breaker():
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    _cool_down(breaker)
+    client = _client(breaker=breaker)
+    model = _Model((0, ValueError("bad request")))
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(client.ainvoke(model, "node", "p"))
+    assert model.calls == 1
+    # The trial proved nothing about the provider: still half-open, next call may try.
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_open_breaker_short_circuits_without_calling_the_model():
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    client = _client(breaker=breaker)
+    model = _Model((0, "unused"))
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(client.ainvoke(model, "node", "p"))
+    assert model.calls == 0
+    assert client.stats["short_circuited"] == 1
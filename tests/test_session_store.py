@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from app.sessions.store import InMemorySessionStore, RedisSessionStore, RedisUserLock, SQLSessionStore
+from tests.local_redis import LocalRedis
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _memory(tmp_path, ttl):
+    store = InMemorySessionStore(max_entries=10, ttl_seconds=ttl)
+    return store, lambda: time.sleep(ttl + 0.05)
+
+
+def _sql(tmp_path, ttl):
+    store = SQLSessionStore(url=f"sqlite:///{tmp_path / 'sessions.db'}", ttl_seconds=ttl)
+    return store, lambda: time.sleep(ttl + 0.05)
+
+
+def _redis(tmp_path, ttl):
+    clock = _Clock()
+    store = RedisSessionStore(client=LocalRedis(clock=clock), ttl_seconds=max(ttl, 1))
+
+    def expire():
+        clock.now += store.ttl + 1
+
+    return store, expire
+
+
+BACKENDS = {"memory": _memory, "sql": _sql, "redis": _redis}
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(ttl=60):
+        store, expire = BACKENDS[request.param](tmp_path, ttl)
+        stores.append(store)
+        return store, expire
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_set_get_and_delete(make_store):
+    store, _ = make_store()
+    assert store.get("u1") is None
+    store.set("u1", {"intent": "get_order", "history": ["hi"], "not_a_session_field": 1})
+    assert store.get("u1") == {"intent": "get_order", "history": ["hi"]}
+    store.set("u1", {"intent": "chatting"})
+    assert store.get("u1") == {"intent": "chatting"}
+    assert store.size() == 1
+
+    assert store.delete("u1")
+    assert store.get("u1") is None
+    assert not store.delete("u1")
+    assert store.size() == 0
+
+
+def test_idle_sessions_expire_after_the_ttl(make_store):
+    store, expire = make_store(ttl=0.1)
+    store.set("u1", {"intent": "chatting"})
+    assert store.get("u1") == {"intent": "chatting"}
+    expire()
+    assert store.get("u1") is None
+
+
+def _lock():
+    clock = _Clock()
+    return RedisUserLock(LocalRedis(clock=clock), ttl_seconds=5), clock
+
+
+def test_user_lock_is_exclusive_until_its_owner_releases_it():
+    lock, _ = _lock()
+
+    async def run():
+        token = await lock.acquire("u1", timeout=0.1)
+        assert token is not None
+        assert await lock.acquire("u1", timeout=0.05) is None
+        # Another user's lock is independent.
+        assert await lock.acquire("u2", timeout=0.05) is not None
+
+        await lock.release("u1", "not-the-owner")
+        assert await lock.acquire("u1", timeout=0.05) is None
+
+        await lock.release("u1", token)
+        assert await lock.acquire("u1", timeout=0.05) is not None
+
+    asyncio.run(run())
+
+
+def test_user_lock_held_by_a_crashed_worker_expires():
+    lock, clock = _lock()
+
+    async def run():
+        stale = await lock.acquire("u1", timeout=0.1)
+        clock.now += 6
+        token = await lock.acquire("u1", timeout=0.05)
+        assert token not in (None, stale)
+        # The old owner's late release must not free the new owner's lock.
+        await lock.release("u1", stale)
+        assert await lock.acquire("u1", timeout=0.05) is None
+
+    asyncio.run(run())
+
+
+def test_ending_a_session_leaves_an_empty_one_so_history_is_not_reloaded(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.api.chatbot_sessions import terminate_session
+    from app.sessions import store as store_module
+
+    monkeypatch.setattr(store_module, "_SESSION_STORE", InMemorySessionStore())
+    store_module.save_state("u1", {"intent": "get_order", "history": [{"role": "user", "text": "hi"}], "summary": "s"})
+
+    asyncio.run(terminate_session(current_user=SimpleNamespace(user_id="u1")))
+    state = store_module.load_state("u1")
+    # A session exists, so /messages resumes it instead of reseeding from the conversation log.
+    assert state
+    assert state["history"] == [] and state["summary"] is None and state["intent"] is None
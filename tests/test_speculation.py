@@ -0,0 +1,49 @@
+import asyncio
+
+from app.langgraph_agent import graph
+
+
+def _state(message):
+    return {"user_id": "u1", "latest_user_message": message}
+
+
+async def _fake_run_intent(intent, parameters, user_id):
+    return {"intent": intent}
+
+
+def _guess(monkeypatch, intents, message):
+    monkeypatch.setattr(graph, "SPECULATIVE_PREFETCH_INTENTS", set(intents))
+    monkeypatch.setattr(graph, "_run_intent", _fake_run_intent)
+
+    async def run():
+        guesses = graph._speculate(_state(message))
+        await asyncio.gather(*(g["task"] for g in guesses))
+        return [g["intent"] for g in guesses]
+
+    return asyncio.run(run())
+
+
+def test_speculation_is_off_by_default():
+    assert graph.SPECULATIVE_PREFETCH_INTENTS == set()
+
+
+def test_orders_are_only_prefetched_when_the_message_hints_at_them(monkeypatch):
+    monkeypatch.setattr(graph, "SPECULATION_STATS", dict.fromkeys(graph.SPECULATION_STATS, 0))
+    assert _guess(monkeypatch, {"get_my_orders"}, "how is your day going") == []
+    assert _guess(monkeypatch, {"get_my_orders"}, "what have I bought from you lately") == ["get_my_orders"]
+    assert graph.SPECULATION_STATS["skipped"] == 1
+    assert graph.SPECULATION_STATS["started"] == 1
+
+
+def test_guesses_the_model_rejects_count_as_wasted(monkeypatch):
+    monkeypatch.setattr(graph, "SPECULATIVE_PREFETCH_INTENTS", {"get_my_orders"})
+    monkeypatch.setattr(graph, "SPECULATION_STATS", dict.fromkeys(graph.SPECULATION_STATS, 0))
+    monkeypatch.setattr(graph, "_run_intent", _fake_run_intent)
+
+    async def run():
+        guesses = graph._speculate(_state("any update on my orders?"))
+        return await graph._claim_speculation(guesses, [{"intent": "chatting", "parameters": {}}])
+
+    assert asyncio.run(run()) == []
+    assert graph.SPECULATION_STATS["wasted"] == 1
+    assert graph.SPECULATION_STATS["used"] == 0
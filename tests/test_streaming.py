@@ -0,0 +1,35 @@
+import asyncio
+
+from app.langgraph_agent import graph, providers
+
+
+class _FailsOnceMidStream(providers.ScriptedChatModel):
+    """Streams the first reply of formulate_response, then fails with a transient error."""
+
+    failed: bool = False
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+        if not self.failed and "JSON" not in str(messages[-1].content):
+            self.failed = True
+            raise TimeoutError("connection dropped mid-stream")
+
+
+def test_a_retried_stream_is_preceded_by_a_reset(monkeypatch):
+    monkeypatch.setattr(graph.batcher, "model", _FailsOnceMidStream(latency=0, jitter=0))
+    monkeypatch.setattr(graph.llm_cache, "enabled", False)
+    state = {
+        "user_id": "u1", "latest_user_message": "tell me a joke", "intent": None, "parameters": {},
+        "missing_params": [], "history": [], "summary": "",
+    }
+
+    async def run():
+        return [event async for event in graph.stream_graph(state)]
+
+    events = asyncio.run(run())
+    kinds = [kind for kind, _ in events]
+    assert kinds.count("reset") == 1
+    after_reset = kinds.index("reset") + 1
+    text = "".join(payload for kind, payload in events[after_reset:] if kind == "token")
+    assert text == events[-1][1]["LLM_response"]
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.sessions.concurrency import UserBusyError, UserRunCoordinator
+
+
+def test_turns_for_one_user_run_one_at_a_time_and_in_order():
+    runs = UserRunCoordinator(max_waiters=4, timeout=1, coalesce=False)
+    order = []
+
+    async def turn(name):
+        order.append(f"start {name}")
+        await asyncio.sleep(0.01)
+        order.append(f"end {name}")
+        return name
+
+    async def run():
+        return await asyncio.gather(*(runs.run("u1", name, lambda n=name: turn(n)) for name in ("a", "b", "c")))
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+    assert order == ["start a", "end a", "start b", "end b", "start c", "end c"]
+    assert runs.stats["waited"] == 2
+    assert runs.active_users() == 0
+
+
+def test_waiters_beyond_the_limit_are_rejected():
+    runs = UserRunCoordinator(max_waiters=1, timeout=1, coalesce=False)
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(runs.run("u1", "first", release.wait))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(runs.run("u1", "second", lambda: asyncio.sleep(0)))
+        await asyncio.sleep(0)
+        with pytest.raises(UserBusyError):
+            await runs.run("u1", "third", lambda: asyncio.sleep(0))
+        # Another user is unaffected.
+        await runs.run("u2", "hello", lambda: asyncio.sleep(0))
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+    asyncio.run(run())
+    assert runs.stats["rejected"] == 1
+
+
+def test_waiting_past_the_timeout_is_rejected_and_frees_the_waiter_slot():
+    runs = UserRunCoordinator(max_waiters=1, timeout=0.02, coalesce=False)
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(runs.run("u1", "first", release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(UserBusyError):
+            await runs.run("u1", "second", lambda: asyncio.sleep(0))
+        # The timed-out waiter no longer counts against max_waiters.
+        queued = asyncio.create_task(runs.run("u1", "third", lambda: asyncio.sleep(0, "ran")))
+        await asyncio.sleep(0)
+        release.set()
+        await holder
+        return await queued
+
+    assert asyncio.run(run()) == "ran"
+
+
+def test_identical_in_flight_messages_share_one_turn():
+    runs = UserRunCoordinator(max_waiters=4, timeout=1, coalesce=True)
+    calls = []
+
+    async def turn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "reply"
+
+    async def run():
+        return await asyncio.gather(
+            runs.run("u1", "Where is my order?", turn),
+            runs.run("u1", "  where is  my order? ", turn),
+            runs.run("u2", "Where is my order?", turn),
+        )
+
+    assert asyncio.run(run()) == ["reply", "reply", "reply"]
+    # u1's double submit coalesced; u2 ran its own turn.
+    assert len(calls) == 2
+    assert runs.stats["coalesced"] == 1
+
+
+def test_a_failed_turn_fails_the_coalesced_caller_too():
+    runs = UserRunCoordinator(max_waiters=4, timeout=1, coalesce=True)
+
+    async def turn():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("graph failed")
+
+    async def run():
+        return await asyncio.gather(runs.run("u1", "hi", turn), runs.run("u1", "hi", turn), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    assert runs.stats["runs"] == 1
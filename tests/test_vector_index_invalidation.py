@@ -0,0 +1,58 @@
+from sqlmodel import Session, SQLModel
+
+from app.core.models import Product
+from app.db import invalidation, vector_index as vector_index_module
+from app.db.engine import engine
+from app.db.vector_index import VectorIndex
+
+
+def _index(tmp_path, monkeypatch, *products):
+    SQLModel.metadata.create_all(engine, tables=[Product.__table__])
+    with Session(engine, expire_on_commit=False) as session:
+        session.add_all(products)
+        session.commit()
+    index = VectorIndex(path=str(tmp_path / "vectors"), dim=64)
+    index.sync()
+    monkeypatch.setattr(vector_index_module, "vector_index", index)
+    monkeypatch.setattr(invalidation, "VECTOR_INDEX_ENABLED", True)
+    return index
+
+
+def _save(*products, delete=()):
+    with Session(engine, expire_on_commit=False) as session:
+        for product in products:
+            session.merge(product)
+        for product in delete:
+            session.delete(session.get(Product, product.product_id))
+        session.commit()
+
+
+def test_published_product_changes_are_queued_and_applied_by_id(tmp_path, monkeypatch):
+    kettle = Product(name="Steel Kettle", price=30, specs="1.7 litre", type="home_appliance")
+    toaster = Product(name="Toaster", price=25, specs="two slot", type="home_appliance")
+    index = _index(tmp_path, monkeypatch, kettle, toaster)
+    embedded = index.stats["embedded"]
+
+    kettle.name = "Glass Kettle"
+    _save(kettle, delete=[toaster])
+    invalidation.apply(invalidation.PRODUCTS, str(kettle.product_id), 0.0)
+    invalidation.apply(invalidation.PRODUCTS, str(toaster.product_id), 0.0)
+    # Queued only: nothing is embedded on the caller's thread.
+    assert index.stats["embedded"] == embedded
+
+    index.apply_changes()
+    assert index.stats["embedded"] == embedded + 1
+    assert index.search("glass kettle") == [kettle.product_id]
+    assert index.search("toaster") == []
+    assert len(index) == 1
+
+
+def test_an_invalidation_of_every_product_runs_a_full_sync(tmp_path, monkeypatch):
+    lamp = Product(name="Desk Lamp", price=15, specs="LED", type="home_appliance")
+    index = _index(tmp_path, monkeypatch, lamp)
+    fan = Product(name="Ceiling Fan", price=60, specs="three speeds", type="home_appliance")
+    _save(fan)
+
+    invalidation.apply(invalidation.PRODUCTS, invalidation.ALL, 0.0)
+    index.apply_changes()
+    assert index.search("ceiling fan") == [fan.product_id]